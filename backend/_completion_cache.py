@@ -0,0 +1,57 @@
+"""
+On-disk completion cache for the API test scripts
+
+Identical requests are answered from the last recorded response, so re-runs
+of the scripts make no API calls. Set FORCE_LIVE=1 to always call the API
+(the fresh response still replaces the recorded one).
+"""
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+import orjson
+from anthropic.types import Message
+
+from app.core.config import settings
+
+FORCE_LIVE = bool(os.getenv("FORCE_LIVE"))
+COMPLETION_CACHE_DIR = Path(settings.CLAUDE_CACHE_DIR) / "completions"
+
+
+def _completion_key(params: Any) -> str:
+    """sha256 of the full request (model, system, messages, max_tokens, ...)"""
+    payload = orjson.dumps(params, option=orjson.OPT_SORT_KEYS, default=str)
+    return hashlib.sha256(payload).hexdigest()
+
+
+def cached_create(client, **params) -> Message:
+    """
+    messages.create with a disk cache in front of it
+
+    Args:
+        client: Anthropic client used on a cache miss
+        **params: Arguments for messages.create
+
+    Returns:
+        The recorded Message for these params, or a fresh one from the API
+    """
+    path = COMPLETION_CACHE_DIR / f"{_completion_key(params)}.json"
+    if not FORCE_LIVE:
+        try:
+            message = Message.model_validate_json(path.read_bytes())
+            print(f"💾 Replayed recorded response ({path.name[:12]}...)")
+            return message
+        except (OSError, ValueError):
+            pass
+
+    message = client.messages.create(**params)
+
+    # Temp file + rename, so an interrupted run never leaves a partial entry
+    COMPLETION_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=COMPLETION_CACHE_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        f.write(message.model_dump_json())
+    os.replace(tmp_path, path)
+    return message
@@ -1,68 +1,182 @@
 """
 Configuration module for Symphony AI Backend
 """
+import mmap
 import os
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
+from typing import List, Optional
 from dotenv import load_dotenv
 
+
+def _find_dotenv() -> Optional[Path]:
+    """Locate the nearest .env walking up from this module"""
+    for directory in Path(__file__).resolve().parents:
+        candidate = directory / ".env"
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def _fast_load_dotenv(path: Optional[Path]) -> None:
+    """
+    Load a .env file into os.environ
+
+    Plain KEY=value files are parsed directly; anything using ${...}
+    interpolation falls back to python-dotenv. Existing environment
+    variables are never overridden (same as load_dotenv).
+    """
+    if path is None:
+        return
+
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm.find(b"${") != -1:
+                load_dotenv(path)
+                return
+            data = mm[:]
+
+    for raw_line in data.splitlines():
+        line = raw_line.strip()
+        if not line or line.startswith(b"#"):
+            continue
+        if line.startswith(b"export "):
+            line = line[len(b"export "):]
+        key, sep, value = line.partition(b"=")
+        if not sep:
+            continue
+        value = value.strip()
+        if value[:1] in (b'"', b"'") and value[-1:] == value[:1] and len(value) > 1:
+            value = value[1:-1]
+        else:
+            # Strip inline comments from unquoted values
+            value = value.partition(b" #")[0].rstrip()
+        name = key.strip().decode()
+        if name not in os.environ:
+            os.environ[name] = value.decode()
+
+
 # Load environment variables
-load_dotenv()
+_fast_load_dotenv(_find_dotenv())
+
+# Snapshot of the environment (after .env is loaded); Settings defaults read from it
+_ENV = dict(os.environ)
 
+BASE_DIR = Path(__file__).parent.parent.parent
+UPLOAD_DIR = BASE_DIR / "uploads"
+
+
+def _env_bool(name: str, default: str) -> bool:
+    return _ENV.get(name, default).lower() == "true"
+
+
+@dataclass(frozen=True, slots=True)
 class Settings:
     """Application settings"""
 
     # API Keys
-    ANTHROPIC_API_KEY: str = os.getenv("ANTHROPIC_API_KEY", "")
-    OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    ANTHROPIC_API_KEY: str = _ENV.get("ANTHROPIC_API_KEY", "")
+    OPENAI_API_KEY: str = _ENV.get("OPENAI_API_KEY", "")
 
     # Database
-    DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./symphony.db")
+    DATABASE_URL: str = _ENV.get("DATABASE_URL", "sqlite:///./symphony.db")
 
     # Server
-    HOST: str = os.getenv("HOST", "0.0.0.0")
-    PORT: int = int(os.getenv("PORT", "8000"))
+    HOST: str = _ENV.get("HOST", "0.0.0.0")
+    PORT: int = int(_ENV.get("PORT", "8000"))
+    LOG_LEVEL: str = _ENV.get("LOG_LEVEL", "INFO").upper()
 
     # CORS
-    CORS_ORIGINS: list = [
+    CORS_ORIGINS: List[str] = field(default_factory=lambda: [
         "http://localhost:5173",  # Vite default
         "http://localhost:3000",
         "http://127.0.0.1:5173",
         "http://127.0.0.1:3000",
-    ]
+    ])
 
     # File Upload
-    MAX_AUDIO_SIZE: int = int(os.getenv("MAX_AUDIO_SIZE", "100")) * 1024 * 1024  # MB to bytes
-    MAX_CHART_SIZE: int = int(os.getenv("MAX_CHART_SIZE", "10")) * 1024 * 1024   # MB to bytes
+    MAX_AUDIO_SIZE: int = int(_ENV.get("MAX_AUDIO_SIZE", "100")) * 1024 * 1024  # MB to bytes
+    MAX_CHART_SIZE: int = int(_ENV.get("MAX_CHART_SIZE", "10")) * 1024 * 1024   # MB to bytes
 
     # Paths
-    BASE_DIR: Path = Path(__file__).parent.parent.parent
-    UPLOAD_DIR: Path = BASE_DIR / "uploads"
+    BASE_DIR: Path = BASE_DIR
+    UPLOAD_DIR: Path = UPLOAD_DIR
     AUDIO_DIR: Path = UPLOAD_DIR / "audio"
     CHARTS_DIR: Path = UPLOAD_DIR / "charts"
 
     # Processing
-    ENABLE_CACHE: bool = os.getenv("ENABLE_CACHE", "true").lower() == "true"
-    MAX_CONCURRENT_JOBS: int = int(os.getenv("MAX_CONCURRENT_JOBS", "5"))
+    ENABLE_CACHE: bool = _env_bool("ENABLE_CACHE", "true")
+    MAX_CONCURRENT_JOBS: int = int(_ENV.get("MAX_CONCURRENT_JOBS", "5"))
+    # Load model weights when the app module is imported, so a pre-forking server
+    # (gunicorn --preload) shares them copy-on-write across workers
+    PRELOAD_MODELS: bool = _env_bool("PRELOAD_MODELS", "false")
 
     # Audio Processing
     SAMPLE_RATE: int = 16000
     N_MFCC: int = 20
     HOP_LENGTH: int = 512
+    # Upper pYIN bound; speech F0 rarely exceeds ~500 Hz and a narrower range is much faster
+    PITCH_FMAX: float = float(_ENV.get("PITCH_FMAX", "500"))
 
     # Model names
     FINBERT_MODEL: str = "ProsusAI/finbert"
+    # Run FinBERT in fp16 (GPU) / bf16 (CPU) instead of fp32
+    FINBERT_HALF_PRECISION: bool = _env_bool("FINBERT_HALF_PRECISION", "true")
+    # Serve FinBERT from an INT8 ONNX export instead (needs optimum[onnxruntime]), created once with:
+    #   optimum-cli export onnx --model ProsusAI/finbert finbert_onnx/
+    #   quantize_dynamic("finbert_onnx/model.onnx", "finbert_onnx/model_int8.onnx", weight_type=QuantType.QInt8)
+    FINBERT_ONNX_DIR: str = _ENV.get("FINBERT_ONNX_DIR", "")
+    FINBERT_ONNX_FILE: str = _ENV.get("FINBERT_ONNX_FILE", "model_int8.onnx")
 
     # Claude AI Configuration
-    CLAUDE_MODEL: str = os.getenv("CLAUDE_MODEL", "claude-sonnet-4-5-20250929")
-    CLAUDE_MAX_TOKENS: int = int(os.getenv("CLAUDE_MAX_TOKENS", "4096"))
-    CLAUDE_TEMPERATURE: float = float(os.getenv("CLAUDE_TEMPERATURE", "0.7"))
-    ENABLE_PROMPT_CACHING: bool = os.getenv("ENABLE_PROMPT_CACHING", "true").lower() == "true"
+    CLAUDE_MODEL: str = _ENV.get("CLAUDE_MODEL", "claude-sonnet-4-5-20250929")
+    CLAUDE_MAX_TOKENS: int = int(_ENV.get("CLAUDE_MAX_TOKENS", "4096"))
+    CLAUDE_TEMPERATURE: float = float(_ENV.get("CLAUDE_TEMPERATURE", "0.7"))
+    ENABLE_PROMPT_CACHING: bool = _env_bool("ENABLE_PROMPT_CACHING", "true")
+    # Keep finished analyses on disk, keyed by a digest of the full request, so identical re-runs skip the call
+    CLAUDE_CACHE_ENABLED: bool = _env_bool("CLAUDE_CACHE_ENABLED", "false")
+    CLAUDE_CACHE_DIR: Path = Path(_ENV.get("CLAUDE_CACHE_DIR", str(UPLOAD_DIR / "claude_cache"))).expanduser()
+    # Entries older than this (seconds) are ignored and removed; the oldest go first past the entry cap
+    CLAUDE_CACHE_MAX_AGE: int = int(_ENV.get("CLAUDE_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+    CLAUDE_CACHE_MAX_ENTRIES: int = int(_ENV.get("CLAUDE_CACHE_MAX_ENTRIES", "1000"))
+    # Max simultaneous Anthropic requests per job
+    ANTHROPIC_CONCURRENCY: int = int(_ENV.get("ANTHROPIC_CONCURRENCY", "5"))
+    # Coalesce concurrent comprehensive analyses into Message Batches (half price, higher latency)
+    ENABLE_CLAUDE_BATCHING: bool = _env_bool("ENABLE_CLAUDE_BATCHING", "false")
+    # Seconds to wait for a Claude analysis batch before cancelling it and calling directly
+    CLAUDE_BATCH_TIMEOUT: int = int(_ENV.get("CLAUDE_BATCH_TIMEOUT", "1800"))
+    # Lifetime of cached Claude prompt prefixes: "5m" or "1h" (1h writes cost more but survive sparse traffic)
+    CLAUDE_CACHE_TTL: str = _ENV.get("CLAUDE_CACHE_TTL", "1h")
+    # Re-read the cached Claude prompt prefix while idle so it stays warm (one 1-token call per interval)
+    CLAUDE_CACHE_KEEPALIVE: bool = _env_bool("CLAUDE_CACHE_KEEPALIVE", "false")
+    CLAUDE_CACHE_KEEPALIVE_INTERVAL: int = int(_ENV.get("CLAUDE_CACHE_KEEPALIVE_INTERVAL", "240"))
+    # Route chart analysis through the Message Batches API (always, or above this many charts)
+    CHART_BATCH_MODE: bool = _env_bool("CHART_BATCH_MODE", "false")
+    CHART_BATCH_MIN_CHARTS: int = int(_ENV.get("CHART_BATCH_MIN_CHARTS", "25"))
+    # Seconds to wait for a chart Message Batch before cancelling it and going interactive
+    CHART_BATCH_TIMEOUT: int = int(_ENV.get("CHART_BATCH_TIMEOUT", "1800"))
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Shared settings object for the process
+
+    Field defaults are read from _ENV when the class is defined, i.e. at
+    import, so later environment changes never reach Settings(); the cache
+    only makes every caller share one instance.
+    """
+    return Settings()
+
 
-    def __init__(self):
-        """Create necessary directories"""
-        self.UPLOAD_DIR.mkdir(exist_ok=True)
-        self.AUDIO_DIR.mkdir(exist_ok=True)
-        self.CHARTS_DIR.mkdir(exist_ok=True)
+def ensure_dirs() -> None:
+    """Create upload directories (called once at application startup)"""
+    settings.UPLOAD_DIR.mkdir(exist_ok=True)
+    settings.AUDIO_DIR.mkdir(exist_ok=True)
+    settings.CHARTS_DIR.mkdir(exist_ok=True)
 
 
-settings = Settings()
+settings = get_settings()
@@ -1,26 +1,77 @@
 """
 Symphony AI - Main FastAPI Application
 """
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
-from sqlalchemy.orm import Session
-from typing import Optional, List
-import shutil
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session, load_only
+from typing import Optional, List, Tuple
 from pathlib import Path
 from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import lru_cache
+import asyncio
+import hashlib
+import logging
+import threading
+import time
 import uuid
+import aiofiles
 
-from .core.config import settings
+try:
+    from prometheus_client import make_asgi_app
+except ImportError:  # optional metrics export
+    make_asgi_app = None
+
+from .core.config import settings, ensure_dirs
+from .core.logging_config import setup_logging, shutdown_logging
 from .models import init_db, get_db, AnalysisJob
-from .schemas import JobStatus, AnalysisResults
+from .schemas import JobStatus, AnalysisResults, JOB_STATUS_ADAPTER
 from .services.orchestrator import AnalysisOrchestrator
+from .services.anthropic_client import close_async_client
+from .services.job_progress import job_progress
+from .services._registry import preload_models
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize database, directories and models on startup; stop job pool on shutdown"""
+    setup_logging()
+    ensure_dirs()
+    init_db()
+
+    # Models load here, once per worker, rather than at import time
+    app.state.orchestrator = AnalysisOrchestrator()
+
+    logger.info("🎵 Symphony AI started successfully!")
+    logger.info("📊 Database initialized at %s", settings.DATABASE_URL)
+    logger.info("📁 Upload directory: %s", settings.UPLOAD_DIR)
+
+    yield
+
+    # Stop accepting new jobs and drop queued ones
+    JOB_POOL.shutdown(wait=False, cancel_futures=True)
+
+    # Cancel pending Claude batches, then release pooled Anthropic connections
+    app.state.orchestrator.close()
+    close_async_client()
+
+    shutdown_logging()
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Symphony AI",
     description="Multi-modal Financial Analysis Platform",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -32,17 +83,111 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize orchestrator
-orchestrator = AnalysisOrchestrator()
+# Prometheus scrape endpoint (Claude token/cache counters) when prometheus_client is installed
+if make_asgi_app is not None:
+    app.mount("/metrics", make_asgi_app())
 
+if settings.PRELOAD_MODELS:
+    preload_models()
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database on startup"""
-    init_db()
-    print("🎵 Symphony AI started successfully!")
-    print(f"📊 Database initialized at {settings.DATABASE_URL}")
-    print(f"📁 Upload directory: {settings.UPLOAD_DIR}")
+# Bounded worker pool for analysis jobs (honors MAX_CONCURRENT_JOBS)
+JOB_POOL = ThreadPoolExecutor(
+    max_workers=settings.MAX_CONCURRENT_JOBS,
+    thread_name_prefix="symphony-job",
+)
+
+# Accepted upload extensions
+ALLOWED_AUDIO_EXTENSIONS = frozenset({".mp3", ".wav", ".m4a", ".flac", ".ogg"})
+ALLOWED_CHART_EXTENSIONS = frozenset({".png", ".jpg", ".jpeg", ".pdf"})
+ALLOWED_AUDIO_LABEL = ", ".join(sorted(ALLOWED_AUDIO_EXTENSIONS))
+
+
+def _file_suffix(filename: str) -> str:
+    """Lower-cased extension of a filename (same as Path(filename).suffix.lower())"""
+    dot = filename.rfind(".")
+    if dot <= 0 or "/" in filename[dot:]:
+        return ""
+    return filename[dot:].lower()
+
+
+# Chunk size for streaming uploads to disk
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MB
+
+
+async def _save_upload(upload: UploadFile, dest: Path) -> str:
+    """
+    Stream an uploaded file to disk without blocking the event loop
+
+    Returns:
+        SHA-256 hex digest of the file contents
+    """
+    hasher = hashlib.sha256()
+    async with aiofiles.open(dest, "wb") as buffer:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+            await buffer.write(chunk)
+    return hasher.hexdigest()
+
+
+# (content_hash, context_hash) -> id of a completed job with those inputs
+RESULT_CACHE_SIZE = 256
+_result_cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+# Uploads are handled on threadpool workers; the lock is never held across a query
+_result_cache_lock = threading.Lock()
+
+
+def _find_completed_job(
+    db: Session, content_hash: str, company_context: Optional[str]
+) -> Optional[AnalysisJob]:
+    """
+    Find a completed job for the same uploaded files and company context
+
+    Recently matched jobs are remembered in an in-process LRU so repeat
+    uploads resolve with a primary-key lookup.
+    """
+    key = (content_hash, hashlib.sha256((company_context or "").encode()).hexdigest())
+
+    with _result_cache_lock:
+        job_id = _result_cache.get(key)
+    if job_id is not None:
+        job = db.get(AnalysisJob, job_id)
+        with _result_cache_lock:
+            if job is not None and job.status == "completed":
+                if key in _result_cache:
+                    _result_cache.move_to_end(key)
+                return job
+            _result_cache.pop(key, None)
+
+    job = db.query(AnalysisJob)\
+        .filter(
+            AnalysisJob.content_hash == content_hash,
+            AnalysisJob.company_context == company_context,
+            AnalysisJob.status == "completed",
+        )\
+        .first()
+
+    if job is not None:
+        with _result_cache_lock:
+            _result_cache[key] = job.id
+            if len(_result_cache) > RESULT_CACHE_SIZE:
+                _result_cache.popitem(last=False)
+
+    return job
+
+
+class AudioFileResponse(FileResponse):
+    """
+    FileResponse tuned for large audio files
+
+    Streams in 1 MB chunks instead of Starlette's 64 KB default, cutting
+    the number of read/send round-trips for multi-MB recordings. Servers
+    that support the ASGI pathsend extension still hand the file off
+    directly without any chunking in Python.
+    """
+    chunk_size = UPLOAD_CHUNK_SIZE
 
 
 @app.get("/")
@@ -55,19 +200,31 @@ async def root():
     }
 
 
-@app.get("/health")
-async def health_check():
-    """Health check endpoint"""
+# API keys are fixed for the life of the process
+ANTHROPIC_CONFIGURED = bool(settings.ANTHROPIC_API_KEY)
+OPENAI_CONFIGURED = bool(settings.OPENAI_API_KEY)
+
+
+@lru_cache(maxsize=1)
+def _health_cached(second: int) -> dict:
+    """Health payload, rebuilt at most once per second"""
     return {
         "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat(),
-        "anthropic_configured": bool(settings.ANTHROPIC_API_KEY),
-        "openai_configured": bool(settings.OPENAI_API_KEY),
+        "timestamp": datetime.utcfromtimestamp(second).isoformat(),
+        "anthropic_configured": ANTHROPIC_CONFIGURED,
+        "openai_configured": OPENAI_CONFIGURED,
     }
 
 
+@app.get("/health")
+async def health_check():
+    """Health check endpoint"""
+    return _health_cached(int(time.time()))
+
+
 @app.post("/api/analyze", response_model=JobStatus)
 async def analyze_earnings_call(
+    request: Request,
     audio: UploadFile = File(..., description="Earnings call audio file (mp3, wav, m4a)"),
     charts: Optional[List[UploadFile]] = File(None, description="Financial chart images (optional)"),
     company_name: Optional[str] = Form(None),
@@ -83,34 +240,39 @@ async def analyze_earnings_call(
             raise HTTPException(status_code=400, detail="No audio file provided")
 
         # Check file extension
-        allowed_audio_extensions = {".mp3", ".wav", ".m4a", ".flac", ".ogg"}
-        audio_ext = Path(audio.filename).suffix.lower()
-        if audio_ext not in allowed_audio_extensions:
+        if _file_suffix(audio.filename) not in ALLOWED_AUDIO_EXTENSIONS:
             raise HTTPException(
                 status_code=400,
-                detail=f"Invalid audio format. Allowed: {', '.join(allowed_audio_extensions)}"
+                detail=f"Invalid audio format. Allowed: {ALLOWED_AUDIO_LABEL}"
             )
 
         # Generate job ID first
-        job_id = str(uuid.uuid4())
+        job_id = uuid.uuid4().hex
 
         # Save audio file BEFORE creating job
         audio_path = settings.AUDIO_DIR / f"{job_id}_{audio.filename}"
-        with open(audio_path, "wb") as buffer:
-            shutil.copyfileobj(audio.file, buffer)
+        audio_digest = await _save_upload(audio, audio_path)
 
-        # Save chart files if provided
-        chart_paths = []
+        # Save chart files if provided (written concurrently)
+        chart_uploads = []
         if charts:
             for i, chart in enumerate(charts):
                 if chart.filename:
-                    chart_ext = Path(chart.filename).suffix.lower()
-                    if chart_ext not in {".png", ".jpg", ".jpeg", ".pdf"}:
+                    chart_ext = _file_suffix(chart.filename)
+                    if chart_ext not in ALLOWED_CHART_EXTENSIONS:
                         continue
                     chart_path = settings.CHARTS_DIR / f"{job_id}_chart_{i}{chart_ext}"
-                    with open(chart_path, "wb") as buffer:
-                        shutil.copyfileobj(chart.file, buffer)
-                    chart_paths.append(str(chart_path))
+                    chart_uploads.append((chart, chart_path))
+
+        chart_digests = await asyncio.gather(
+            *[_save_upload(chart, chart_path) for chart, chart_path in chart_uploads]
+        )
+        chart_paths = [str(chart_path) for _, chart_path in chart_uploads]
+
+        # Identify the submission by the digests of all uploaded files, in order
+        content_hash = hashlib.sha256(
+            "".join([audio_digest, *chart_digests]).encode()
+        ).hexdigest()
 
         # Create analysis job WITH audio_path already set
         job = AnalysisJob(
@@ -119,32 +281,40 @@ async def analyze_earnings_call(
             company_context=company_context,
             audio_path=str(audio_path),
             chart_paths=chart_paths,
+            content_hash=content_hash,
             status="pending",
         )
-        db.add(job)
-        db.commit()
-        db.refresh(job)
-
-        # Start processing asynchronously (in background for demo purposes)
-        # In production, this would use Celery or similar task queue
-        import threading
-        thread = threading.Thread(
-            target=orchestrator.process_job,
-            args=(job.id,)
+
+        # Reuse results if identical files were already analyzed
+        previous = await run_in_threadpool(
+            _find_completed_job, db, content_hash, company_context
         )
-        thread.start()
 
-        return JobStatus(
+        if previous:
+            job.copy_results_from(previous)
+            job.status = "completed"
+            job.progress = 100.0
+            job.started_at = job.completed_at = datetime.utcnow()
+
+        # Keep SQLite commits off the event loop
+        db.add(job)
+        await run_in_threadpool(db.commit)
+        await run_in_threadpool(db.refresh, job)
+
+        if not previous:
+            # Queue processing on the bounded job pool
+            JOB_POOL.submit(request.app.state.orchestrator.process_job, job.id)
+
+        status = JobStatus(
             id=job.id,
             status=job.status,
             progress=job.progress,
             created_at=job.created_at.isoformat() if job.created_at else None,
         )
+        return ORJSONResponse(JOB_STATUS_ADAPTER.dump_python(status, mode="json"))
 
     except Exception as e:
-        print(f"❌ Error in /api/analyze: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error in /api/analyze: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -153,20 +323,37 @@ async def get_job_status(job_id: str, db: Session = Depends(get_db)):
     """
     Get processing status of an analysis job
     """
-    job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+    # Only fetch the status columns, not the large JSON result blobs
+    job = db.execute(
+        select(
+            AnalysisJob.id,
+            AnalysisJob.status,
+            AnalysisJob.progress,
+            AnalysisJob.error_message,
+            AnalysisJob.created_at,
+            AnalysisJob.started_at,
+            AnalysisJob.completed_at,
+        ).where(AnalysisJob.id == job_id)
+    ).first()
 
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    return JobStatus(
+    # Running jobs only commit at milestones; the registry has their latest step
+    progress = job.progress
+    if job.status == "processing":
+        progress = max(progress or 0.0, job_progress.get(job.id) or 0.0)
+
+    status = JobStatus(
         id=job.id,
         status=job.status,
-        progress=job.progress,
+        progress=progress,
         error_message=job.error_message,
         created_at=job.created_at.isoformat() if job.created_at else None,
         started_at=job.started_at.isoformat() if job.started_at else None,
         completed_at=job.completed_at.isoformat() if job.completed_at else None,
     )
+    return ORJSONResponse(JOB_STATUS_ADAPTER.dump_python(status, mode="json"))
 
 
 @app.get("/api/results/{job_id}")
@@ -191,25 +378,60 @@ async def get_analysis_results(job_id: str, db: Session = Depends(get_db)):
 @app.get("/api/jobs")
 async def list_jobs(
     limit: int = 20,
-    offset: int = 0,
+    before: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """
-    List all analysis jobs
+    List analysis jobs, newest first
+
+    Uses keyset pagination: pass the previous page's next_cursor as
+    `before` to fetch the following page. The cursor is "<created_at>|<id>";
+    the id breaks ties between jobs created in the same second.
     """
-    jobs = db.query(AnalysisJob)\
-        .order_by(AnalysisJob.created_at.desc())\
-        .offset(offset)\
+    # Skip the large JSON result columns; to_dict() only needs these
+    query = db.query(AnalysisJob).options(load_only(
+        AnalysisJob.id,
+        AnalysisJob.company_name,
+        AnalysisJob.company_context,
+        AnalysisJob.audio_path,
+        AnalysisJob.chart_paths,
+        AnalysisJob.status,
+        AnalysisJob.progress,
+        AnalysisJob.error_message,
+        AnalysisJob.created_at,
+        AnalysisJob.started_at,
+        AnalysisJob.completed_at,
+        AnalysisJob.overall_confidence,
+        AnalysisJob.overall_sentiment,
+        AnalysisJob.risk_level,
+    ))
+
+    if before:
+        cursor_time, _, cursor_id = before.partition("|")
+        try:
+            cursor = datetime.fromisoformat(cursor_time)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if not cursor_id:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(or_(
+            AnalysisJob.created_at < cursor,
+            and_(AnalysisJob.created_at == cursor, AnalysisJob.id < cursor_id),
+        ))
+
+    jobs = query\
+        .order_by(AnalysisJob.created_at.desc(), AnalysisJob.id.desc())\
         .limit(limit)\
         .all()
 
-    total = db.query(AnalysisJob).count()
+    next_cursor = None
+    if len(jobs) == limit and jobs[-1].created_at:
+        next_cursor = f"{jobs[-1].created_at.isoformat()}|{jobs[-1].id}"
 
     return {
         "jobs": [job.to_dict() for job in jobs],
-        "total": total,
         "limit": limit,
-        "offset": offset,
+        "next_cursor": next_cursor,
     }
 
 
@@ -233,7 +455,7 @@ async def delete_job(job_id: str, db: Session = Depends(get_db)):
                 if Path(chart_path).exists():
                     Path(chart_path).unlink()
     except Exception as e:
-        print(f"Error deleting files: {e}")
+        logger.error("Error deleting files: %s", e)
 
     # Delete from database
     db.delete(job)
@@ -255,7 +477,7 @@ async def get_audio_file(job_id: str, db: Session = Depends(get_db)):
     if not job.audio_path or not Path(job.audio_path).exists():
         raise HTTPException(status_code=404, detail="Audio file not found")
 
-    return FileResponse(
+    return AudioFileResponse(
         job.audio_path,
         media_type="audio/mpeg",
         filename=Path(job.audio_path).name
@@ -1,16 +1,45 @@
 """
 Database models and initialization
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.orm import sessionmaker, Session
-from .database import Base, AnalysisJob
+from sqlalchemy.pool import StaticPool
+from .database import Base, AnalysisJob, ChartAnalysisCache
 from ..core.config import settings
 
 # Create engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-)
+if settings.DATABASE_URL.startswith("sqlite"):
+    if ":memory:" in settings.DATABASE_URL or settings.DATABASE_URL == "sqlite://":
+        # In-memory databases only exist on a single connection
+        pool_options = {"poolclass": StaticPool}
+    else:
+        # Enough pooled connections for every job worker plus request handlers
+        pool_options = {"pool_size": settings.MAX_CONCURRENT_JOBS * 2, "max_overflow": 10}
+    engine = create_engine(
+        settings.DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        **pool_options,
+    )
+else:
+    engine = create_engine(
+        settings.DATABASE_URL,
+        pool_size=settings.MAX_CONCURRENT_JOBS * 2,
+        max_overflow=10,
+        pool_pre_ping=True,
+        pool_recycle=3600,
+    )
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """WAL so status polling doesn't block behind job writes, plus mmap reads"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+        cursor.execute("PRAGMA cache_size=-65536")    # 64 MB
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -20,6 +49,18 @@ def init_db():
     """Initialize database tables"""
     Base.metadata.create_all(bind=engine)
 
+    # create_all skips existing tables, so add columns and indexes introduced later
+    table = AnalysisJob.__table__
+    existing = {col["name"] for col in inspect(engine).get_columns(table.name)}
+    with engine.begin() as conn:
+        for column in table.columns:
+            if column.name not in existing:
+                col_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}"))
+
+    for index in table.indexes:
+        index.create(bind=engine, checkfirst=True)
+
 
 def get_db():
     """Get database session"""
@@ -30,4 +71,4 @@ def get_db():
         db.close()
 
 
-__all__ = ["AnalysisJob", "init_db", "get_db", "Session"]
+__all__ = ["AnalysisJob", "ChartAnalysisCache", "init_db", "get_db", "Session"]
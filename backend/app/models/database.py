@@ -1,31 +1,63 @@
 """
 Database models for Symphony AI
 """
-from sqlalchemy import Column, String, DateTime, Integer, Float, Text, JSON, Boolean
+from sqlalchemy import Column, String, DateTime, Integer, Float, Text, JSON, Boolean, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
+from sqlalchemy.types import TypeDecorator
 from datetime import datetime
 import uuid
+import orjson
+import zstandard
 
 Base = declarative_base()
 
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+class CompressedJSON(TypeDecorator):
+    """
+    JSON stored as zstd-compressed orjson bytes
+
+    Rows written before this type was introduced hold plain JSON text;
+    those are still decoded transparently.
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        data = orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        return zstandard.compress(data, 3)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            value = bytes(value)
+            if value.startswith(ZSTD_MAGIC):
+                value = zstandard.decompress(value)
+        return orjson.loads(value)
+
 
 def generate_uuid():
-    """Generate a unique ID"""
-    return str(uuid.uuid4())
+    """Generate a unique ID (32 hex chars, no dashes)"""
+    return uuid.uuid4().hex
 
 
 class AnalysisJob(Base):
     """Analysis job model"""
     __tablename__ = "analysis_jobs"
 
-    id = Column(String, primary_key=True, default=generate_uuid)
+    id = Column(String(32), primary_key=True, default=generate_uuid)
     company_name = Column(String, nullable=True)
     company_context = Column(Text, nullable=True)
 
     # File paths
     audio_path = Column(String, nullable=False)
     chart_paths = Column(JSON, nullable=True)  # List of chart file paths
+    content_hash = Column(String, nullable=True, index=True)  # SHA-256 of uploaded files
 
     # Status
     status = Column(String, default="pending")  # pending, processing, completed, failed
@@ -33,17 +65,17 @@ class AnalysisJob(Base):
     error_message = Column(Text, nullable=True)
 
     # Timestamps
-    created_at = Column(DateTime, default=func.now())
+    created_at = Column(DateTime, default=func.now(), index=True)
     started_at = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
 
-    # Results (stored as JSON)
-    transcript = Column(JSON, nullable=True)
-    audio_features = Column(JSON, nullable=True)
-    sentiment_analysis = Column(JSON, nullable=True)
-    chart_analysis = Column(JSON, nullable=True)
-    fusion_results = Column(JSON, nullable=True)
-    claude_analysis = Column(JSON, nullable=True)
+    # Results (stored as compressed JSON)
+    transcript = Column(CompressedJSON, nullable=True)
+    audio_features = Column(CompressedJSON, nullable=True)
+    sentiment_analysis = Column(CompressedJSON, nullable=True)
+    chart_analysis = Column(CompressedJSON, nullable=True)
+    fusion_results = Column(CompressedJSON, nullable=True)
+    claude_analysis = Column(CompressedJSON, nullable=True)
 
     # Summary metrics
     overall_confidence = Column(Float, nullable=True)
@@ -69,6 +101,23 @@ class AnalysisJob(Base):
             "risk_level": self.risk_level,
         }
 
+    RESULT_FIELDS = (
+        "transcript",
+        "audio_features",
+        "sentiment_analysis",
+        "chart_analysis",
+        "fusion_results",
+        "claude_analysis",
+        "overall_confidence",
+        "overall_sentiment",
+        "risk_level",
+    )
+
+    def copy_results_from(self, other: "AnalysisJob"):
+        """Copy the analysis results of another job into this one"""
+        for name in self.RESULT_FIELDS:
+            setattr(self, name, getattr(other, name))
+
     def get_full_results(self):
         """Get complete results including all analysis data"""
         return {
@@ -80,3 +129,12 @@ class AnalysisJob(Base):
             "fusion_results": self.fusion_results,
             "claude_analysis": self.claude_analysis,
         }
+
+
+class ChartAnalysisCache(Base):
+    """Parsed chart analyses keyed by image and prompt content"""
+    __tablename__ = "chart_analysis_cache"
+
+    key = Column(String(65), primary_key=True)  # blake2b(image):blake2b(model + prompt)
+    result = Column(CompressedJSON, nullable=False)
+    created_at = Column(DateTime, default=func.now(), index=True)
@@ -1,19 +1,32 @@
 """
 Pydantic schemas for request/response validation
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
 
+# Shared model config: immutable, ignore unknown fields, no extra coercion passes
+MODEL_CONFIG = ConfigDict(
+    extra="ignore",
+    frozen=True,
+    arbitrary_types_allowed=False,
+    str_strip_whitespace=False,
+)
+
+
 class AnalysisRequest(BaseModel):
     """Request schema for analysis"""
+    model_config = MODEL_CONFIG
+
     company_name: Optional[str] = None
     company_context: Optional[str] = None
 
 
 class JobStatus(BaseModel):
     """Job status response"""
+    model_config = MODEL_CONFIG
+
     id: str
     status: str
     progress: float
@@ -25,6 +38,8 @@ class JobStatus(BaseModel):
 
 class TranscriptSegment(BaseModel):
     """Transcript segment with timing"""
+    model_config = MODEL_CONFIG
+
     text: str
     start_time: float
     end_time: float
@@ -35,6 +50,8 @@ class TranscriptSegment(BaseModel):
 
 class AudioFeatures(BaseModel):
     """Audio features extracted from speech"""
+    model_config = MODEL_CONFIG
+
     confidence_timeline: List[Dict[str, Any]]
     stress_indicators: List[Dict[str, Any]]
     overall_confidence: float
@@ -45,6 +62,8 @@ class AudioFeatures(BaseModel):
 
 class SentimentAnalysis(BaseModel):
     """Sentiment analysis results"""
+    model_config = MODEL_CONFIG
+
     segments: List[TranscriptSegment]
     overall_sentiment: str
     sentiment_distribution: Dict[str, float]
@@ -54,6 +73,8 @@ class SentimentAnalysis(BaseModel):
 
 class ChartAnalysis(BaseModel):
     """Chart analysis results"""
+    model_config = MODEL_CONFIG
+
     chart_descriptions: List[str]
     extracted_data: List[Dict[str, Any]]
     inconsistencies: List[str]
@@ -61,6 +82,8 @@ class ChartAnalysis(BaseModel):
 
 class ClaudeAnalysis(BaseModel):
     """Claude AI analysis"""
+    model_config = MODEL_CONFIG
+
     executive_summary: str
     risk_indicators: List[str]
     opportunities: List[str]
@@ -71,6 +94,8 @@ class ClaudeAnalysis(BaseModel):
 
 class AnalysisResults(BaseModel):
     """Complete analysis results"""
+    model_config = MODEL_CONFIG
+
     id: str
     company_name: Optional[str]
     status: str
@@ -88,9 +113,14 @@ class AnalysisResults(BaseModel):
     completed_at: Optional[str]
 
 
+# Prebuilt serializer for the hot /api/status path
+JOB_STATUS_ADAPTER = TypeAdapter(JobStatus)
+
+
 __all__ = [
     "AnalysisRequest",
     "JobStatus",
+    "JOB_STATUS_ADAPTER",
     "TranscriptSegment",
     "AudioFeatures",
     "SentimentAnalysis",
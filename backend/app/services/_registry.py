@@ -0,0 +1,99 @@
+"""
+Process-wide registry of loaded models and API clients
+
+Each loader runs once per process and returns shared handles, so every
+service (and every orchestrator) in a worker uses the same weights. When
+the app is imported by a pre-forking server (gunicorn --preload) with
+PRELOAD_MODELS enabled, the models load in the parent and forked workers
+share the pages copy-on-write.
+"""
+import logging
+import openai
+import torch
+from functools import lru_cache
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+except ImportError:  # optional; FINBERT_ONNX_DIR needs optimum[onnxruntime]
+    ORTModelForSequenceClassification = None
+
+
+def _finbert_dtype() -> torch.dtype:
+    """fp16 on GPU, bf16 on CPU; fp32 when half precision is disabled"""
+    if not settings.FINBERT_HALF_PRECISION:
+        return torch.float32
+    return torch.float16 if torch.cuda.is_available() else torch.bfloat16
+
+
+def _load_onnx_finbert(onnx_dir: str):
+    """
+    Load an INT8-quantized ONNX export of FinBERT into ONNX Runtime
+
+    Args:
+        onnx_dir: Directory holding the exported tokenizer and FINBERT_ONNX_FILE
+
+    Returns:
+        Tuple of (tokenizer, model), or None if optimum isn't installed
+    """
+    if ORTModelForSequenceClassification is None:
+        logger.warning("FINBERT_ONNX_DIR is set but optimum[onnxruntime] is not installed, using PyTorch")
+        return None
+    tokenizer = AutoTokenizer.from_pretrained(onnx_dir)
+    model = ORTModelForSequenceClassification.from_pretrained(
+        onnx_dir,
+        file_name=settings.FINBERT_ONNX_FILE,
+        provider="CUDAExecutionProvider" if torch.cuda.is_available() else "CPUExecutionProvider",
+    )
+    return tokenizer, model
+
+
+def _load_torch_finbert(model_name: str):
+    """Load the FinBERT tokenizer and model (inference-only, half precision)"""
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(
+        model_name, torch_dtype=_finbert_dtype()
+    ).eval()
+    if torch.cuda.is_available():
+        model = model.to("cuda")
+    return tokenizer, model
+
+
+@lru_cache(maxsize=None)
+def get_finbert(model_name: str = settings.FINBERT_MODEL):
+    """
+    Load FinBERT once per process
+
+    Args:
+        model_name: Hugging Face model id (used unless FINBERT_ONNX_DIR is set)
+
+    Returns:
+        Tuple of (tokenizer, model)
+    """
+    if settings.FINBERT_ONNX_DIR:
+        loaded = _load_onnx_finbert(settings.FINBERT_ONNX_DIR)
+        if loaded is not None:
+            return loaded
+    return _load_torch_finbert(model_name)
+
+
+@lru_cache(maxsize=1)
+def get_openai_clients():
+    """Shared sync and async OpenAI clients (Whisper transcription)"""
+    return (
+        openai.OpenAI(api_key=settings.OPENAI_API_KEY),
+        openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY),
+    )
+
+
+def preload_models() -> None:
+    """
+    Load model weights ahead of the first job
+
+    Only models are loaded here; API clients hold connection pools and
+    are created lazily in each worker after any fork.
+    """
+    get_finbert(settings.FINBERT_MODEL)
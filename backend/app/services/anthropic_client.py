@@ -0,0 +1,104 @@
+"""
+Shared Anthropic client and background event loop for the Claude services
+"""
+import anthropic
+import asyncio
+import httpx
+import logging
+import threading
+from functools import lru_cache
+from typing import Any, Coroutine, Optional, TypeVar
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Connection pool shared by every Anthropic request for the life of the process
+HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+# Fail fast on connect; allow slow generations to keep reading
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+_service_loop: Optional[asyncio.AbstractEventLoop] = None
+_service_loop_lock = threading.Lock()
+
+
+def get_service_loop() -> asyncio.AbstractEventLoop:
+    """
+    Background event loop that runs Anthropic requests for synchronous callers
+
+    Keeping one long-lived loop lets the shared client's keep-alive
+    connections survive between jobs (asyncio.run would tear them down).
+    """
+    global _service_loop
+    with _service_loop_lock:
+        if _service_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever, name="anthropic-loop", daemon=True
+            ).start()
+            _service_loop = loop
+        return _service_loop
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine on the service loop and block until it finishes"""
+    return asyncio.run_coroutine_threadsafe(coro, get_service_loop()).result()
+
+
+@lru_cache(maxsize=1)
+def get_async_client() -> anthropic.AsyncAnthropic:
+    """
+    Process-wide Anthropic client with a pooled keep-alive HTTP connection set
+
+    Uses HTTP/2 when h2 is installed, so concurrent requests multiplex over
+    a few connections instead of opening one TLS session each.
+    """
+    return anthropic.AsyncAnthropic(
+        api_key=settings.ANTHROPIC_API_KEY,
+        max_retries=2,
+        http_client=anthropic.DefaultAsyncHttpxClient(
+            http2=HTTP2_AVAILABLE, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT
+        ),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_client() -> anthropic.Anthropic:
+    """
+    Process-wide synchronous client with the same pooled connection settings
+
+    For scripts that call the API directly rather than through the
+    services; repeated calls reuse its keep-alive connections.
+    """
+    return anthropic.Anthropic(
+        api_key=settings.ANTHROPIC_API_KEY,
+        max_retries=2,
+        http_client=anthropic.DefaultHttpxClient(
+            http2=HTTP2_AVAILABLE, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT
+        ),
+    )
+
+
+def close_async_client() -> None:
+    """Close the shared client's connections and stop the service loop (app shutdown)"""
+    global _service_loop
+    with _service_loop_lock:
+        loop, _service_loop = _service_loop, None
+
+    if loop is not None:
+        if get_async_client.cache_info().currsize:
+            future = asyncio.run_coroutine_threadsafe(get_async_client().close(), loop)
+            try:
+                future.result(timeout=5)
+            except Exception as e:
+                logger.warning("Failed to close Anthropic client: %s", e)
+        loop.call_soon_threadsafe(loop.stop)
+
+    get_async_client.cache_clear()
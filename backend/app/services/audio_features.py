@@ -2,11 +2,146 @@
 Audio Feature Extraction Service - Extract paralinguistic features using librosa
 """
 import librosa
+import logging
+import multiprocessing
+import os
 import numpy as np
+import orjson
+import soundfile
+import soxr
+from concurrent.futures import ProcessPoolExecutor
+from numba import njit
+from threadpoolctl import threadpool_limits
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 from ..core.config import settings
 
+try:
+    import torch
+    import torchcrepe
+except ImportError:  # optional GPU pitch tracking backend
+    torchcrepe = None
+
+logger = logging.getLogger(__name__)
+
+# Lower pitch-tracking bound (C2, ~65.4 Hz), resolved once instead of per call
+PITCH_FMIN_HZ = float(librosa.note_to_hz('C2'))
+
+# torchcrepe periodicity above which a frame counts as voiced
+CREPE_VOICED_THRESHOLD = 0.1
+
+# Frame length shared by the RMS and zero-crossing-rate computations (librosa's default)
+FRAME_LENGTH = 2048
+
+# Timeline windows whose peak amplitude stays below this are treated as silence
+SILENCE_PEAK_THRESHOLD = 1e-3
+
+
+@njit(cache=True)
+def _mean_std_nanaware(x, start=0, end=-1):
+    """
+    Single-pass (Welford) mean and population std over x[start:end], skipping NaNs
+
+    Returns:
+        (mean, std, count); mean and std are 0.0 when count is 0
+    """
+    if end < 0 or end > x.shape[0]:
+        end = x.shape[0]
+    count = 0
+    mean = 0.0
+    m2 = 0.0
+    for k in range(start, end):
+        v = x[k]
+        if np.isnan(v):
+            continue
+        count += 1
+        delta = v - mean
+        mean += delta / count
+        m2 += delta * (v - mean)
+    if count == 0:
+        return 0.0, 0.0, 0
+    return mean, np.sqrt(m2 / count), count
+
+
+@njit(cache=True)
+def _hnr_from_voicing(voiced_probs):
+    """
+    Cheap harmonics-to-noise ratio proxy (dB) from per-frame voicing probability
+
+    Treats voiced_probs as the periodic share of each frame's energy, which
+    avoids running HPSS (two median-filtered STFTs) just for an energy ratio.
+    """
+    periodic = 0.0
+    aperiodic = 0.0
+    for p in voiced_probs:
+        periodic += p * p
+        aperiodic += (1.0 - p) * (1.0 - p)
+    return 10 * np.log10(periodic / (aperiodic + 1e-9) + 1e-9)
+
+
+@njit(cache=True)
+def _score_windows(f0, rms, voiced_probs, frame_bounds):
+    """
+    Score confidence timeline windows
+
+    Args:
+        f0: Full-signal pitch track (NaN where unvoiced)
+        rms: Full-signal frame RMS
+        voiced_probs: Full-signal voicing probability per frame
+        frame_bounds: (n, 2) frame start/end per window
+
+    Returns:
+        (n, 4) array of confidence, pitch_stability, energy_level, voice_quality
+    """
+    n = frame_bounds.shape[0]
+    out = np.empty((n, 4), dtype=np.float32)
+
+    for w in range(n):
+        fs = frame_bounds[w, 0]
+        fe = min(frame_bounds[w, 1], f0.shape[0])
+
+        # Pitch stability: coefficient of variation over voiced frames
+        mean, std, count = _mean_std_nanaware(f0, fs, fe)
+        if count > 0:
+            variation = std / mean if mean > 0 else 0.5
+            pitch_stability = max(0.0, 1.0 - variation)
+        else:
+            pitch_stability = 0.5
+
+        # Energy level from mean RMS
+        re = min(frame_bounds[w, 1], rms.shape[0])
+        if re > fs:
+            energy_level = min(np.mean(rms[fs:re]) / 0.1, 1.0)
+        else:
+            energy_level = 0.5
+
+        # Voice quality from the voicing-probability HNR proxy
+        ve = min(frame_bounds[w, 1], voiced_probs.shape[0])
+        if ve > fs:
+            hnr = _hnr_from_voicing(voiced_probs[fs:ve])
+            voice_stability = min(max(hnr / 40, 0.0), 1.0)  # Normalize HNR to 0-1
+        else:
+            voice_stability = 0.5
+
+        confidence = (
+            pitch_stability * 0.4 +
+            energy_level * 0.3 +
+            voice_stability * 0.3
+        )
+        out[w, 0] = max(0.0, min(1.0, confidence))
+        out[w, 1] = pitch_stability
+        out[w, 2] = energy_level
+        out[w, 3] = voice_stability
+
+    return out
+
+
+def _extract_one(audio_path: str) -> Dict[str, Any]:
+    """Process-pool worker: extract features for one file"""
+    # One BLAS/OpenMP thread per worker so parallel files don't oversubscribe cores
+    with threadpool_limits(limits=1):
+        return AudioFeatureExtractor().extract_features(audio_path)
+
 
 class AudioFeatureExtractor:
     """Extract vocal biomarkers and paralinguistic features from audio"""
@@ -15,30 +150,36 @@ class AudioFeatureExtractor:
         self.sample_rate = settings.SAMPLE_RATE
         self.hop_length = settings.HOP_LENGTH
         self.n_mfcc = settings.N_MFCC
+        # Earnings-call speech sits well below 500 Hz, so pyin searches a speech-only range
+        self.pitch_fmax = settings.PITCH_FMAX
+        # Long calls make pyin the bottleneck; use CREPE on GPU when available
+        self.pitch_backend = (
+            "torchcrepe" if torchcrepe is not None and torch.cuda.is_available() else "pyin"
+        )
 
-    def _ensure_json_serializable(self, obj):
+    @classmethod
+    def extract_features_batch(
+        cls, audio_paths: List[str], max_workers: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         """
-        Convert numpy types to JSON-serializable Python types
+        Extract features for several audio files in parallel processes
 
         Args:
-            obj: Object to convert (can be dict, list, numpy type, or native type)
+            audio_paths: Paths to audio files
+            max_workers: Worker processes (defaults to the CPU count)
 
         Returns:
-            JSON-serializable version of the object
+            Feature dictionaries in the same order as audio_paths
         """
-        if isinstance(obj, np.ndarray):
-            return obj.tolist()
-        elif isinstance(obj, (np.float32, np.float64)):
-            return float(obj)
-        elif isinstance(obj, (np.int32, np.int64)):
-            return int(obj)
-        elif isinstance(obj, np.bool_):
-            return bool(obj)
-        elif isinstance(obj, dict):
-            return {k: self._ensure_json_serializable(v) for k, v in obj.items()}
-        elif isinstance(obj, (list, tuple)):
-            return [self._ensure_json_serializable(item) for item in obj]
-        return obj
+        if not audio_paths:
+            return []
+
+        # spawn avoids forking a parent that may already hold torch/BLAS threads
+        with ProcessPoolExecutor(
+            max_workers=min(max_workers or os.cpu_count() or 1, len(audio_paths)),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            return list(pool.map(_extract_one, audio_paths))
 
     def extract_features(self, audio_path: str) -> Dict[str, Any]:
         """
@@ -51,22 +192,30 @@ class AudioFeatureExtractor:
             Dictionary with all extracted features
         """
         try:
-            print(f"🎵 Extracting audio features from: {Path(audio_path).name}")
+            logger.info("🎵 Extracting audio features from: %s", Path(audio_path).name)
 
             # Load audio
-            y, sr = librosa.load(audio_path, sr=self.sample_rate)
-            duration = librosa.get_duration(y=y, sr=sr)
+            y, sr = self._load_audio(audio_path)
+            duration = len(y) / sr
+
+            # pYIN is the most expensive step, so run it once over the full
+            # signal and share the result
+            pitch_raw = self._extract_pitch_raw(y, sr)
+
+            # Frame RMS energy is used by several extractors; it and ZCR
+            # come from one shared framing of the signal
+            rms, zcr = self._compute_frame_stats(y)
 
             # Extract all features
             mfccs = self._extract_mfccs(y, sr)
-            pitch_features = self._extract_pitch(y, sr)
-            energy_features = self._extract_energy(y, sr)
-            voice_quality = self._extract_voice_quality(y, sr)
-            prosodic_features = self._extract_prosodic_features(y, sr)
+            pitch_features = self._extract_pitch(y, sr, pitch_raw)
+            energy_features = self._extract_energy(y, sr, rms=rms, zcr=zcr)
+            voice_quality = self._extract_voice_quality(y, sr, pitch_raw, rms=rms)
+            prosodic_features = self._extract_prosodic_features(y, sr, rms=rms, duration=duration)
 
             # Compute confidence timeline with time-windowed analysis
             confidence_timeline = self._compute_confidence_timeline_windowed(
-                y, sr, duration
+                y, sr, duration, pitch_raw, rms=rms
             )
 
             # Detect stress indicators
@@ -92,21 +241,45 @@ class AudioFeatureExtractor:
                 "duration": duration,
             }
 
-            # Ensure all numpy types are converted to JSON-serializable Python types
-            result = self._ensure_json_serializable(result)
+            # Convert numpy arrays/scalars to plain Python types in one C-level pass
+            result = orjson.loads(orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY))
 
-            print(f"✅ Feature extraction complete. Confidence: {overall_confidence:.2f}")
+            logger.info("✅ Feature extraction complete. Confidence: %.2f", overall_confidence)
             return result
 
         except Exception as e:
-            print(f"❌ Feature extraction error: {e}")
+            logger.error("❌ Feature extraction error: %s", e)
             raise Exception(f"Failed to extract audio features: {str(e)}")
 
+    def _load_audio(self, audio_path: str) -> Tuple[np.ndarray, int]:
+        """
+        Load audio as mono float32 at the configured sample rate
+
+        Decodes with libsndfile and only resamples when the file rate
+        differs. Formats libsndfile can't read (e.g. m4a) fall back to
+        librosa.load, which goes through audioread/ffmpeg.
+        """
+        try:
+            y, file_sr = soundfile.read(audio_path, dtype="float32", always_2d=False)
+        except RuntimeError:
+            y, sr = librosa.load(audio_path, sr=self.sample_rate)
+            return y.astype(np.float32, copy=False), sr
+
+        if y.ndim > 1:
+            y = y.mean(axis=1)
+        if file_sr != self.sample_rate:
+            y = soxr.resample(y, file_sr, self.sample_rate)
+        # Keep the signal float32 so MFCC/STFT passes stay single precision
+        return y.astype(np.float32, copy=False), self.sample_rate
+
     def _extract_mfccs(self, y: np.ndarray, sr: int) -> Dict[str, Any]:
         """Extract Mel-frequency cepstral coefficients with deltas"""
+        # float32 input keeps the whole MFCC/delta chain in single precision;
+        # only means and stds leave this function
         mfccs = librosa.feature.mfcc(
-            y=y, sr=sr, n_mfcc=self.n_mfcc, hop_length=self.hop_length
-        )
+            y=y.astype(np.float32, copy=False), sr=sr, n_mfcc=self.n_mfcc,
+            hop_length=self.hop_length, dtype=np.float32,
+        ).astype(np.float32, copy=False)
 
         # Compute delta (first derivative) and delta-delta (second derivative)
         mfcc_delta = librosa.feature.delta(mfccs)
@@ -122,20 +295,62 @@ class AudioFeatureExtractor:
             "delta2_std": mfcc_delta2.std(axis=1).tolist(),
         }
 
-    def _extract_pitch(self, y: np.ndarray, sr: int) -> Dict[str, Any]:
-        """Extract pitch (F0) using pyin algorithm"""
-        f0, voiced_flag, voiced_probs = librosa.pyin(
+    def _extract_pitch_raw(
+        self, y: np.ndarray, sr: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Track pitch over the full signal, returning (f0, voiced_flag, voiced_probs)"""
+        if self.pitch_backend == "torchcrepe":
+            return self._extract_pitch_crepe(y, sr)
+
+        return librosa.pyin(
             y,
-            fmin=librosa.note_to_hz('C2'),
-            fmax=librosa.note_to_hz('C7'),
+            fmin=PITCH_FMIN_HZ,
+            fmax=self.pitch_fmax,
             sr=sr,
             hop_length=self.hop_length
         )
 
-        # Remove NaN values
-        f0_clean = f0[~np.isnan(f0)]
+    def _extract_pitch_crepe(
+        self, y: np.ndarray, sr: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        GPU pitch tracking with torchcrepe, shaped like librosa.pyin output
+
+        Periodicity stands in for voiced_probs; unvoiced frames get NaN f0.
+        """
+        audio = torch.from_numpy(np.ascontiguousarray(y, dtype=np.float32)).unsqueeze(0)
+        pitch, periodicity = torchcrepe.predict(
+            audio,
+            sr,
+            self.hop_length,
+            fmin=PITCH_FMIN_HZ,
+            fmax=self.pitch_fmax,
+            model="tiny",
+            batch_size=512,
+            device="cuda",
+            return_periodicity=True,
+        )
+        f0 = pitch[0].cpu().numpy().astype(np.float64)
+        voiced_probs = periodicity[0].cpu().numpy().astype(np.float64)
+        voiced_flag = voiced_probs >= CREPE_VOICED_THRESHOLD
+        f0[~voiced_flag] = np.nan
+        return f0, voiced_flag, voiced_probs
 
-        if len(f0_clean) == 0:
+    def _extract_pitch(
+        self,
+        y: np.ndarray,
+        sr: int,
+        pitch_raw: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+    ) -> Dict[str, Any]:
+        """Extract pitch (F0) using pyin algorithm"""
+        if pitch_raw is None:
+            pitch_raw = self._extract_pitch_raw(y, sr)
+        f0, voiced_flag, voiced_probs = pitch_raw
+
+        # Mean/std over voiced frames in one pass, without copying out the NaNs
+        f0_mean, f0_std, voiced_count = _mean_std_nanaware(f0.astype(np.float64, copy=False))
+
+        if voiced_count == 0:
             return {
                 "mean": 0.0,
                 "std": 0.0,
@@ -146,72 +361,96 @@ class AudioFeatureExtractor:
             }
 
         return {
-            "mean": float(np.mean(f0_clean)),
-            "std": float(np.std(f0_clean)),
-            "min": float(np.min(f0_clean)),
-            "max": float(np.max(f0_clean)),
-            "variation": float(np.std(f0_clean) / np.mean(f0_clean)) if np.mean(f0_clean) > 0 else 0.0,
+            "mean": float(f0_mean),
+            "std": float(f0_std),
+            "min": float(np.nanmin(f0)),
+            "max": float(np.nanmax(f0)),
+            "variation": float(f0_std / f0_mean) if f0_mean > 0 else 0.0,
             "voiced_percentage": float(np.sum(voiced_flag) / len(voiced_flag) * 100),
         }
 
-    def _extract_energy(self, y: np.ndarray, sr: int) -> Dict[str, Any]:
-        """Extract energy/intensity features"""
-        # RMS energy
-        rms = librosa.feature.rms(y=y, hop_length=self.hop_length)[0]
+    def _frame_signal(self, y: np.ndarray) -> np.ndarray:
+        """
+        Centered (frame_length, n_frames) strided view over y, framed like librosa
 
-        # Zero crossing rate
-        zcr = librosa.feature.zero_crossing_rate(y, hop_length=self.hop_length)[0]
+        The view is zero-copy; only the centering pad allocates.
+        """
+        y_padded = np.pad(y, FRAME_LENGTH // 2, mode="constant")
+        return librosa.util.frame(y_padded, frame_length=FRAME_LENGTH, hop_length=self.hop_length)
+
+    def _compute_frame_stats(self, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Frame-wise RMS energy and zero-crossing rate from one shared framing
+
+        Returns:
+            (rms, zcr), each of shape (n_frames,)
+        """
+        frames = self._frame_signal(y)
+        # einsum sums squares per frame without materializing frames**2
+        rms = np.sqrt(np.einsum("ij,ij->j", frames, frames) / FRAME_LENGTH)
+        zcr = np.count_nonzero(np.diff(np.signbit(frames), axis=0), axis=0) / FRAME_LENGTH
+        return rms.astype(np.float32, copy=False), zcr.astype(np.float32)
+
+    def _compute_rms(self, y: np.ndarray) -> np.ndarray:
+        """Frame-wise RMS energy of the signal"""
+        return self._compute_frame_stats(y)[0]
+
+    def _extract_energy(
+        self,
+        y: np.ndarray,
+        sr: int,
+        rms: Optional[np.ndarray] = None,
+        zcr: Optional[np.ndarray] = None,
+    ) -> Dict[str, Any]:
+        """Extract energy/intensity features (RMS energy and zero crossing rate)"""
+        if rms is None or zcr is None:
+            rms, zcr = self._compute_frame_stats(y)
+
+        rms_mean, rms_std, _ = _mean_std_nanaware(rms)
+        zcr_mean, zcr_std, _ = _mean_std_nanaware(zcr)
 
         return {
-            "rms_mean": float(np.mean(rms)),
-            "rms_std": float(np.std(rms)),
-            "zcr_mean": float(np.mean(zcr)),
-            "zcr_std": float(np.std(zcr)),
+            "rms_mean": float(rms_mean),
+            "rms_std": float(rms_std),
+            "zcr_mean": float(zcr_mean),
+            "zcr_std": float(zcr_std),
         }
 
-    def _extract_voice_quality(self, y: np.ndarray, sr: int) -> Dict[str, Any]:
+    def _extract_voice_quality(
+        self,
+        y: np.ndarray,
+        sr: int,
+        pitch_raw: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+        rms: Optional[np.ndarray] = None,
+    ) -> Dict[str, Any]:
         """
         Extract voice quality metrics (jitter, shimmer, HNR)
         """
-        # Spectral features as proxies for voice quality
-        spectral_centroid = librosa.feature.spectral_centroid(
-            y=y, sr=sr, hop_length=self.hop_length
-        )[0]
-        spectral_rolloff = librosa.feature.spectral_rolloff(
-            y=y, sr=sr, hop_length=self.hop_length
-        )[0]
-        spectral_bandwidth = librosa.feature.spectral_bandwidth(
-            y=y, sr=sr, hop_length=self.hop_length
-        )[0]
+        # Spectral features as proxies for voice quality, all from one magnitude STFT
+        S = np.abs(librosa.stft(y, n_fft=2048, hop_length=self.hop_length))
+        spectral_centroid = librosa.feature.spectral_centroid(S=S, sr=sr)[0]
+        spectral_rolloff = librosa.feature.spectral_rolloff(S=S, sr=sr)[0]
+        spectral_bandwidth = librosa.feature.spectral_bandwidth(S=S, sr=sr)[0]
 
         # Spectral contrast across 6 frequency bands (from paper)
-        spectral_contrast = librosa.feature.spectral_contrast(
-            y=y, sr=sr, hop_length=self.hop_length, n_bands=6
-        )
+        spectral_contrast = librosa.feature.spectral_contrast(S=S, sr=sr, n_bands=6)
 
         # Jitter approximation (pitch variation)
-        f0, _, _ = librosa.pyin(
-            y, fmin=librosa.note_to_hz('C2'), fmax=librosa.note_to_hz('C7'),
-            sr=sr, hop_length=self.hop_length
-        )
+        if pitch_raw is None:
+            pitch_raw = self._extract_pitch_raw(y, sr)
+        f0, _, voiced_probs = pitch_raw
         f0_clean = f0[~np.isnan(f0)]
         jitter = float(np.std(np.diff(f0_clean))) if len(f0_clean) > 1 else 0.0
 
         # Shimmer approximation (amplitude variation)
-        rms = librosa.feature.rms(y=y, hop_length=self.hop_length)[0]
+        if rms is None:
+            rms = self._compute_rms(y)
         shimmer = float(np.std(np.diff(rms))) if len(rms) > 1 else 0.0
 
-        # HNR (Harmonics-to-Noise Ratio) using HPSS
+        # HNR (Harmonics-to-Noise Ratio) proxy from the pitch tracker's voicing probability
         try:
-            harmonic, percussive = librosa.effects.hpss(y)
-            harmonic_energy = np.sum(harmonic**2)
-            percussive_energy = np.sum(percussive**2)
-            # Calculate HNR in dB
-            if percussive_energy > 0:
-                hnr = 10 * np.log10(harmonic_energy / percussive_energy)
-            else:
-                hnr = 40.0  # Very high HNR if no noise
-        except:
+            hnr = _hnr_from_voicing(np.nan_to_num(voiced_probs).astype(np.float64, copy=False))
+        except Exception:
             hnr = 20.0  # Default moderate HNR
 
         return {
@@ -225,23 +464,31 @@ class AudioFeatureExtractor:
             "spectral_contrast_std": spectral_contrast.std(axis=1).tolist(),
         }
 
-    def _extract_prosodic_features(self, y: np.ndarray, sr: int) -> Dict[str, Any]:
+    def _extract_prosodic_features(
+        self,
+        y: np.ndarray,
+        sr: int,
+        rms: Optional[np.ndarray] = None,
+        duration: Optional[float] = None,
+    ) -> Dict[str, Any]:
         """Extract prosodic features (speech rate, pauses)"""
         # Detect speech/silence using energy threshold
-        rms = librosa.feature.rms(y=y, hop_length=self.hop_length)[0]
+        if rms is None:
+            rms = self._compute_rms(y)
         threshold = np.mean(rms) * 0.2
 
         # Count speech segments (rough speech rate)
         speech_frames = rms > threshold
-        speech_segments = np.diff(speech_frames.astype(int))
-        speech_onsets = np.sum(speech_segments == 1)
+        # Onsets are silence -> speech transitions
+        speech_onsets = int(np.count_nonzero(speech_frames[1:] & ~speech_frames[:-1]))
 
         # Calculate speech rate (segments per second)
-        duration = librosa.get_duration(y=y, sr=sr)
+        if duration is None:
+            duration = len(y) / sr
         speech_rate = speech_onsets / duration if duration > 0 else 0.0
 
         # Pause detection
-        silence_frames = np.sum(~speech_frames)
+        silence_frames = int(np.count_nonzero(~speech_frames))
         pause_percentage = (silence_frames / len(speech_frames) * 100) if len(speech_frames) > 0 else 0.0
 
         return {
@@ -251,82 +498,69 @@ class AudioFeatureExtractor:
         }
 
     def _compute_confidence_timeline_windowed(
-        self, y: np.ndarray, sr: int, duration: float
+        self,
+        y: np.ndarray,
+        sr: int,
+        duration: float,
+        pitch_raw: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+        rms: Optional[np.ndarray] = None,
     ) -> List[Dict[str, Any]]:
         """
         Compute confidence score timeline with ACTUAL time-windowed analysis.
-        Each 1-second window is analyzed independently.
+        Each 1-second window is scored independently, using slices of the
+        full-signal pitch track, voicing probability and RMS.
         """
         window_size = 1.0  # 1 second windows
         num_intervals = max(int(duration), 1)
-        timeline = []
 
-        for i in range(num_intervals):
-            # Extract audio segment for this 1-second window
-            start_sample = int(i * window_size * sr)
-            end_sample = int((i + 1) * window_size * sr)
-            y_window = y[start_sample:end_sample]
-
-            if len(y_window) < sr // 10:  # Skip if less than 0.1 seconds
-                continue
-
-            # Analyze THIS window
+        if pitch_raw is None:
+            pitch_raw = self._extract_pitch_raw(y, sr)
+        f0_full, _, voiced_probs = pitch_raw
+
+        rms_full = rms if rms is not None else self._compute_rms(y)
+
+        # Sample and frame ranges for each 1-second window, skipping windows
+        # shorter than 0.1 seconds
+        window_idx = np.arange(num_intervals)
+        sample_bounds = np.stack([
+            (window_idx * window_size * sr).astype(np.int64),
+            np.minimum(((window_idx + 1) * window_size * sr).astype(np.int64), len(y)),
+        ], axis=1)
+        keep = (sample_bounds[:, 1] - sample_bounds[:, 0]) >= sr // 10
+        window_idx = window_idx[keep]
+        sample_bounds = sample_bounds[keep]
+        frame_bounds = sample_bounds // self.hop_length
+
+        # Silent windows (pauses, hold music gaps) carry no vocal signal; give
+        # them the fallback scores instead of scoring NaN pitch
+        if len(y) > 0 and len(sample_bounds) > 0:
+            peaks = np.maximum.reduceat(np.abs(y), sample_bounds[:, 0])
+            voiced = peaks >= SILENCE_PEAK_THRESHOLD
+        else:
+            voiced = np.zeros(len(sample_bounds), dtype=bool)
+
+        # Fallback for silent windows or if scoring fails
+        scores = np.full((len(window_idx), 4), 0.5, dtype=np.float32)
+        if voiced.any():
             try:
-                # Pitch analysis for window
-                f0, voiced_flag, _ = librosa.pyin(
-                    y_window, fmin=65, fmax=400, sr=sr, hop_length=self.hop_length
-                )
-                f0_clean = f0[~np.isnan(f0)]
-
-                if len(f0_clean) > 0:
-                    pitch_mean = np.mean(f0_clean)
-                    pitch_std = np.std(f0_clean)
-                    pitch_variation = pitch_std / pitch_mean if pitch_mean > 0 else 0.5
-                    pitch_stability = max(0, 1.0 - pitch_variation)
-                else:
-                    pitch_stability = 0.5
-
-                # Energy for window
-                rms = librosa.feature.rms(y=y_window, hop_length=self.hop_length)[0]
-                energy_level = min(np.mean(rms) / 0.1, 1.0)
-
-                # Voice quality for window
-                try:
-                    harmonic, percussive = librosa.effects.hpss(y_window)
-                    h_energy = np.sum(harmonic**2)
-                    p_energy = np.sum(percussive**2)
-                    hnr = 10 * np.log10(h_energy / p_energy) if p_energy > 0 else 20
-                    voice_stability = min(max(hnr / 40, 0), 1.0)  # Normalize HNR to 0-1
-                except:
-                    voice_stability = 0.5
-
-                # Calculate window confidence
-                confidence = (
-                    pitch_stability * 0.4 +
-                    energy_level * 0.3 +
-                    voice_stability * 0.3
+                scores[voiced] = _score_windows(
+                    f0_full.astype(np.float64), rms_full,
+                    np.nan_to_num(voiced_probs).astype(np.float64), frame_bounds[voiced]
                 )
-                confidence = max(0.0, min(1.0, confidence))
-
-                timeline.append({
-                    "time": i + 0.5,  # Middle of interval
-                    "confidence": round(confidence, 3),
-                    "pitch_stability": round(pitch_stability, 3),
-                    "energy_level": round(energy_level, 3),
-                    "voice_quality": round(voice_stability, 3),
-                })
-
-            except Exception as e:
-                # Fallback for problematic windows
-                timeline.append({
-                    "time": i + 0.5,
-                    "confidence": 0.5,
-                    "pitch_stability": 0.5,
-                    "energy_level": 0.5,
-                    "voice_quality": 0.5,
-                })
-
-        return timeline
+            except Exception:
+                pass
+
+        return [
+            {
+                "time": int(i) + 0.5,  # Middle of interval
+                "confidence": round(float(confidence), 3),
+                "pitch_stability": round(float(pitch_stability), 3),
+                "energy_level": round(float(energy_level), 3),
+                "voice_quality": round(float(voice_stability), 3),
+            }
+            for i, (confidence, pitch_stability, energy_level, voice_stability)
+            in zip(window_idx, scores)
+        ]
 
     def _compute_confidence_timeline(
         self,
@@ -1,17 +1,32 @@
 """
 Audio Transcription Service using OpenAI Whisper API
 """
+import asyncio
+import csv
+import logging
+import math
+import shutil
+import subprocess
+import tempfile
+import aiofiles
+import numpy as np
 import openai
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from ..core.config import settings
+from ._registry import get_openai_clients
+
+logger = logging.getLogger(__name__)
+
+# Whisper rejects uploads over 25 MB; leave headroom for container overhead
+WHISPER_MAX_BYTES = 24 * 1024 * 1024
 
 
 class AudioTranscriptionService:
     """Service for transcribing audio using Whisper API"""
 
     def __init__(self):
-        self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.client, self.aclient = get_openai_clients()
 
     def transcribe_audio(self, audio_path: str) -> Dict[str, Any]:
         """
@@ -28,7 +43,11 @@ class AudioTranscriptionService:
             if not audio_file.exists():
                 raise FileNotFoundError(f"Audio file not found: {audio_path}")
 
-            print(f"🎤 Transcribing audio: {audio_file.name}")
+            # Long calls exceed Whisper's upload limit; split and upload chunks in parallel
+            if audio_file.stat().st_size > WHISPER_MAX_BYTES and shutil.which("ffmpeg"):
+                return self._transcribe_chunked(audio_path)
+
+            logger.info("🎤 Transcribing audio: %s", audio_file.name)
 
             # Transcribe with timestamps
             with open(audio_path, "rb") as audio:
@@ -39,39 +58,173 @@ class AudioTranscriptionService:
                     timestamp_granularities=["segment"]
                 )
 
-            # Extract segments with timing
-            segments = []
-            if hasattr(transcript, 'segments') and transcript.segments:
-                for seg in transcript.segments:
-                    segments.append({
-                        "text": getattr(seg, "text", ""),
-                        "start_time": getattr(seg, "start", 0.0),
-                        "end_time": getattr(seg, "end", 0.0),
-                        "speaker": None,  # Will be filled by diarization
-                    })
-            else:
-                # Fallback: single segment
-                segments.append({
-                    "text": transcript.text,
-                    "start_time": 0.0,
-                    "end_time": 0.0,
-                    "speaker": None,
-                })
+            result = self._format_transcript(transcript)
+
+            logger.info("✅ Transcription complete: %d segments", len(result['segments']))
+            return result
 
-            result = {
-                "full_text": transcript.text,
-                "segments": segments,
-                "language": getattr(transcript, 'language', 'en'),
-                "duration": getattr(transcript, 'duration', 0.0),
-            }
+        except Exception as e:
+            logger.error("❌ Transcription error: %s", e)
+            raise Exception(f"Failed to transcribe audio: {str(e)}")
+
+    async def transcribe_audio_async(
+        self, audio_path: str, client: Optional[openai.AsyncOpenAI] = None
+    ) -> Dict[str, Any]:
+        """
+        Transcribe audio file using Whisper API without blocking the event loop
 
-            print(f"✅ Transcription complete: {len(segments)} segments")
+        Args:
+            audio_path: Path to audio file
+            client: Async client to use (defaults to the service's shared client)
+
+        Returns:
+            Dictionary with transcript and segments
+        """
+        try:
+            audio_file = Path(audio_path)
+            if not audio_file.exists():
+                raise FileNotFoundError(f"Audio file not found: {audio_path}")
+
+            logger.info("🎤 Transcribing audio: %s", audio_file.name)
+
+            async with aiofiles.open(audio_path, "rb") as f:
+                data = await f.read()
+
+            transcript = await (client or self.aclient).audio.transcriptions.create(
+                model="whisper-1",
+                file=(audio_file.name, data),
+                response_format="verbose_json",
+                timestamp_granularities=["segment"]
+            )
+
+            result = self._format_transcript(transcript)
+
+            logger.info("✅ Transcription complete: %d segments", len(result['segments']))
             return result
 
         except Exception as e:
-            print(f"❌ Transcription error: {e}")
+            logger.error("❌ Transcription error: %s", e)
             raise Exception(f"Failed to transcribe audio: {str(e)}")
 
+    async def transcribe_batch(self, audio_paths: List[str]) -> List[Dict[str, Any]]:
+        """
+        Transcribe several audio files concurrently
+
+        Whisper requests are network-bound, so uploads run side by side.
+
+        Args:
+            audio_paths: Paths to audio files
+
+        Returns:
+            Transcription results in the same order as audio_paths
+        """
+        return list(await asyncio.gather(
+            *(self.transcribe_audio_async(path) for path in audio_paths)
+        ))
+
+    def _transcribe_chunked(self, audio_path: str) -> Dict[str, Any]:
+        """
+        Transcribe a file too large for one Whisper request
+
+        Splits the audio with ffmpeg stream copy (no re-encode), transcribes
+        the chunks concurrently and merges them with timestamps shifted by
+        each chunk's start offset.
+        """
+        logger.info("🎤 Transcribing long audio in chunks: %s", Path(audio_path).name)
+
+        with tempfile.TemporaryDirectory(prefix="symphony_chunks_") as tmp_dir:
+            chunks = self._split_audio(audio_path, Path(tmp_dir))
+            results = asyncio.run(self._transcribe_paths([path for path, _ in chunks]))
+
+        segments = []
+        texts = []
+        for (_, offset), result in zip(chunks, results):
+            texts.append(result["full_text"].strip())
+            for seg in result["segments"]:
+                seg["start_time"] += offset
+                seg["end_time"] += offset
+                segments.append(seg)
+
+        last_offset = chunks[-1][1] if chunks else 0.0
+        merged = {
+            "full_text": " ".join(texts),
+            "segments": segments,
+            "language": results[0]["language"] if results else "en",
+            "duration": last_offset + (results[-1]["duration"] or 0.0) if results else 0.0,
+        }
+
+        logger.info("✅ Transcription complete: %d segments from %d chunks", len(segments), len(chunks))
+        return merged
+
+    async def _transcribe_paths(self, audio_paths: List[str]) -> List[Dict[str, Any]]:
+        """Transcribe paths concurrently on a client owned by the current event loop"""
+        # asyncio.run creates a fresh loop each call, so the shared client can't be reused here
+        async with openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY) as client:
+            return list(await asyncio.gather(
+                *(self.transcribe_audio_async(path, client=client) for path in audio_paths)
+            ))
+
+    def _split_audio(self, audio_path: str, out_dir: Path) -> List[Tuple[str, float]]:
+        """
+        Split audio into chunks that each fit under the Whisper upload limit
+
+        Args:
+            audio_path: Path to audio file
+            out_dir: Directory to write chunks into
+
+        Returns:
+            List of (chunk_path, start_offset_seconds) in playback order
+        """
+        probe = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+             "-of", "csv=p=0", audio_path],
+            capture_output=True, text=True, check=True,
+        )
+        duration = float(probe.stdout.strip())
+        num_chunks = math.ceil(Path(audio_path).stat().st_size / (WHISPER_MAX_BYTES * 0.9))
+        segment_time = max(duration / num_chunks, 1.0)
+
+        list_path = out_dir / "chunks.csv"
+        subprocess.run(
+            ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", audio_path,
+             "-f", "segment", "-segment_time", f"{segment_time:.3f}",
+             "-segment_list", str(list_path), "-segment_list_type", "csv",
+             "-c", "copy", str(out_dir / f"chunk_%03d{Path(audio_path).suffix}")],
+            check=True,
+        )
+
+        # The segment list records each chunk's actual start time (cuts land on packet boundaries)
+        with open(list_path, newline="") as f:
+            return [(str(out_dir / name), float(start)) for name, start, _ in csv.reader(f)]
+
+    def _format_transcript(self, transcript: Any) -> Dict[str, Any]:
+        """Convert a verbose_json Whisper response into our transcript dict"""
+        # Extract segments with timing
+        segments = []
+        if hasattr(transcript, 'segments') and transcript.segments:
+            for seg in transcript.segments:
+                segments.append({
+                    "text": getattr(seg, "text", ""),
+                    "start_time": getattr(seg, "start", 0.0),
+                    "end_time": getattr(seg, "end", 0.0),
+                    "speaker": None,  # Will be filled by diarization
+                })
+        else:
+            # Fallback: single segment
+            segments.append({
+                "text": transcript.text,
+                "start_time": 0.0,
+                "end_time": 0.0,
+                "speaker": None,
+            })
+
+        return {
+            "full_text": transcript.text,
+            "segments": segments,
+            "language": getattr(transcript, 'language', 'en'),
+            "duration": getattr(transcript, 'duration', 0.0),
+        }
+
     def identify_speakers(self, segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Simple speaker identification heuristic
@@ -84,25 +237,22 @@ class AudioTranscriptionService:
             Segments with speaker labels
         """
         # Simple heuristic: First ~30% is usually CEO, middle is CFO, rest is Q&A
-        total_segments = len(segments)
+        # (alternating between analyst and executive)
+        index = np.arange(len(segments))
+        progress = index / max(len(segments), 1)
 
-        for i, segment in enumerate(segments):
-            progress = i / total_segments
+        speakers = np.select(
+            [progress < 0.3, progress < 0.5, index % 2 == 0],
+            ["CEO", "CFO", "Analyst"],
+            default="Executive",
+        )
+        segment_types = np.where(progress < 0.5, "prepared_statement", "qa")
 
-            if progress < 0.3:
-                segment["speaker"] = "CEO"
-                segment["segment_type"] = "prepared_statement"
-            elif progress < 0.5:
-                segment["speaker"] = "CFO"
-                segment["segment_type"] = "prepared_statement"
-            else:
-                # Alternate between analyst and executive
-                if i % 2 == 0:
-                    segment["speaker"] = "Analyst"
-                    segment["segment_type"] = "qa"
-                else:
-                    segment["speaker"] = "Executive"
-                    segment["segment_type"] = "qa"
+        for segment, speaker, segment_type in zip(
+            segments, speakers.tolist(), segment_types.tolist()
+        ):
+            segment["speaker"] = speaker
+            segment["segment_type"] = segment_type
 
         return segments
 
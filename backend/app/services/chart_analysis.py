@@ -2,17 +2,297 @@
 Chart Analysis Service using Claude Vision API
 """
 import anthropic
-import base64
-from pathlib import Path
-from typing import List, Dict, Any
+import asyncio
+import aiofiles.os
+import hashlib
+import io
+import logging
+import orjson
+import os
+import re
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import lru_cache
+from PIL import Image, UnidentifiedImageError
+from typing import List, Dict, Any, Optional, Tuple
 from ..core.config import settings
+from ..models import SessionLocal, ChartAnalysisCache
+from .anthropic_client import get_async_client, run_sync
+from .chart_parser import DEFAULT_DESCRIPTION, NO_INCONSISTENCY_MARKERS, parse_chart_response
+
+try:
+    # SIMD (libbase64) encoder; same API as the stdlib function
+    from pybase64 import b64encode
+except ImportError:
+    from base64 import b64encode
+
+logger = logging.getLogger(__name__)
+
+CHART_MODEL = "claude-3-5-sonnet-20241022"
+
+# Charts sent together in one multi-image request, and that request's output budget
+CHARTS_PER_REQUEST = 20
+BATCH_MAX_TOKENS = 8192
+
+# Message Batches polling interval (seconds), doubled up to the max
+MESSAGE_BATCH_POLL_INITIAL = 5
+MESSAGE_BATCH_POLL_MAX = 60
+
+# How long a cached chart analysis stays valid
+CHART_CACHE_TTL = timedelta(days=30)
+
+# Backoff for rate-limited (429), failed (5xx) and overloaded (529) Vision requests
+RATE_LIMIT_RETRIES = 6
+RATE_LIMIT_BASE_DELAY = 10  # seconds, doubled per attempt
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504, 529})
+
+# Image read size for base64 encoding; a multiple of 3 keeps chunk encodings concatenable
+ENCODE_CHUNK_SIZE = 3 * 1024 * 1024
+
+# LRU of base64 payloads keyed by (path, mtime_ns, size); a changed file gets a new key.
+# Also capped by total size, since unprocessed charts (e.g. PDFs) can be up to MAX_CHART_SIZE
+ENCODED_IMAGE_CACHE_SIZE = 256
+ENCODED_IMAGE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+_encoded_image_cache: "OrderedDict[Tuple[str, int, int], Tuple[str, str]]" = OrderedDict()
+_encoded_image_cache_bytes = 0
+
+_MEDIA_TYPES = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+}
+
+# Claude resizes images to ~1568px on the long edge, so larger uploads are wasted bytes
+MAX_IMAGE_EDGE = 1568
+MAX_UNPROCESSED_IMAGE_BYTES = 400 * 1024
+
+
+# Markdown code fence the model sometimes wraps JSON in
+_CODE_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+# Structured output schema for one chart, shared by the single and batched tools
+_CHART_SCHEMA_PROPERTIES = {
+    "description": {"type": "string", "description": "Brief description of the chart"},
+    "data": {"type": "array", "items": {"type": "string"}, "description": "Key data points"},
+    "trends": {"type": "array", "items": {"type": "string"}},
+    "inconsistencies": {
+        "type": "array",
+        "items": {"type": "string"},
+        "description": "Discrepancies between the chart and the transcript",
+    },
+}
+
+CHART_ANALYSIS_TOOL = {
+    "name": "emit_chart_analysis",
+    "description": "Report the structured analysis of a financial chart",
+    "input_schema": {
+        "type": "object",
+        "properties": _CHART_SCHEMA_PROPERTIES,
+        "required": ["description", "data", "inconsistencies"],
+    },
+}
+
+CHART_BATCH_TOOL = {
+    "name": "emit_chart_analyses",
+    "description": "Report the structured analysis of every labelled financial chart",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "charts": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "string", "description": "Chart label, e.g. CHART_0"},
+                        **_CHART_SCHEMA_PROPERTIES,
+                    },
+                    "required": ["id", "description", "data", "inconsistencies"],
+                },
+            },
+        },
+        "required": ["charts"],
+    },
+}
+
+
+def _tool_input(response: Any, tool_name: str) -> Optional[Dict[str, Any]]:
+    """Input of the named tool_use block in a message, if present"""
+    for block in response.content:
+        if block.type == "tool_use" and block.name == tool_name:
+            return block.input
+    return None
+
+
+def _response_text(response: Any) -> str:
+    """Concatenated text blocks of a message"""
+    return "".join(block.text for block in response.content if block.type == "text")
+
+
+# Words of transcript included with each chart prompt
+TRANSCRIPT_EXCERPT_WORDS = 500
+
+# Leading instructions for every chart request; the transcript context follows
+CHART_ANALYSIS_INSTRUCTIONS = """You will be shown financial charts from an earnings call. Analyze each chart in detail, providing:
+
+1. **Chart Description**: What type of chart is this? (line, bar, pie, etc.) What does it show?
+
+2. **Key Data Points**: Extract specific numbers, trends, and metrics shown in the chart.
+   - What are the axes labels?
+   - What time periods are covered?
+   - What are the key values shown?
+
+3. **Trends & Insights**: What trends or patterns are visible?
+
+4. **Inconsistencies**: If provided with transcript context below, identify any discrepancies between what the chart shows and what was stated verbally.
+
+"""
+
+SINGLE_CHART_REQUEST = (
+    "Analyze the financial chart above in detail. Report your analysis with the "
+    "emit_chart_analysis tool. Use an empty inconsistencies list if none are detected."
+)
+
+
+@lru_cache(maxsize=8)
+def _prompt_context(transcript_text: str, company_context: str) -> str:
+    """
+    Company context and transcript excerpt section shared by the chart prompts
+
+    Memoized so re-analyzing charts for the same call doesn't re-split the transcript.
+    """
+    context = ""
+
+    if company_context:
+        context += f"\n**Company Context**: {company_context}\n"
+
+    if transcript_text:
+        # Include first 500 words of transcript for context; maxsplit stops
+        # scanning once they're found instead of splitting the whole call
+        words = transcript_text.split(None, TRANSCRIPT_EXCERPT_WORDS)
+        transcript_excerpt = " ".join(words[:TRANSCRIPT_EXCERPT_WORDS])
+        context += f"\n**Transcript Excerpt**: {transcript_excerpt}...\n"
+
+    return context
+
+
+def _chart_cache_key(source: Dict[str, Any], prompt: str) -> str:
+    """Content address for a chart analysis: image digest and model+prompt digest"""
+    # URL sources are identified by their URL, inline images by their bytes
+    identity = source["url"] if source["type"] == "url" else source["data"]
+    image_digest = hashlib.blake2b(identity.encode(), digest_size=16).hexdigest()
+    prompt_digest = hashlib.blake2b(
+        f"{CHART_MODEL}\n{prompt}".encode(), digest_size=16
+    ).hexdigest()
+    return f"{image_digest}:{prompt_digest}"
+
+
+def _load_cached_analysis(key: str) -> Optional[Dict[str, Any]]:
+    """Fetch a cached chart analysis, ignoring entries past the TTL"""
+    try:
+        with SessionLocal() as db:
+            entry = db.get(ChartAnalysisCache, key)
+            if entry is None or entry.created_at < datetime.utcnow() - CHART_CACHE_TTL:
+                return None
+            return entry.result
+    except Exception as e:
+        logger.warning("Chart cache lookup failed: %s", e)
+        return None
+
+
+def _store_cached_analysis(key: str, result: Dict[str, Any]) -> None:
+    """Save (or refresh) a parsed chart analysis in the cache table"""
+    try:
+        with SessionLocal() as db:
+            db.merge(ChartAnalysisCache(key=key, result=result, created_at=datetime.utcnow()))
+            db.commit()
+    except Exception as e:
+        logger.warning("Chart cache write failed: %s", e)
+
+
+def _preprocess_image(image_path: str, file_size: int) -> Optional[bytes]:
+    """
+    Downscale and re-encode an oversized chart image as WebP
+
+    Args:
+        image_path: Path to image
+        file_size: Size of the file in bytes
+
+    Returns:
+        WebP bytes, or None if the file should be sent as-is (already small
+        enough, or not a raster image Pillow can read, e.g. a PDF chart)
+    """
+    try:
+        with Image.open(image_path) as im:
+            if file_size <= MAX_UNPROCESSED_IMAGE_BYTES and max(im.size) <= MAX_IMAGE_EDGE:
+                return None
+
+            im.thumbnail((MAX_IMAGE_EDGE, MAX_IMAGE_EDGE), Image.LANCZOS)
+            # Keep transparency; charts exported with clear backgrounds would otherwise turn black
+            has_alpha = "A" in im.getbands() or "transparency" in im.info
+            buf = io.BytesIO()
+            im.convert("RGBA" if has_alpha else "RGB").save(buf, format="WEBP", quality=85, method=4)
+            return buf.getvalue()
+    except (UnidentifiedImageError, OSError) as e:
+        # A bad file then fails as its own chart's request, not the whole deck
+        logger.debug("Sending %s unprocessed: %s", image_path, e)
+        return None
+
+
+def _encode_image_file(image_path: str, file_size: int, media_type: str) -> Tuple[str, str]:
+    """
+    Read, optionally downscale, and base64-encode a chart image (blocking)
+
+    Oversized images are re-encoded as WebP first (see _preprocess_image).
+    Others are read in chunks sized to a multiple of 3 bytes so each chunk
+    encodes to independent base64 with no padding in between.
+
+    Args:
+        image_path: Path to image
+        file_size: Size of the file in bytes
+        media_type: Media type of the original file
+
+    Returns:
+        (base64 encoded image string, media type)
+    """
+    optimized = _preprocess_image(image_path, file_size)
+    if optimized is not None:
+        return b64encode(optimized).decode("ascii"), "image/webp"
+
+    encoded = bytearray()
+    with open(image_path, "rb") as image_file:
+        while chunk := image_file.read(ENCODE_CHUNK_SIZE):
+            encoded += b64encode(chunk)
+    return encoded.decode("ascii"), media_type
+
+
+def _cache_encoded_image(key: Tuple[str, int, int], result: Tuple[str, str]) -> None:
+    """Add a payload to the encoded-image LRU, evicting by entry count and total size"""
+    global _encoded_image_cache_bytes
+    size = len(result[0])
+    if size > ENCODED_IMAGE_CACHE_MAX_BYTES:
+        return
+
+    previous = _encoded_image_cache.pop(key, None)
+    if previous is not None:
+        _encoded_image_cache_bytes -= len(previous[0])
+    _encoded_image_cache[key] = result
+    _encoded_image_cache_bytes += size
+    while (
+        len(_encoded_image_cache) > ENCODED_IMAGE_CACHE_SIZE
+        or _encoded_image_cache_bytes > ENCODED_IMAGE_CACHE_MAX_BYTES
+    ):
+        _, (evicted, _) = _encoded_image_cache.popitem(last=False)
+        _encoded_image_cache_bytes -= len(evicted)
 
 
 class ChartAnalysisService:
     """Service for analyzing financial charts using Claude Vision API"""
 
-    def __init__(self):
-        self.client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
+    def __init__(self, client: Optional[anthropic.AsyncAnthropic] = None):
+        self.aclient = client or get_async_client()
 
     def analyze_charts(
         self,
@@ -23,11 +303,39 @@ class ChartAnalysisService:
         """
         Analyze financial charts and compare with verbal statements
 
+        Synchronous wrapper around analyze_charts_async for worker threads;
+        the work runs on the shared service loop.
+
         Args:
             chart_paths: List of paths to chart images
             transcript_text: Full transcript text for comparison
             company_context: Additional company context
 
+        Returns:
+            Dictionary with chart analysis results
+        """
+        return run_sync(
+            self.analyze_charts_async(chart_paths, transcript_text, company_context)
+        )
+
+    async def analyze_charts_async(
+        self,
+        chart_paths: List[str],
+        transcript_text: str = "",
+        company_context: str = "",
+        client: Optional[anthropic.AsyncAnthropic] = None,
+    ) -> Dict[str, Any]:
+        """
+        Analyze financial charts concurrently and compare with verbal statements
+
+        Args:
+            chart_paths: List of paths to chart images
+            transcript_text: Full transcript text for comparison
+            company_context: Additional company context
+            client: Async client to use. Defaults to the service's client, whose
+                connections belong to the service loop; callers on another event
+                loop should pass their own.
+
         Returns:
             Dictionary with chart analysis results
         """
@@ -39,29 +347,49 @@ class ChartAnalysisService:
                     "inconsistencies": [],
                 }
 
-            print(f"📊 Analyzing {len(chart_paths)} charts...")
+            logger.info("📊 Analyzing %d charts...", len(chart_paths))
 
             chart_descriptions = []
             extracted_data = []
             inconsistencies = []
 
-            for i, chart_path in enumerate(chart_paths):
-                print(f"  Analyzing chart {i+1}/{len(chart_paths)}...")
-
-                # Analyze single chart
-                analysis = self._analyze_single_chart(
-                    chart_path,
-                    transcript_text,
-                    company_context
+            # Up to CHARTS_PER_REQUEST charts share one multi-image request; the
+            # requests themselves run concurrently, capped to stay under the
+            # provider's rate limits
+            semaphore = asyncio.Semaphore(settings.ANTHROPIC_CONCURRENCY)
+
+            # Prompts depend only on the transcript and context, so build them once
+            context = _prompt_context(transcript_text, company_context)
+            prompt = self._create_chart_analysis_prompt(context)
+
+            analyses = None
+            if settings.CHART_BATCH_MODE or len(chart_paths) > settings.CHART_BATCH_MIN_CHARTS:
+                # Large decks don't need interactive latency; the Message Batches
+                # API costs half as much and parallelizes on the provider side
+                try:
+                    analyses = await self._analyze_charts_message_batch(
+                        chart_paths, prompt, client or self.aclient
+                    )
+                except (anthropic.APIError, TimeoutError) as e:
+                    logger.warning("Message batch failed (%s), using interactive requests", e)
+
+            if analyses is None:
+                groups = [
+                    chart_paths[i:i + CHARTS_PER_REQUEST]
+                    for i in range(0, len(chart_paths), CHARTS_PER_REQUEST)
+                ]
+                analyses = await self._run_group_pipeline(
+                    groups, prompt, client or self.aclient, semaphore
                 )
 
+            for analysis in analyses:
                 chart_descriptions.append(analysis["description"])
                 extracted_data.extend(analysis["data"])
 
                 if analysis.get("inconsistencies"):
                     inconsistencies.extend(analysis["inconsistencies"])
 
-            print(f"✅ Chart analysis complete. Found {len(inconsistencies)} inconsistencies")
+            logger.info("✅ Chart analysis complete. Found %d inconsistencies", len(inconsistencies))
 
             return {
                 "chart_descriptions": chart_descriptions,
@@ -70,230 +398,544 @@ class ChartAnalysisService:
             }
 
         except Exception as e:
-            print(f"❌ Chart analysis error: {e}")
+            logger.error("❌ Chart analysis error: %s", e)
             raise Exception(f"Failed to analyze charts: {str(e)}")
 
-    def _analyze_single_chart(
+    async def _run_group_pipeline(
+        self,
+        groups: List[List[str]],
+        prompt: str,
+        client: anthropic.AsyncAnthropic,
+        semaphore: asyncio.Semaphore,
+    ) -> List[Dict[str, Any]]:
+        """
+        Encode and analyze chart groups as a two-stage pipeline
+
+        Encoder workers prepare the image sources for upcoming groups while
+        dispatcher workers have earlier groups' requests in flight. The
+        bounded queue between them keeps only a few encoded groups in
+        memory at a time.
+
+        Args:
+            groups: Chart path groups, one request each
+            prompt: Shared chart analysis prompt
+            client: Async Anthropic client
+            semaphore: Limits concurrent Vision requests
+
+        Returns:
+            Chart analyses for all groups, in input order
+        """
+        workers = min(settings.ANTHROPIC_CONCURRENCY, len(groups))
+        todo: asyncio.Queue = asyncio.Queue()
+        for item in enumerate(groups):
+            todo.put_nowait(item)
+        ready: asyncio.Queue = asyncio.Queue(maxsize=workers)
+        results: List[List[Dict[str, Any]]] = [[] for _ in groups]
+
+        async def encoder():
+            while not todo.empty():
+                index, group = todo.get_nowait()
+                sources = await asyncio.gather(*(self._image_source_async(p) for p in group))
+                await ready.put((index, group, sources))
+
+        async def feed():
+            await asyncio.gather(*(encoder() for _ in range(workers)))
+            for _ in range(workers):
+                await ready.put(None)  # One stop signal per dispatcher
+
+        async def dispatcher():
+            while (item := await ready.get()) is not None:
+                index, group, sources = item
+                results[index] = await self._analyze_chart_group_async(
+                    group, sources, prompt, client, semaphore
+                )
+
+        tasks = [asyncio.ensure_future(feed())]
+        tasks += [asyncio.ensure_future(dispatcher()) for _ in range(workers)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # On failure, don't leave the other stage blocked on the queue
+            for task in tasks:
+                task.cancel()
+
+        return [analysis for group_result in results for analysis in group_result]
+
+    async def _analyze_chart_group_async(
+        self,
+        chart_paths: List[str],
+        sources: List[Dict[str, Any]],
+        prompt: str,
+        client: anthropic.AsyncAnthropic,
+        semaphore: asyncio.Semaphore,
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze a group of charts with one multi-image request
+
+        Cached charts are skipped. If the batched request or its JSON can't
+        be used, the remaining charts are analyzed one request each.
+
+        Args:
+            chart_paths: Paths to chart images (at most CHARTS_PER_REQUEST)
+            sources: Image source block per chart
+            prompt: Shared chart analysis prompt
+            client: Async Anthropic client
+            semaphore: Limits concurrent Vision requests
+
+        Returns:
+            Chart analyses in the same order as chart_paths
+        """
+        # Cache entries are shared with the single-chart path, so key on the shared prompt
+        keys = [_chart_cache_key(source, prompt) for source in sources]
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(chart_paths)
+        if settings.ENABLE_CACHE:
+            results = list(await asyncio.gather(
+                *(asyncio.to_thread(_load_cached_analysis, key) for key in keys)
+            ))
+
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return results
+
+        try:
+            batch = await self._analyze_chart_batch_async(
+                [sources[i] for i in pending], prompt, client, semaphore
+            )
+        except Exception as e:
+            logger.warning("Batched chart analysis failed (%s), analyzing charts individually", e)
+            fallback = await asyncio.gather(*(
+                self._analyze_single_chart_async(
+                    chart_paths[i], prompt, client, semaphore
+                )
+                for i in pending
+            ))
+            for i, result in zip(pending, fallback):
+                results[i] = result
+            return results
+
+        for i, result in zip(pending, batch):
+            results[i] = result
+        if settings.ENABLE_CACHE:
+            await asyncio.gather(
+                *(asyncio.to_thread(_store_cached_analysis, keys[i], results[i]) for i in pending)
+            )
+        return results
+
+    async def _analyze_chart_batch_async(
+        self,
+        sources: List[Dict[str, Any]],
+        prompt: str,
+        client: anthropic.AsyncAnthropic,
+        semaphore: asyncio.Semaphore,
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze several charts in a single Claude request
+
+        Each image is preceded by a CHART_<i> label and the model reports
+        through the emit_chart_analyses tool, one entry per label.
+
+        Args:
+            sources: Image source block per chart
+            prompt: Shared chart analysis prompt
+            client: Async Anthropic client
+            semaphore: Limits concurrent Vision requests
+
+        Returns:
+            Chart analyses in the same order as sources
+
+        Raises:
+            ValueError: If the response doesn't cover every chart
+        """
+        content = [self._prompt_block(prompt)]
+        for i, source in enumerate(sources):
+            content.append({"type": "text", "text": f"CHART_{i}:"})
+            content.append({"type": "image", "source": source})
+        content.append({
+            "type": "text",
+            "text": self._create_batch_analysis_prompt(len(sources)),
+        })
+
+        response = await self._create_message_with_backoff(
+            client,
+            semaphore,
+            model=CHART_MODEL,
+            max_tokens=BATCH_MAX_TOKENS,
+            tools=[CHART_BATCH_TOOL],
+            tool_choice={"type": "tool", "name": CHART_BATCH_TOOL["name"]},
+            messages=[{"role": "user", "content": content}],
+        )
+
+        tool_input = _tool_input(response, CHART_BATCH_TOOL["name"])
+        if tool_input is not None:
+            items = tool_input.get("charts")
+        else:
+            # Fall back to a plain JSON answer (bare array or {"charts": [...]})
+            items = orjson.loads(_CODE_FENCE_RE.sub("", _response_text(response).strip()))
+            if isinstance(items, dict):
+                items = items.get("charts")
+
+        return self._collect_batch_results(items, len(sources))
+
+    async def _analyze_single_chart_async(
         self,
         chart_path: str,
-        transcript_text: str,
-        company_context: str
+        prompt: str,
+        client: anthropic.AsyncAnthropic,
+        semaphore: asyncio.Semaphore,
     ) -> Dict[str, Any]:
         """
         Analyze a single chart image
 
         Args:
             chart_path: Path to chart image
-            transcript_text: Transcript for comparison
-            company_context: Company context
+            prompt: Shared chart analysis prompt
+            client: Async Anthropic client
+            semaphore: Limits concurrent Vision requests
 
         Returns:
             Dictionary with chart analysis
         """
         # Read and encode image
-        image_data = self._encode_image(chart_path)
+        source = await self._image_source_async(chart_path)
 
-        # Create analysis prompt
-        prompt = self._create_chart_analysis_prompt(transcript_text, company_context)
+        # Same image + same prompt gives the same analysis; skip the Vision call on a hit
+        cache_key = _chart_cache_key(source, prompt)
+        if settings.ENABLE_CACHE:
+            cached = await asyncio.to_thread(_load_cached_analysis, cache_key)
+            if cached is not None:
+                return cached
 
         try:
             # Call Claude Vision API
-            response = self.client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=2000,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image",
-                                "source": {
-                                    "type": "base64",
-                                    "media_type": self._get_media_type(chart_path),
-                                    "data": image_data,
-                                },
-                            },
-                            {
-                                "type": "text",
-                                "text": prompt,
-                            }
-                        ],
-                    }
-                ],
+            response = await self._create_message_with_backoff(
+                client,
+                semaphore,
+                **self._single_chart_params(prompt, source),
             )
 
-            # Parse response
-            analysis_text = response.content[0].text
+            result = self._parse_single_response(response)
 
-            # Extract structured data from response
-            result = self._parse_chart_response(analysis_text)
+            if settings.ENABLE_CACHE:
+                await asyncio.to_thread(_store_cached_analysis, cache_key, result)
 
             return result
 
         except Exception as e:
-            print(f"Warning: Failed to analyze chart {chart_path}: {e}")
+            logger.warning("Failed to analyze chart %s: %s", chart_path, e)
             return {
                 "description": f"Failed to analyze chart: {str(e)}",
                 "data": [],
                 "inconsistencies": [],
             }
 
-    def _encode_image(self, image_path: str) -> str:
+    async def _analyze_charts_message_batch(
+        self,
+        chart_paths: List[str],
+        prompt: str,
+        client: anthropic.AsyncAnthropic,
+    ) -> List[Dict[str, Any]]:
         """
-        Encode image to base64
+        Analyze charts through the Message Batches API
+
+        Each uncached chart becomes one single-chart request in a batch; the
+        batch is polled with exponential backoff until it ends, or cancelled
+        once CHART_BATCH_TIMEOUT passes (batches can take up to 24h).
 
         Args:
-            image_path: Path to image
+            chart_paths: Paths to chart images
+            prompt: Shared chart analysis prompt
+            client: Async Anthropic client
 
         Returns:
-            Base64 encoded image string
-        """
-        with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode("utf-8")
+            Chart analyses in the same order as chart_paths
 
-    def _get_media_type(self, image_path: str) -> str:
+        Raises:
+            TimeoutError: The batch didn't end within CHART_BATCH_TIMEOUT
         """
-        Get media type from file extension
-
-        Args:
-            image_path: Path to image
+        sources = await asyncio.gather(*(self._image_source_async(p) for p in chart_paths))
+        keys = [_chart_cache_key(source, prompt) for source in sources]
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(chart_paths)
+        if settings.ENABLE_CACHE:
+            results = list(await asyncio.gather(
+                *(asyncio.to_thread(_load_cached_analysis, key) for key in keys)
+            ))
+
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return results
+
+        batch = await client.messages.batches.create(requests=[
+            {
+                "custom_id": f"chart_{i}",
+                "params": self._single_chart_params(prompt, sources[i]),
+            }
+            for i in pending
+        ])
+        logger.info("Submitted message batch %s (%d charts)", batch.id, len(pending))
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.CHART_BATCH_TIMEOUT
+        delay = MESSAGE_BATCH_POLL_INITIAL
+        while batch.processing_status != "ended":
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                try:
+                    await client.messages.batches.cancel(batch.id)
+                except anthropic.APIError as e:
+                    logger.warning("Failed to cancel message batch %s: %s", batch.id, e)
+                raise TimeoutError(
+                    f"Message batch {batch.id} still {batch.processing_status} "
+                    f"after {settings.CHART_BATCH_TIMEOUT}s"
+                )
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, MESSAGE_BATCH_POLL_MAX)
+            batch = await client.messages.batches.retrieve(batch.id)
+
+        async for entry in await client.messages.batches.results(batch.id):
+            i = int(entry.custom_id.removeprefix("chart_"))
+            if entry.result.type == "succeeded":
+                results[i] = self._parse_single_response(entry.result.message)
+                if settings.ENABLE_CACHE:
+                    await asyncio.to_thread(_store_cached_analysis, keys[i], results[i])
+            else:
+                logger.warning("Failed to analyze chart %s: %s", chart_paths[i], entry.result.type)
+                results[i] = {
+                    "description": f"Failed to analyze chart: {entry.result.type}",
+                    "data": [],
+                    "inconsistencies": [],
+                }
 
-        Returns:
-            Media type string
-        """
-        ext = Path(image_path).suffix.lower()
-        media_types = {
-            ".jpg": "image/jpeg",
-            ".jpeg": "image/jpeg",
-            ".png": "image/png",
-            ".gif": "image/gif",
-            ".webp": "image/webp",
+        for i in pending:
+            if results[i] is None:
+                results[i] = {
+                    "description": "Failed to analyze chart: no batch result",
+                    "data": [],
+                    "inconsistencies": [],
+                }
+        return results
+
+    def _single_chart_params(self, prompt: str, source: Dict[str, Any]) -> Dict[str, Any]:
+        """Message parameters for analyzing one chart"""
+        return {
+            "model": CHART_MODEL,
+            "max_tokens": 2000,
+            "tools": [CHART_ANALYSIS_TOOL],
+            "tool_choice": {"type": "tool", "name": CHART_ANALYSIS_TOOL["name"]},
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        self._prompt_block(prompt),
+                        {"type": "image", "source": source},
+                        {
+                            "type": "text",
+                            "text": SINGLE_CHART_REQUEST,
+                        }
+                    ],
+                }
+            ],
         }
-        return media_types.get(ext, "image/jpeg")
 
-    def _create_chart_analysis_prompt(
+    def _parse_single_response(self, response: Any) -> Dict[str, Any]:
+        """Structured analysis from a single-chart message"""
+        # The forced tool call arrives as an already-parsed dict
+        analysis = _tool_input(response, CHART_ANALYSIS_TOOL["name"])
+        if analysis is not None:
+            return self._normalize_chart_json(analysis)
+
+        analysis_text = _response_text(response)
+        try:
+            analysis = orjson.loads(_CODE_FENCE_RE.sub("", analysis_text.strip()))
+        except orjson.JSONDecodeError:
+            analysis = None
+
+        if isinstance(analysis, dict):
+            return self._normalize_chart_json(analysis)
+        # Last resort for a free-text answer
+        return parse_chart_response(analysis_text)
+
+    async def _create_message_with_backoff(
         self,
-        transcript_text: str,
-        company_context: str
-    ) -> str:
+        client: anthropic.AsyncAnthropic,
+        semaphore: asyncio.Semaphore,
+        **kwargs: Any,
+    ) -> Any:
         """
-        Create prompt for chart analysis
+        Create a message, backing off exponentially on rate limiting,
+        server errors and dropped connections
+
+        The response is streamed so bytes start flowing as soon as the model
+        does; a long multi-chart answer then never sits silent past the
+        client's read timeout. The semaphore is only held for the request
+        itself, so a throttled chart doesn't block others while it sleeps.
+
+        This loop is the only retry layer: the SDK's own retries are turned
+        off for these requests so attempts don't multiply.
+        """
+        client = client.with_options(max_retries=0)
+        for attempt in range(RATE_LIMIT_RETRIES):
+            try:
+                async with semaphore:
+                    async with client.messages.stream(**kwargs) as stream:
+                        return await stream.get_final_message()
+            except (anthropic.APIStatusError, anthropic.APIConnectionError) as e:
+                status = getattr(e, "status_code", None)
+                retryable = status is None or status in RETRYABLE_STATUS_CODES
+                if not retryable or attempt == RATE_LIMIT_RETRIES - 1:
+                    raise
+                delay = RATE_LIMIT_BASE_DELAY * 2 ** attempt
+                logger.info("Vision request failed (%s), retrying in %ds...", status or e, delay)
+                await asyncio.sleep(delay)
+
+    async def _image_source_async(self, chart_path: str) -> Dict[str, Any]:
+        """
+        Image source block for a chart
+
+        Charts that are already reachable over HTTP(S) are passed by URL, so
+        Anthropic fetches them directly and nothing is base64-encoded or
+        re-uploaded. Local files are sent inline as base64.
 
         Args:
-            transcript_text: Transcript text
-            company_context: Company context
+            chart_path: Local path or http(s) URL of the chart image
 
         Returns:
-            Analysis prompt
+            Anthropic image source dictionary
         """
-        prompt = """Analyze this financial chart in detail. Please provide:
+        if chart_path.startswith(("http://", "https://")):
+            return {"type": "url", "url": chart_path}
 
-1. **Chart Description**: What type of chart is this? (line, bar, pie, etc.) What does it show?
+        image_data, media_type = await self._encode_image_async(chart_path)
+        return {"type": "base64", "media_type": media_type, "data": image_data}
 
-2. **Key Data Points**: Extract specific numbers, trends, and metrics shown in the chart.
-   - What are the axes labels?
-   - What time periods are covered?
-   - What are the key values shown?
+    async def _encode_image_async(self, image_path: str) -> Tuple[str, str]:
+        """
+        Encode image to base64 without blocking the event loop
 
-3. **Trends & Insights**: What trends or patterns are visible?
+        The read, any Pillow downscaling and the base64 encoding all run in
+        one worker thread (see _encode_image_file), so they overlap with
+        Vision requests already in flight.
 
-4. **Inconsistencies**: If provided with transcript context below, identify any discrepancies between what the chart shows and what was stated verbally.
+        Results are cached by (path, mtime, size), so re-analyzing an
+        unchanged chart skips the read and encode entirely.
 
-"""
+        Args:
+            image_path: Path to image
 
-        if company_context:
-            prompt += f"\n**Company Context**: {company_context}\n"
+        Returns:
+            (base64 encoded image string, media type)
+        """
+        st = await aiofiles.os.stat(image_path)
+        key = (image_path, st.st_mtime_ns, st.st_size)
+        cached = _encoded_image_cache.get(key)
+        if cached is not None:
+            _encoded_image_cache.move_to_end(key)
+            return cached
+
+        result = await asyncio.to_thread(
+            _encode_image_file, image_path, st.st_size, self._get_media_type(image_path)
+        )
+
+        _cache_encoded_image(key, result)
+        return result
 
-        if transcript_text:
-            # Include first 500 words of transcript for context
-            transcript_excerpt = " ".join(transcript_text.split()[:500])
-            prompt += f"\n**Transcript Excerpt**: {transcript_excerpt}...\n"
+    def _get_media_type(self, image_path: str) -> str:
+        """
+        Get media type from file extension
 
-        prompt += """
-Please structure your response as follows:
+        Args:
+            image_path: Path to image
 
-DESCRIPTION: [Brief description of the chart]
+        Returns:
+            Media type string
+        """
+        return _MEDIA_TYPES.get(os.path.splitext(image_path)[1].lower(), "image/jpeg")
 
-DATA:
-- [Key data point 1]
-- [Key data point 2]
-...
+    def _create_chart_analysis_prompt(self, context: str) -> str:
+        """
+        Create the shared chart analysis prompt
 
-TRENDS:
-- [Trend 1]
-- [Trend 2]
-...
+        The same text leads every Vision request for a call, ahead of the
+        images, so it can be served from Anthropic's prompt cache.
 
-INCONSISTENCIES:
-- [Any inconsistency found, or "None detected"]
-"""
+        Args:
+            context: Company context and transcript excerpt section (see _prompt_context)
 
-        return prompt
+        Returns:
+            Analysis prompt
+        """
+        return CHART_ANALYSIS_INSTRUCTIONS + context
 
-    def _parse_chart_response(self, response_text: str) -> Dict[str, Any]:
+    def _create_batch_analysis_prompt(self, num_charts: int) -> str:
         """
-        Parse structured response from Claude
+        Create the closing request for several labelled charts in one message
 
         Args:
-            response_text: Claude's response text
+            num_charts: Number of charts in the request
 
         Returns:
-            Structured dictionary
+            Request text placed after the images
         """
-        result = {
-            "description": "",
-            "data": [],
-            "inconsistencies": [],
-        }
+        return (
+            f"Analyze each of the {num_charts} financial charts above "
+            f"(labelled CHART_0 to CHART_{num_charts - 1}) in detail. "
+            "Report your analysis with the emit_chart_analyses tool, with one entry per "
+            'chart using its label (e.g. "CHART_0") as the id. '
+            "Use an empty inconsistencies list if none are detected."
+        )
+
+    def _prompt_block(self, prompt: str) -> Dict[str, Any]:
+        """Text block for the shared prompt, marked as a prompt-cache breakpoint"""
+        block = {"type": "text", "text": prompt}
+        if settings.ENABLE_PROMPT_CACHING:
+            block["cache_control"] = {"type": "ephemeral"}
+        return block
+
+    def _collect_batch_results(self, items: Any, num_charts: int) -> List[Dict[str, Any]]:
+        """
+        Order and normalize the per-chart objects returned for a multi-chart request
 
-        # Simple parsing logic
-        sections = {
-            "DESCRIPTION:": "description",
-            "DATA:": "data",
-            "TRENDS:": "trends",
-            "INCONSISTENCIES:": "inconsistencies",
-        }
+        Args:
+            items: List of chart objects from the model
+            num_charts: Number of charts in the request
 
-        current_section = None
-        lines = response_text.split("\n")
-
-        for line in lines:
-            line = line.strip()
-
-            # Check for section headers
-            for header, section_name in sections.items():
-                if line.startswith(header):
-                    current_section = section_name
-                    # Extract content after header
-                    content = line[len(header):].strip()
-                    if content:
-                        if section_name == "description":
-                            result["description"] = content
-                    break
-            else:
-                # Process content based on current section
-                if current_section and line:
-                    if line.startswith("-") or line.startswith("•"):
-                        # List item
-                        content = line.lstrip("-•").strip()
-                        if content:
-                            if current_section == "data":
-                                result["data"].append({
-                                    "description": content,
-                                    "source": "chart"
-                                })
-                            elif current_section == "inconsistencies":
-                                if content.lower() not in ["none", "none detected", "no inconsistencies"]:
-                                    result["inconsistencies"].append({
-                                        "type": "chart_verbal_mismatch",
-                                        "description": content,
-                                        "severity": "medium"
-                                    })
-                    elif current_section == "description" and not result["description"]:
-                        result["description"] = line
-
-        # Default description if none found
-        if not result["description"]:
-            result["description"] = "Financial chart analysis completed"
+        Returns:
+            Structured chart analyses ordered CHART_0..CHART_<n-1>
 
-        return result
+        Raises:
+            ValueError: If items isn't a list covering every chart
+        """
+        if not isinstance(items, list):
+            raise ValueError("expected a list of chart analyses")
+
+        by_id = {item.get("id"): item for item in items if isinstance(item, dict)}
+        missing = [f"CHART_{i}" for i in range(num_charts) if f"CHART_{i}" not in by_id]
+        if missing:
+            raise ValueError(f"response is missing {', '.join(missing)}")
+
+        return [self._normalize_chart_json(by_id[f"CHART_{i}"]) for i in range(num_charts)]
+
+    def _normalize_chart_json(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a model-produced chart object into the parsed-analysis shape"""
+        data = []
+        for point in item.get("data") or []:
+            content = point.get("description", "") if isinstance(point, dict) else str(point)
+            if content:
+                data.append({"description": content, "source": "chart"})
+
+        inconsistencies = []
+        for incon in item.get("inconsistencies") or []:
+            content = incon.get("description", "") if isinstance(incon, dict) else str(incon)
+            if content and content.lower() not in NO_INCONSISTENCY_MARKERS:
+                inconsistencies.append({
+                    "type": "chart_verbal_mismatch",
+                    "description": content,
+                    "severity": "medium",
+                })
+
+        return {
+            "description": item.get("description") or DEFAULT_DESCRIPTION,
+            "data": data,
+            "inconsistencies": inconsistencies,
+        }
@@ -0,0 +1,82 @@
+"""
+Free-text parser for chart analysis responses
+
+Kept free of service dependencies and fully annotated so it can be
+compiled with mypyc (``mypyc app/services/chart_parser.py``); the pure
+Python module is used when no compiled build is present.
+"""
+import re
+from typing import Any, Dict, Final, FrozenSet, List, Pattern
+
+
+# Response sections: header name, text on the header line, then the block up to the next header
+_SECTION_RE: Final[Pattern[str]] = re.compile(
+    r"^[ \t]*(DESCRIPTION|DATA|TRENDS|INCONSISTENCIES):([^\n]*)\n?"
+    r"(.*?)(?=^[ \t]*(?:DESCRIPTION|DATA|TRENDS|INCONSISTENCIES):|\Z)",
+    re.M | re.S,
+)
+# "- item" / "• item" list entries
+_BULLET_RE: Final[Pattern[str]] = re.compile(r"^[ \t]*[-•]+[ \t]*(.*?)[ \t\r]*$", re.M)
+NO_INCONSISTENCY_MARKERS: Final[FrozenSet[str]] = frozenset(
+    {"none", "none detected", "no inconsistencies"}
+)
+DEFAULT_DESCRIPTION: Final[str] = "Financial chart analysis completed"
+
+
+def _first_plain_line(body: str) -> str:
+    """Return the first non-empty, non-bullet line of a section body"""
+    line: str
+    for line in body.splitlines():
+        line = line.strip()
+        if line and not line.startswith(("-", "•")):
+            return line
+    return ""
+
+
+def parse_chart_response(response_text: str) -> Dict[str, Any]:
+    """
+    Parse structured response from Claude
+
+    Args:
+        response_text: Claude's response text
+
+    Returns:
+        Structured dictionary
+    """
+    description: str = ""
+    data: List[Dict[str, str]] = []
+    inconsistencies: List[Dict[str, str]] = []
+
+    # One scan splits the response into sections; the header line's
+    # trailing text is kept apart from the block body
+    for match in _SECTION_RE.finditer(response_text):
+        section: str = match.group(1)
+        inline: str = match.group(2).strip()
+        body: str = match.group(3)
+
+        if section == "DESCRIPTION":
+            if inline:
+                description = inline
+            elif not description:
+                description = _first_plain_line(body)
+
+        elif section == "DATA":
+            for content in _BULLET_RE.findall(body):
+                if content:
+                    data.append({"description": content, "source": "chart"})
+
+        elif section == "INCONSISTENCIES":
+            for content in _BULLET_RE.findall(body):
+                if content and content.lower() not in NO_INCONSISTENCY_MARKERS:
+                    inconsistencies.append({
+                        "type": "chart_verbal_mismatch",
+                        "description": content,
+                        "severity": "medium",
+                    })
+
+    return {
+        # Default description if none found
+        "description": description or DEFAULT_DESCRIPTION,
+        "data": data,
+        "inconsistencies": inconsistencies,
+    }
@@ -2,16 +2,434 @@
 Claude AI Integration Service for comprehensive financial analysis
 """
 import anthropic
-import json
-from typing import Dict, Any, List, Optional
+import asyncio
+import hashlib
+import logging
+import orjson
+import os
+import re
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import AsyncIterator, Dict, Any, List, Mapping, Optional, Set, Tuple
 from ..core.config import settings
+from .anthropic_client import get_async_client, get_service_loop, run_sync
+
+try:
+    from prometheus_client import Counter
+except ImportError:  # optional metrics export
+    Counter = None
+
+logger = logging.getLogger(__name__)
+
+if Counter is not None:
+    # Process-wide token usage of Claude analysis calls
+    CACHE_READ_TOKENS = Counter(
+        "claude_cache_read_tokens_total", "Input tokens read from the prompt cache"
+    )
+    CACHE_WRITE_TOKENS = Counter(
+        "claude_cache_write_tokens_total", "Input tokens written to the prompt cache"
+    )
+    INPUT_TOKENS = Counter("claude_input_tokens_total", "Uncached input tokens")
+    OUTPUT_TOKENS = Counter("claude_output_tokens_total", "Output tokens")
+
+
+# Fixed lead-in of every user message. It sits ahead of the per-call data
+# with its own cache breakpoint, so it's billed as a cache read after the
+# first call instead of as fresh input every time.
+USER_MESSAGE_INSTRUCTIONS = """Below is the multi-modal analysis data for one earnings call, in these sections:
+- Company Context: background supplied with the upload
+- Audio Analysis (Vocal Biomarkers): overall confidence, stress indicators, speech rate and pitch variation
+- Text Sentiment Analysis: overall sentiment, sentiment distribution, key topics and the number of financial metrics mentioned
+- Transcript Excerpt: the opening of the call transcript
+- Chart Analysis: chart counts, extracted data points, inconsistencies and per-chart insights
+- Multi-Modal Fusion Results: unified credibility score, risk level and key discrepancies
+
+Please provide your comprehensive analysis following the structured format specified in the system prompt. Focus on what makes this analysis unique: the combination of vocal stress detection, sentiment analysis, and chart verification."""
+
+# Markdown section headers of the analysis response -> result keys
+_ANALYSIS_SECTIONS = {
+    "EXECUTIVE SUMMARY": "executive_summary",
+    "RISK INDICATORS": "risk_indicators",
+    "OPPORTUNITIES": "opportunities",
+    "RED FLAGS": "red_flags",
+    "CONFIDENCE ASSESSMENT": "confidence_assessment",
+    "OVERALL RECOMMENDATION": "overall_recommendation",
+}
+# A "#" header line naming one of the sections anywhere in its text
+_ANALYSIS_SECTION_RE = re.compile(
+    r"#.*?(" + "|".join(_ANALYSIS_SECTIONS) + r")", re.IGNORECASE
+)
+
+# Characters of transcript quoted in the user message
+TRANSCRIPT_EXCERPT_CHARS = 1500
+
+# Per-call data section of the user message (filled with str.format_map)
+USER_DATA_TEMPLATE = """## EARNINGS CALL ANALYSIS DATA FOR: {company_name}
+
+### Company Context
+{company_context}
+
+### Audio Analysis (Vocal Biomarkers)
+- Overall Confidence Score: {overall_confidence:.2f}/1.0
+- Stress Indicators: {stress_count} detected
+- Speech Rate: {speech_rate:.2f} segments/second
+- Pitch Variation: {pitch_variation:.3f}
+- Voice Quality Issues: {stress_types}
+
+### Text Sentiment Analysis
+- Overall Sentiment: {overall_sentiment}
+- Sentiment Distribution: {sentiment_distribution}
+- Key Topics: {key_topics}
+- Financial Metrics Mentioned: {metric_count} metrics
+
+### Transcript Excerpt
+{transcript_excerpt}...
+
+### Chart Analysis
+- Charts Analyzed: {chart_count}
+- Key Data Points: {data_point_count}
+- Inconsistencies Detected: {inconsistency_count}
+
+{chart_insights}
+
+### Multi-Modal Fusion Results
+- Unified Credibility Score: {credibility_score:.2f}/1.0
+- Risk Level: {risk_level}
+- Key Discrepancies: {discrepancies}"""
+
+# Read-only defaults for missing sections, shared instead of allocating {} / [] per lookup
+_EMPTY_DICT: Mapping[str, Any] = MappingProxyType({})
+_EMPTY_LIST: Tuple[Any, ...] = ()
+
+# cache_control for the cached prompt blocks (system prompt and user-message lead-in)
+PROMPT_CACHE_CONTROL = {"type": "ephemeral", "ttl": settings.CLAUDE_CACHE_TTL}
+
+_LIST_ITEM_SCHEMA = {"type": "array", "items": {"type": "string"}}
+
+# Structured output for the comprehensive analysis; keys match the parsed result
+ANALYSIS_TOOL = {
+    "name": "emit_analysis",
+    "description": "Record the comprehensive multi-modal earnings call analysis",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "executive_summary": {
+                "type": "string",
+                "description": "EXECUTIVE SUMMARY section, 2-3 paragraphs",
+            },
+            "risk_indicators": {
+                **_LIST_ITEM_SCHEMA,
+                "description": "RISK INDICATORS, one '[Title] - [description with modality, "
+                               "severity and evidence]' string per risk",
+            },
+            "opportunities": {
+                **_LIST_ITEM_SCHEMA,
+                "description": "OPPORTUNITIES, one '[Title] - [description with evidence, "
+                               "signal strength and timeline]' string per opportunity",
+            },
+            "red_flags": {
+                **_LIST_ITEM_SCHEMA,
+                "description": "RED FLAGS, one '[Title] - [description with severity]' string "
+                               "per flag; empty if none were identified",
+            },
+            "confidence_assessment": {
+                "type": "string",
+                "description": "CONFIDENCE ASSESSMENT section",
+            },
+            "overall_recommendation": {
+                "type": "string",
+                "description": "OVERALL RECOMMENDATION section",
+            },
+        },
+        "required": [
+            "executive_summary",
+            "risk_indicators",
+            "opportunities",
+            "red_flags",
+            "confidence_assessment",
+            "overall_recommendation",
+        ],
+    },
+}
+_ANALYSIS_TEXT_FIELDS = ("executive_summary", "confidence_assessment", "overall_recommendation")
+_ANALYSIS_LIST_FIELDS = ("risk_indicators", "opportunities", "red_flags")
+
+# "- item" / "• item" / "* item" list entries, and placeholder entries to drop
+_BULLET_RE = re.compile(r"[-•*]+\s*(.*)")
+_NONE_ITEM_RE = re.compile(r"none(?: identified)?", re.IGNORECASE)
+
+
+def _pretty_json(value: Any) -> str:
+    """2-space indented JSON (as json.dumps(indent=2)); numpy scalars are serialized natively"""
+    return orjson.dumps(
+        value, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    ).decode()
+
+
+# request digest -> parsed analysis, for re-runs of identical inputs
+RESPONSE_CACHE_SIZE = 256
+_response_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+def _response_cache_key(params: Dict[str, Any]) -> str:
+    """Digest of the full request (model, prompts and per-call data)"""
+    payload = orjson.dumps(
+        params, option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    )
+    return hashlib.blake2b(payload, digest_size=32).hexdigest()
+
+
+def _remember_response(key: str, analysis: Dict[str, Any]) -> None:
+    """Add an analysis to the in-memory LRU"""
+    _response_cache[key] = dict(analysis)
+    if len(_response_cache) > RESPONSE_CACHE_SIZE:
+        _response_cache.popitem(last=False)
+
+
+def _read_disk_cache(key: str) -> Optional[Dict[str, Any]]:
+    """Load a stored analysis for this request digest, if one was written within CLAUDE_CACHE_MAX_AGE"""
+    path = Path(settings.CLAUDE_CACHE_DIR) / f"{key}.json"
+    try:
+        if time.time() - path.stat().st_mtime > settings.CLAUDE_CACHE_MAX_AGE:
+            path.unlink(missing_ok=True)
+            return None
+        return orjson.loads(path.read_bytes())
+    except FileNotFoundError:
+        return None
+    except (OSError, orjson.JSONDecodeError) as e:
+        logger.warning("Ignoring unreadable Claude cache entry %s: %s", path.name, e)
+        return None
+
+
+def _write_disk_cache(key: str, analysis: Dict[str, Any]) -> None:
+    """Store an analysis atomically (temp file + rename) so readers never see a partial entry"""
+    cache_dir = Path(settings.CLAUDE_CACHE_DIR)
+    tmp_path = None
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(orjson.dumps(analysis, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS))
+        os.replace(tmp_path, cache_dir / f"{key}.json")
+    except OSError as e:
+        logger.warning("Failed to write Claude cache entry: %s", e)
+        if tmp_path is not None:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+        return
+
+    _prune_disk_cache(cache_dir)
+
+
+def _prune_disk_cache(cache_dir: Path) -> None:
+    """Drop the oldest entries beyond CLAUDE_CACHE_MAX_ENTRIES"""
+    try:
+        entries = [(entry.stat().st_mtime, entry) for entry in cache_dir.glob("*.json")]
+    except OSError as e:
+        logger.warning("Failed to list Claude cache entries: %s", e)
+        return
+
+    excess = len(entries) - settings.CLAUDE_CACHE_MAX_ENTRIES
+    if excess <= 0:
+        return
+    entries.sort()
+    for _, entry in entries[:excess]:
+        entry.unlink(missing_ok=True)
+
+
+@dataclass
+class AnalysisCase:
+    """Inputs for one analysis submitted through the Message Batches API"""
+    id: str
+    company_name: str
+    company_context: str
+    transcript: Dict[str, Any]
+    audio_features: Dict[str, Any]
+    sentiment_analysis: Dict[str, Any]
+    chart_analysis: Dict[str, Any]
+    fusion_results: Dict[str, Any]
+
+
+# Micro-batching: flush when this many analyses are waiting, or after the oldest waited this long
+BATCHER_MAX_BATCH_SIZE = 16
+BATCHER_MAX_QUEUE_TIME = 2.0
+
+# Message Batches polling interval (seconds), doubled up to the max
+MESSAGE_BATCH_POLL_INITIAL = 5
+MESSAGE_BATCH_POLL_MAX = 60
+
+
+class ClaudeBatcher:
+    """
+    Coalesce concurrent analysis requests into Message Batches
+
+    Requests that arrive within BATCHER_MAX_QUEUE_TIME of each other (up to
+    BATCHER_MAX_BATCH_SIZE) are submitted as one batch; each caller awaits
+    its own message, matched back by custom_id. A batch still running after
+    CLAUDE_BATCH_TIMEOUT is cancelled and its callers get TimeoutError. Must
+    be used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        client: anthropic.AsyncAnthropic,
+        max_batch_size: int = BATCHER_MAX_BATCH_SIZE,
+        max_queue_time: float = BATCHER_MAX_QUEUE_TIME,
+    ):
+        self.client = client
+        self.max_batch_size = max_batch_size
+        self.max_queue_time = max_queue_time
+        self._pending: List[Tuple[str, Dict[str, Any], asyncio.Future]] = []
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        # Strong references to in-flight batches; the loop only holds tasks weakly
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, params: Dict[str, Any]) -> Any:
+        """
+        Queue one Messages API request and wait for its result
+
+        Args:
+            params: Parameters as for messages.create
+
+        Returns:
+            The response message
+
+        Raises:
+            RuntimeError: If the request did not succeed within the batch
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((uuid.uuid4().hex, params, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_timer is None:
+            self._flush_timer = loop.call_later(self.max_queue_time, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """Send everything queued so far as one batch"""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        items, self._pending = self._pending, []
+        if items:
+            task = asyncio.ensure_future(self._process_batch(items))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def aclose(self) -> None:
+        """Cancel queued and in-flight batches; their callers get CancelledError"""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        items, self._pending = self._pending, []
+        for _, _, future in items:
+            future.cancel()
+
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _process_batch(self, items: List[Tuple[str, Dict[str, Any], asyncio.Future]]) -> None:
+        """Submit a batch, wait for it to end and resolve each caller's future"""
+        futures = {custom_id: future for custom_id, _, future in items}
+        try:
+            batch = await self.client.messages.batches.create(requests=[
+                {"custom_id": custom_id, "params": params}
+                for custom_id, params, _ in items
+            ])
+            logger.info("🤖 Submitted Claude analysis batch %s (%d calls)", batch.id, len(items))
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + settings.CLAUDE_BATCH_TIMEOUT
+            delay = MESSAGE_BATCH_POLL_INITIAL
+            while batch.processing_status != "ended":
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    try:
+                        await self.client.messages.batches.cancel(batch.id)
+                    except anthropic.APIError as e:
+                        logger.warning("Failed to cancel Claude analysis batch %s: %s", batch.id, e)
+                    # Fails every caller's future below
+                    raise TimeoutError(
+                        f"Claude analysis batch {batch.id} still {batch.processing_status} "
+                        f"after {settings.CLAUDE_BATCH_TIMEOUT}s"
+                    )
+                await asyncio.sleep(min(delay, remaining))
+                delay = min(delay * 2, MESSAGE_BATCH_POLL_MAX)
+                batch = await self.client.messages.batches.retrieve(batch.id)
+
+            async for entry in await self.client.messages.batches.results(batch.id):
+                future = futures.pop(entry.custom_id, None)
+                if future is None or future.done():
+                    continue
+                if entry.result.type == "succeeded":
+                    future.set_result(entry.result.message)
+                else:
+                    future.set_exception(
+                        RuntimeError(f"batched request {entry.result.type}")
+                    )
+        except asyncio.CancelledError:
+            # Closed mid-poll; don't leave callers waiting
+            for future in futures.values():
+                future.cancel()
+            raise
+        except Exception as e:
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future in futures.values():
+            if not future.done():
+                future.set_exception(RuntimeError("no batch result"))
 
 
 class ClaudeIntegrationService:
     """Service for generating comprehensive analysis using Claude"""
 
-    def __init__(self):
-        self.client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
+    __slots__ = (
+        "aclient",
+        "cache_stats",
+        "_system_blocks",
+        "_instructions_block",
+        "_last_call_t",
+        "_keepalive",
+        "_batcher",
+    )
+
+    def __init__(
+        self,
+        client: Optional[anthropic.AsyncAnthropic] = None,
+        extra_headers: Optional[Dict[str, str]] = None,
+    ):
+        self.aclient = client or get_async_client()
+        if extra_headers:
+            # Copy of the client that sends these headers on every request (same connection pool)
+            self.aclient = self.aclient.with_options(default_headers=extra_headers)
+
+        # The system prompt never changes, so its block list is built once
+        # and shared (never mutated) by every request
+        system_block = {"type": "text", "text": self._create_system_prompt()}
+        if settings.ENABLE_PROMPT_CACHING:
+            system_block["cache_control"] = PROMPT_CACHE_CONTROL
+        self._system_blocks = [system_block]
+
+        self._instructions_block = {"type": "text", "text": USER_MESSAGE_INSTRUCTIONS}
+        if settings.ENABLE_PROMPT_CACHING:
+            self._instructions_block["cache_control"] = PROMPT_CACHE_CONTROL
+
+        # Token counts of the most recent response (per-call counts are in analysis["cache_stats"])
         self.cache_stats = {
             "cache_creation_tokens": 0,
             "cache_read_tokens": 0,
@@ -19,6 +437,58 @@ class ClaudeIntegrationService:
             "total_output_tokens": 0
         }
 
+        # Monotonic time of the last request that touched the cached prefix
+        self._last_call_t = 0.0
+        self._keepalive = None
+        self._batcher = ClaudeBatcher(self.aclient) if settings.ENABLE_CLAUDE_BATCHING else None
+        if settings.ENABLE_PROMPT_CACHING and settings.CLAUDE_CACHE_KEEPALIVE:
+            self.start_cache_keepalive()
+
+    def start_cache_keepalive(self) -> None:
+        """Start the cache keepalive task on the shared service loop (idempotent)"""
+        if self._keepalive is None or self._keepalive.done():
+            self._keepalive = asyncio.run_coroutine_threadsafe(
+                self._cache_keepalive(), get_service_loop()
+            )
+
+    def close(self) -> None:
+        """Stop background work: the cache keepalive and any pending Claude batches"""
+        self.stop_cache_keepalive()
+        if self._batcher is not None:
+            run_sync(self._batcher.aclose())
+
+    def stop_cache_keepalive(self) -> None:
+        """Cancel the cache keepalive task"""
+        if self._keepalive is not None:
+            self._keepalive.cancel()
+            self._keepalive = None
+
+    async def _cache_keepalive(self) -> None:
+        """
+        Keep the cached prompt prefix from expiring during quiet periods
+
+        Cache entries expire a few minutes after their last use. Whenever no
+        request has run for a full interval, a 1-token request with the same
+        tools and system blocks reads the prefix and renews it.
+        """
+        interval = settings.CLAUDE_CACHE_KEEPALIVE_INTERVAL
+        while True:
+            await asyncio.sleep(interval)
+            if time.monotonic() - self._last_call_t < interval:
+                continue
+            try:
+                self._last_call_t = time.monotonic()
+                await self.aclient.messages.create(
+                    model=settings.CLAUDE_MODEL,
+                    max_tokens=1,
+                    system=self._system_blocks,
+                    tools=[ANALYSIS_TOOL],
+                    tool_choice={"type": "tool", "name": ANALYSIS_TOOL["name"]},
+                    messages=[{"role": "user", "content": "ping"}],
+                )
+            except anthropic.APIError as e:
+                logger.warning("Claude cache keepalive failed: %s", e)
+
     def generate_comprehensive_analysis(
         self,
         company_name: str,
@@ -32,6 +502,44 @@ class ClaudeIntegrationService:
         """
         Generate comprehensive AI analysis combining all modalities
 
+        Synchronous wrapper around generate_comprehensive_analysis_async for
+        worker threads; the request runs on the shared service loop.
+
+        Args:
+            company_name: Company name
+            company_context: Company context/description
+            transcript: Transcription results
+            audio_features: Audio feature extraction results
+            sentiment_analysis: Sentiment analysis results
+            chart_analysis: Chart analysis results
+            fusion_results: Multi-modal fusion results
+
+        Returns:
+            Dictionary with Claude's comprehensive analysis
+        """
+        return run_sync(self.generate_comprehensive_analysis_async(
+            company_name,
+            company_context,
+            transcript,
+            audio_features,
+            sentiment_analysis,
+            chart_analysis,
+            fusion_results,
+        ))
+
+    async def generate_comprehensive_analysis_async(
+        self,
+        company_name: str,
+        company_context: str,
+        transcript: Dict[str, Any],
+        audio_features: Dict[str, Any],
+        sentiment_analysis: Dict[str, Any],
+        chart_analysis: Dict[str, Any],
+        fusion_results: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """
+        Generate comprehensive AI analysis combining all modalities
+
         Args:
             company_name: Company name
             company_context: Company context/description
@@ -45,11 +553,9 @@ class ClaudeIntegrationService:
             Dictionary with Claude's comprehensive analysis
         """
         try:
-            print(f"🤖 Generating Claude AI analysis with {settings.CLAUDE_MODEL}...")
+            logger.info("🤖 Generating Claude AI analysis with %s...", settings.CLAUDE_MODEL)
 
-            # Create system prompt (cached) and user message (dynamic)
-            system_prompt = self._create_system_prompt()
-            user_message = self._create_user_message(
+            params = self._request_params(
                 company_name,
                 company_context,
                 transcript,
@@ -59,57 +565,218 @@ class ClaudeIntegrationService:
                 fusion_results,
             )
 
-            # Prepare system blocks with caching
-            system_blocks = [
-                {
-                    "type": "text",
-                    "text": system_prompt,
-                }
-            ]
+            use_memory = settings.ENABLE_CACHE
+            use_disk = settings.CLAUDE_CACHE_ENABLED
+            key = _response_cache_key(params) if use_memory or use_disk else None
+            cached = _response_cache.get(key) if use_memory else None
+            if cached is not None:
+                _response_cache.move_to_end(key)
+                logger.info("✅ Claude analysis reused from cache (identical inputs)")
+                return dict(cached)
+
+            # Survives restarts, so retried and re-scored jobs skip the call too
+            cached = await asyncio.to_thread(_read_disk_cache, key) if use_disk else None
+            if cached is not None:
+                if use_memory:
+                    _remember_response(key, cached)
+                logger.info("✅ Claude analysis reused from disk cache (identical inputs)")
+                return cached
+
+            self._last_call_t = time.monotonic()
+            response = None
+            if self._batcher is not None:
+                try:
+                    response = await self._batcher.submit(params)
+                except TimeoutError as e:
+                    logger.warning("Claude analysis batch timed out (%s), calling directly", e)
+            if response is None:
+                async with self.aclient.messages.stream(**params) as stream:
+                    response = await stream.get_final_message()
+
+            # Track cache statistics for this call
+            cache_stats = self._record_usage(response.usage)
+
+            analysis = self._analysis_from_message(response)
+            analysis["cache_stats"] = cache_stats
+
+            if use_memory:
+                _remember_response(key, analysis)
+            if use_disk:
+                await asyncio.to_thread(_write_disk_cache, key, analysis)
+
+            logger.info("✅ Claude analysis complete")
+            if settings.ENABLE_PROMPT_CACHING and logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "📊 Cache stats: %d tokens read from cache, %d tokens cached (%s)",
+                    cache_stats["cache_read_tokens"],
+                    cache_stats["cache_creation_tokens"],
+                    self._cache_write_breakdown(response.usage),
+                    extra={
+                        "cache_read": cache_stats["cache_read_tokens"],
+                        "cache_write": cache_stats["cache_creation_tokens"],
+                    },
+                )
 
-            # Add cache_control only if prompt caching is enabled
-            if settings.ENABLE_PROMPT_CACHING:
-                system_blocks[0]["cache_control"] = {"type": "ephemeral"}
-
-            # Call Claude API with Sonnet 4.5
-            response = self.client.messages.create(
-                model=settings.CLAUDE_MODEL,
-                max_tokens=settings.CLAUDE_MAX_TOKENS,
-                temperature=settings.CLAUDE_TEMPERATURE,
-                system=system_blocks,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": user_message,
-                    }
-                ],
-            )
+            return analysis
+
+        except Exception as e:
+            logger.error("❌ Claude analysis error: %s", e)
+            raise Exception(f"Failed to generate Claude analysis: {str(e)}")
+
+    async def stream_comprehensive_analysis(
+        self,
+        company_name: str,
+        company_context: str,
+        transcript: Dict[str, Any],
+        audio_features: Dict[str, Any],
+        sentiment_analysis: Dict[str, Any],
+        chart_analysis: Dict[str, Any],
+        fusion_results: Dict[str, Any],
+    ) -> AsyncIterator[str]:
+        """
+        Stream Claude's analysis as it is generated
+
+        Yields the raw output (e.g. for forwarding over SSE): the analysis
+        tool's JSON input as it arrives, plus any plain text. Cache
+        statistics are updated once the stream completes.
+
+        Args:
+            company_name: Company name
+            company_context: Company context/description
+            transcript: Transcription results
+            audio_features: Audio feature extraction results
+            sentiment_analysis: Sentiment analysis results
+            chart_analysis: Chart analysis results
+            fusion_results: Multi-modal fusion results
+
+        Yields:
+            JSON/text deltas of the response
+        """
+        self._last_call_t = time.monotonic()
+        async with self.aclient.messages.stream(**self._request_params(
+            company_name,
+            company_context,
+            transcript,
+            audio_features,
+            sentiment_analysis,
+            chart_analysis,
+            fusion_results,
+        )) as stream:
+            async for event in stream:
+                if event.type == "input_json":
+                    yield event.partial_json
+                elif event.type == "text":
+                    yield event.text
 
             # Track cache statistics
-            self._update_cache_stats(response.usage)
+            response = await stream.get_final_message()
+            self._record_usage(response.usage)
 
-            # Extract analysis from response
-            analysis_text = ""
-            for block in response.content:
-                if block.type == "text":
-                    analysis_text += block.text
+    def submit_batch(self, cases: List[AnalysisCase]) -> str:
+        """Synchronous wrapper around submit_batch_async"""
+        return run_sync(self.submit_batch_async(cases))
 
-            # Parse structured response
-            analysis = self._parse_analysis_response(analysis_text)
+    def poll_batch(self, batch_id: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Synchronous wrapper around poll_batch_async"""
+        return run_sync(self.poll_batch_async(batch_id))
 
-            # Add cache statistics to analysis
-            analysis["cache_stats"] = self.cache_stats.copy()
+    async def submit_batch_async(self, cases: List[AnalysisCase]) -> str:
+        """
+        Submit several analyses through the Message Batches API
 
-            print("✅ Claude analysis complete")
-            if settings.ENABLE_PROMPT_CACHING:
-                print(f"   📊 Cache stats: {self.cache_stats['cache_read_tokens']} tokens read from cache, "
-                      f"{self.cache_stats['cache_creation_tokens']} tokens cached")
+        Batched requests are billed at half price and processed
+        asynchronously, which suits bulk work such as re-scoring many calls.
+        Every request shares the same cached system prompt.
 
-            return analysis
+        Args:
+            cases: Analysis inputs, one per earnings call
 
-        except Exception as e:
-            print(f"❌ Claude analysis error: {e}")
-            raise Exception(f"Failed to generate Claude analysis: {str(e)}")
+        Returns:
+            Message batch ID to pass to poll_batch_async
+        """
+        batch = await self.aclient.messages.batches.create(requests=[
+            {
+                "custom_id": case.id,
+                "params": self._request_params(
+                    case.company_name,
+                    case.company_context,
+                    case.transcript,
+                    case.audio_features,
+                    case.sentiment_analysis,
+                    case.chart_analysis,
+                    case.fusion_results,
+                ),
+            }
+            for case in cases
+        ])
+        logger.info("🤖 Submitted Claude analysis batch %s (%d calls)", batch.id, len(cases))
+        return batch.id
+
+    async def poll_batch_async(self, batch_id: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Fetch the results of a message batch if it has finished
+
+        Args:
+            batch_id: ID returned by submit_batch_async
+
+        Returns:
+            None while the batch is still processing, otherwise a dict mapping
+            each case ID to its parsed analysis (or {"error": ...} when that
+            request did not succeed)
+        """
+        batch = await self.aclient.messages.batches.retrieve(batch_id)
+        if batch.processing_status != "ended":
+            return None
+
+        results: Dict[str, Dict[str, Any]] = {}
+        async for entry in await self.aclient.messages.batches.results(batch_id):
+            if entry.result.type != "succeeded":
+                results[entry.custom_id] = {"error": entry.result.type}
+                continue
+
+            message = entry.result.message
+            analysis = self._analysis_from_message(message)
+            analysis["cache_stats"] = self._record_usage(message.usage)
+            results[entry.custom_id] = analysis
+
+        return results
+
+    def _request_params(
+        self,
+        company_name: str,
+        company_context: str,
+        transcript: Dict[str, Any],
+        audio_features: Dict[str, Any],
+        sentiment_analysis: Dict[str, Any],
+        chart_analysis: Dict[str, Any],
+        fusion_results: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Build the Messages API parameters for one analysis"""
+        # User message (cached lead-in + dynamic data); the system blocks are prebuilt
+        user_message = self._create_user_message(
+            company_name,
+            company_context,
+            transcript,
+            audio_features,
+            sentiment_analysis,
+            chart_analysis,
+            fusion_results,
+        )
+
+        return {
+            "model": settings.CLAUDE_MODEL,
+            "max_tokens": settings.CLAUDE_MAX_TOKENS,
+            "temperature": settings.CLAUDE_TEMPERATURE,
+            "system": self._system_blocks,
+            "tools": [ANALYSIS_TOOL],
+            "tool_choice": {"type": "tool", "name": ANALYSIS_TOOL["name"]},
+            "messages": [
+                {
+                    "role": "user",
+                    "content": user_message,
+                }
+            ],
+        }
 
     def _create_system_prompt(self) -> str:
         """
@@ -250,7 +917,7 @@ Cross-validation across all data sources:
 
 ## OUTPUT FORMAT
 
-You MUST provide your analysis in the following structured format:
+You MUST provide your analysis by calling the emit_analysis tool, with one field per section of the following structure:
 
 ### EXECUTIVE SUMMARY
 Provide 2-3 comprehensive paragraphs summarizing:
@@ -372,64 +1039,95 @@ Now, analyze the data provided in the user message using this comprehensive fram
         sentiment_analysis: Dict[str, Any],
         chart_analysis: Dict[str, Any],
         fusion_results: Dict[str, Any],
-    ) -> str:
-        """
-        Create the user message with dynamic data (this changes per request)
-        Contains the specific company data and analysis results
+    ) -> List[Dict[str, Any]]:
         """
-        return f"""## EARNINGS CALL ANALYSIS DATA FOR: {company_name or 'Company'}
-
-### Company Context
-{company_context or 'Not provided'}
-
-### Audio Analysis (Vocal Biomarkers)
-- Overall Confidence Score: {audio_features.get('overall_confidence', 0.0):.2f}/1.0
-- Stress Indicators: {len(audio_features.get('stress_indicators', []))} detected
-- Speech Rate: {audio_features.get('prosodic', {}).get('speech_rate', 0):.2f} segments/second
-- Pitch Variation: {audio_features.get('pitch', {}).get('variation', 0):.3f}
-- Voice Quality Issues: {', '.join([ind['type'] for ind in audio_features.get('stress_indicators', [])])}
-
-### Text Sentiment Analysis
-- Overall Sentiment: {sentiment_analysis.get('overall_sentiment', 'neutral')}
-- Sentiment Distribution: {json.dumps(sentiment_analysis.get('sentiment_distribution', {}), indent=2)}
-- Key Topics: {', '.join(sentiment_analysis.get('key_topics', []))}
-- Financial Metrics Mentioned: {len(sentiment_analysis.get('financial_metrics', []))} metrics
-
-### Transcript Excerpt
-{transcript.get('full_text', '')[:1500]}...
-
-### Chart Analysis
-- Charts Analyzed: {len(chart_analysis.get('chart_descriptions', []))}
-- Key Data Points: {len(chart_analysis.get('extracted_data', []))}
-- Inconsistencies Detected: {len(chart_analysis.get('inconsistencies', []))}
-
-{self._format_chart_insights(chart_analysis)}
-
-### Multi-Modal Fusion Results
-- Unified Credibility Score: {fusion_results.get('credibility_score', 0.5):.2f}/1.0
-- Risk Level: {fusion_results.get('risk_level', 'unknown')}
-- Key Discrepancies: {', '.join([d['description'] for d in fusion_results.get('discrepancies', [])])}
+        Create the user message content blocks
 
----
-
-Please provide your comprehensive analysis following the structured format specified in the system prompt. Focus on what makes this analysis unique: the combination of vocal stress detection, sentiment analysis, and chart verification."""
-
-    def _format_chart_insights(self, chart_analysis: Dict[str, Any]) -> str:
+        The first block is the fixed instructions (cached when prompt caching
+        is enabled); the second holds the specific company data and analysis
+        results, which change per request.
+        """
+        # Fetch every field once; missing sections fall back to shared empty sentinels
+        stress_indicators = audio_features.get('stress_indicators') or _EMPTY_LIST
+        prosodic = audio_features.get('prosodic') or _EMPTY_DICT
+        pitch = audio_features.get('pitch') or _EMPTY_DICT
+        chart_descriptions = chart_analysis.get('chart_descriptions') or _EMPTY_LIST
+        chart_inconsistencies = chart_analysis.get('inconsistencies') or _EMPTY_LIST
+
+        data = USER_DATA_TEMPLATE.format_map({
+            "company_name": company_name or 'Company',
+            "company_context": company_context or 'Not provided',
+            "overall_confidence": audio_features.get('overall_confidence', 0.0),
+            "stress_count": len(stress_indicators),
+            "speech_rate": prosodic.get('speech_rate', 0),
+            "pitch_variation": pitch.get('variation', 0),
+            "stress_types": ", ".join([ind['type'] for ind in stress_indicators]),
+            "overall_sentiment": sentiment_analysis.get('overall_sentiment', 'neutral'),
+            "sentiment_distribution": _pretty_json(
+                sentiment_analysis.get('sentiment_distribution') or {}
+            ),
+            "key_topics": ", ".join(sentiment_analysis.get('key_topics') or _EMPTY_LIST),
+            "metric_count": len(sentiment_analysis.get('financial_metrics') or _EMPTY_LIST),
+            "transcript_excerpt": transcript.get('full_text', '')[:TRANSCRIPT_EXCERPT_CHARS],
+            "chart_count": len(chart_descriptions),
+            "data_point_count": len(chart_analysis.get('extracted_data') or _EMPTY_LIST),
+            "inconsistency_count": len(chart_inconsistencies),
+            "chart_insights": self._format_chart_insights(chart_descriptions, chart_inconsistencies),
+            "credibility_score": fusion_results.get('credibility_score', 0.5),
+            "risk_level": fusion_results.get('risk_level', 'unknown'),
+            "discrepancies": ", ".join(
+                [d['description'] for d in fusion_results.get('discrepancies') or _EMPTY_LIST]
+            ),
+        })
+
+        return [self._instructions_block, {"type": "text", "text": data}]
+
+    def _format_chart_insights(
+        self,
+        chart_descriptions: List[str],
+        inconsistencies: List[Dict[str, Any]],
+    ) -> str:
         """Format chart insights for prompt"""
-        if not chart_analysis.get('chart_descriptions'):
+        if not chart_descriptions:
             return "No charts provided."
 
-        output = "#### Chart Insights:\n"
+        parts = ["#### Chart Insights:\n"]
+        parts.extend(f"\n**Chart {i}**: {desc}\n" for i, desc in enumerate(chart_descriptions, 1))
+
+        if inconsistencies:
+            parts.append("\n**Inconsistencies Found**:\n")
+            parts.extend(f"- {incon.get('description', 'Unknown')}\n" for incon in inconsistencies)
 
-        for i, desc in enumerate(chart_analysis.get('chart_descriptions', []), 1):
-            output += f"\n**Chart {i}**: {desc}\n"
+        return "".join(parts)
 
-        if chart_analysis.get('inconsistencies'):
-            output += "\n**Inconsistencies Found**:\n"
-            for incon in chart_analysis['inconsistencies']:
-                output += f"- {incon.get('description', 'Unknown')}\n"
+    def _analysis_from_message(self, message: Any) -> Dict[str, Any]:
+        """
+        Extract the structured analysis from a response message
 
-        return output
+        The forced emit_analysis call arrives as an already-parsed dict; a
+        plain Markdown answer is parsed section by section as a fallback.
+        """
+        for block in message.content:
+            if block.type == "tool_use" and block.name == ANALYSIS_TOOL["name"]:
+                return self._normalize_analysis(block.input)
+
+        return self._parse_analysis_response(
+            "".join(block.text for block in message.content if block.type == "text")
+        )
+
+    def _normalize_analysis(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Coerce the tool input into the parsed-analysis shape"""
+        result = {}
+        for key in _ANALYSIS_TEXT_FIELDS:
+            value = data.get(key)
+            result[key] = value.strip() if isinstance(value, str) else ""
+        for key in _ANALYSIS_LIST_FIELDS:
+            items = data.get(key)
+            if not isinstance(items, list):
+                items = []
+            stripped = (str(item).strip() for item in items)
+            result[key] = [item for item in stripped if item and not _NONE_ITEM_RE.fullmatch(item)]
+        return result
 
     def _parse_analysis_response(self, response_text: str) -> Dict[str, Any]:
         """
@@ -450,30 +1148,22 @@ Please provide your comprehensive analysis following the structured format speci
             "overall_recommendation": "",
         }
 
-        # Parse sections
-        sections = {
-            "EXECUTIVE SUMMARY": "executive_summary",
-            "RISK INDICATORS": "risk_indicators",
-            "OPPORTUNITIES": "opportunities",
-            "RED FLAGS": "red_flags",
-            "CONFIDENCE ASSESSMENT": "confidence_assessment",
-            "OVERALL RECOMMENDATION": "overall_recommendation",
-        }
-
         current_section = None
         current_content = []
 
-        lines = response_text.split("\n")
-
-        for line in lines:
-            line_stripped = line.strip()
+        # Walk the lines by index rather than materializing split("\n")
+        pos = 0
+        end = len(response_text)
+        while pos <= end:
+            newline = response_text.find("\n", pos)
+            if newline < 0:
+                newline = end
+            line_stripped = response_text[pos:newline].strip()
+            pos = newline + 1
 
             # Check for section headers
-            matched_section = None
-            for header, section_key in sections.items():
-                if header in line_stripped.upper() and line_stripped.startswith("#"):
-                    matched_section = section_key
-                    break
+            header = _ANALYSIS_SECTION_RE.match(line_stripped)
+            matched_section = _ANALYSIS_SECTIONS[header.group(1).upper()] if header else None
 
             if matched_section:
                 # Save previous section
@@ -505,26 +1195,51 @@ Please provide your comprehensive analysis following the structured format speci
             # Text sections
             result[section] = "\n".join(content)
         else:
-            # List sections (risks, opportunities, red flags)
-            items = []
-            for line in content:
-                if line.startswith("-") or line.startswith("•") or line.startswith("*"):
-                    # Extract list item
-                    item = line.lstrip("-•*").strip()
-                    if item and item.lower() not in ["none", "none identified"]:
-                        items.append(item)
-
-            result[section] = items
-
-    def _update_cache_stats(self, usage) -> None:
+            # List sections (risks, opportunities, red flags); lines are already stripped
+            result[section] = [
+                item
+                for line in content
+                if (bullet := _BULLET_RE.match(line))
+                and (item := bullet.group(1))
+                and not _NONE_ITEM_RE.fullmatch(item)
+            ]
+
+    def _record_usage(self, usage) -> Dict[str, int]:
         """
-        Update cache statistics from API response
+        Count a response's token usage in the process-wide metrics
+
+        Also replaces self.cache_stats with this call's counts.
 
         Args:
             usage: Usage object from Claude API response
+
+        Returns:
+            This call's cache and token counts
         """
-        # Update cache metrics
-        self.cache_stats["cache_creation_tokens"] = getattr(usage, 'cache_creation_input_tokens', 0)
-        self.cache_stats["cache_read_tokens"] = getattr(usage, 'cache_read_input_tokens', 0)
-        self.cache_stats["total_input_tokens"] = getattr(usage, 'input_tokens', 0)
-        self.cache_stats["total_output_tokens"] = getattr(usage, 'output_tokens', 0)
+        stats = self._usage_stats(usage)
+        if Counter is not None:
+            CACHE_WRITE_TOKENS.inc(stats["cache_creation_tokens"])
+            CACHE_READ_TOKENS.inc(stats["cache_read_tokens"])
+            INPUT_TOKENS.inc(stats["total_input_tokens"])
+            OUTPUT_TOKENS.inc(stats["total_output_tokens"])
+        self.cache_stats.update(stats)
+        return stats
+
+    @staticmethod
+    def _cache_write_breakdown(usage) -> str:
+        """Cache-write tokens per TTL class, to confirm which TTL was applied"""
+        creation = getattr(usage, 'cache_creation', None)
+        return (
+            f"1h: {getattr(creation, 'ephemeral_1h_input_tokens', 0) or 0}, "
+            f"5m: {getattr(creation, 'ephemeral_5m_input_tokens', 0) or 0}"
+        )
+
+    @staticmethod
+    def _usage_stats(usage) -> Dict[str, int]:
+        """Cache and token counts from a response's usage object"""
+        return {
+            "cache_creation_tokens": getattr(usage, 'cache_creation_input_tokens', 0) or 0,
+            "cache_read_tokens": getattr(usage, 'cache_read_input_tokens', 0) or 0,
+            "total_input_tokens": getattr(usage, 'input_tokens', 0) or 0,
+            "total_output_tokens": getattr(usage, 'output_tokens', 0) or 0,
+        }
@@ -2,8 +2,22 @@
 Multi-Modal Fusion Service
 Combines audio, text, and chart analysis for unified insights
 """
+import logging
 import numpy as np
-from typing import Dict, Any, List
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Modality order of every fusion vector below
+MODALITIES = ("audio", "text", "chart")
+# Attention starts even; a modality with rich information gets its boost
+_BASE_ATTENTION = np.full(len(MODALITIES), 0.33)
+_ATTENTION_BOOSTS = np.array([0.1, 0.1, 0.15])
+# Risk classes by how many of the thresholds (3, 6) the risk score reaches
+RISK_LEVELS = ("low", "medium", "high")
+# Distinct input combinations remembered by the rule-based steps
+FUSION_RULE_CACHE_SIZE = 64
 
 
 class MultiModalFusionService:
@@ -16,6 +30,7 @@ class MultiModalFusionService:
             "text": 0.40,
             "chart": 0.25,
         }
+        self._weight_vector = np.array([self.weights[m] for m in MODALITIES])
 
     def fuse_modalities(
         self,
@@ -34,18 +49,55 @@ class MultiModalFusionService:
         Returns:
             Dictionary with fusion results
         """
+        # Nothing to fuse (e.g. every upstream step came back empty)
+        if (
+            not audio_features
+            and not sentiment_analysis.get("segments")
+            and not chart_analysis.get("chart_descriptions")
+        ):
+            logger.info("🔗 No modality data to fuse; returning insufficient-data result")
+            return {
+                "credibility_score": 0.0,
+                "risk_level": "unknown",
+                "discrepancies": [],
+                "fusion_insights": ["Insufficient data for multi-modal fusion"],
+                # Same computation as the full path, so the weights agree for the same input
+                "attention_weights": self._calculate_attention_weights(
+                    audio_features or {}, sentiment_analysis, chart_analysis
+                ),
+            }
+
         try:
-            print("🔗 Fusing multi-modal data...")
+            logger.info("🔗 Fusing multi-modal data...")
 
             # Calculate credibility score
             credibility_score = self._calculate_credibility_score(
                 audio_features, sentiment_analysis, chart_analysis
             )
 
-            # Detect cross-modal discrepancies
-            discrepancies = self._detect_discrepancies(
-                audio_features, sentiment_analysis, chart_analysis
+            # Inputs of the rule-based steps, extracted once as hashable values
+            audio_conf = audio_features.get("overall_confidence", 0.5)
+            overall_sentiment = sentiment_analysis.get("overall_sentiment", "neutral")
+            positive_share = sentiment_analysis.get("sentiment_distribution", {}).get("positive", 0)
+            stress_indicators = audio_features.get("stress_indicators", [])
+            stress_count = len(stress_indicators)
+            stress_types = tuple(s["type"] for s in stress_indicators[:3]) if stress_count > 2 else ()
+            inconsistencies = tuple(
+                (
+                    incon.get("severity", "medium"),
+                    incon.get("description", "Chart data doesn't match verbal statements"),
+                )
+                for incon in chart_analysis.get("inconsistencies", [])
             )
+            chart_count = len(chart_analysis.get("chart_descriptions") or ())
+
+            # Detect cross-modal discrepancies (copied: the cached dicts are shared)
+            discrepancies = [
+                {**d, "modalities": list(d["modalities"])}
+                for d in self._detect_discrepancies(
+                    audio_conf, overall_sentiment, stress_count, inconsistencies
+                )
+            ]
 
             # Calculate risk level
             risk_level = self._calculate_risk_level(
@@ -53,9 +105,14 @@ class MultiModalFusionService:
             )
 
             # Generate fusion insights
-            fusion_insights = self._generate_fusion_insights(
-                audio_features, sentiment_analysis, chart_analysis, discrepancies
-            )
+            fusion_insights = list(self._generate_fusion_insights(
+                audio_conf,
+                overall_sentiment,
+                positive_share,
+                len(discrepancies),
+                chart_count,
+                stress_types,
+            ))
 
             # Create attention weights showing which modalities were most important
             attention_weights = self._calculate_attention_weights(
@@ -70,11 +127,11 @@ class MultiModalFusionService:
                 "attention_weights": attention_weights,
             }
 
-            print(f"✅ Fusion complete. Credibility: {credibility_score:.2f}, Risk: {risk_level}")
+            logger.info("✅ Fusion complete. Credibility: %.2f, Risk: %s", credibility_score, risk_level)
             return result
 
         except Exception as e:
-            print(f"❌ Fusion error: {e}")
+            logger.error("❌ Fusion error: %s", e)
             raise Exception(f"Failed to fuse modalities: {str(e)}")
 
     def _calculate_credibility_score(
@@ -94,50 +151,60 @@ class MultiModalFusionService:
         Returns:
             Credibility score (0-1)
         """
+        confidences = self._modality_confidences(audio_features, sentiment_analysis, chart_analysis)
+
+        # Weighted fusion
+        credibility = float(self._weight_vector @ confidences)
+
+        return round(credibility, 3)
+
+    def _modality_confidences(
+        self,
+        audio_features: Dict[str, Any],
+        sentiment_analysis: Dict[str, Any],
+        chart_analysis: Dict[str, Any],
+    ) -> np.ndarray:
+        """Per-modality credibility in MODALITIES order, each clipped to 0-1 where derived"""
         # Audio credibility (from confidence score)
         audio_conf = audio_features.get("overall_confidence", 0.5)
 
         # Text credibility (from sentiment)
         sentiment_dist = sentiment_analysis.get("sentiment_distribution", {})
         text_conf = sentiment_dist.get("positive", 0.33) - sentiment_dist.get("negative", 0.33) + 0.5
-        text_conf = max(0.0, min(1.0, text_conf))
 
         # Chart credibility (inverse of inconsistencies)
         num_inconsistencies = len(chart_analysis.get("inconsistencies", []))
-        chart_conf = max(0.0, 1.0 - (num_inconsistencies * 0.15))
+        chart_conf = 1.0 - (num_inconsistencies * 0.15)
 
-        # Weighted fusion
-        credibility = (
-            audio_conf * self.weights["audio"] +
-            text_conf * self.weights["text"] +
-            chart_conf * self.weights["chart"]
-        )
-
-        return round(credibility, 3)
+        return np.array([
+            audio_conf,
+            min(max(text_conf, 0.0), 1.0),
+            max(chart_conf, 0.0),
+        ])
 
+    @staticmethod
+    @lru_cache(maxsize=FUSION_RULE_CACHE_SIZE)
     def _detect_discrepancies(
-        self,
-        audio_features: Dict[str, Any],
-        sentiment_analysis: Dict[str, Any],
-        chart_analysis: Dict[str, Any],
-    ) -> List[Dict[str, Any]]:
+        audio_conf: float,
+        overall_sentiment: str,
+        stress_count: int,
+        inconsistencies: Tuple[Tuple[str, str], ...],
+    ) -> Tuple[Dict[str, Any], ...]:
         """
         Detect discrepancies across modalities
 
         Args:
-            audio_features: Audio analysis
-            sentiment_analysis: Text analysis
-            chart_analysis: Chart analysis
+            audio_conf: Overall vocal confidence
+            overall_sentiment: Overall text sentiment
+            stress_count: Number of vocal stress indicators
+            inconsistencies: (severity, description) of each chart inconsistency
 
         Returns:
-            List of detected discrepancies
+            Detected discrepancies (cached; callers must copy before mutating)
         """
         discrepancies = []
 
         # Audio-Text discrepancy: Low confidence but positive sentiment
-        audio_conf = audio_features.get("overall_confidence", 0.5)
-        overall_sentiment = sentiment_analysis.get("overall_sentiment", "neutral")
-
         if audio_conf < 0.5 and overall_sentiment == "positive":
             discrepancies.append({
                 "type": "audio_text_mismatch",
@@ -160,27 +227,25 @@ class MultiModalFusionService:
             })
 
         # Chart inconsistencies
-        chart_inconsistencies = chart_analysis.get("inconsistencies", [])
-        for incon in chart_inconsistencies:
+        for severity, description in inconsistencies:
             discrepancies.append({
                 "type": "chart_verbal_mismatch",
-                "severity": incon.get("severity", "medium"),
-                "description": incon.get("description", "Chart data doesn't match verbal statements"),
+                "severity": severity,
+                "description": description,
                 "modalities": ["chart", "text"],
             })
 
         # Stress indicators with positive sentiment
-        stress_indicators = audio_features.get("stress_indicators", [])
-        if len(stress_indicators) > 2 and overall_sentiment == "positive":
+        if stress_count > 2 and overall_sentiment == "positive":
             discrepancies.append({
                 "type": "stress_sentiment_mismatch",
                 "severity": "medium",
-                "description": f"Detected {len(stress_indicators)} vocal stress indicators despite positive language",
+                "description": f"Detected {stress_count} vocal stress indicators despite positive language",
                 "modalities": ["audio", "text"],
-                "stress_count": len(stress_indicators),
+                "stress_count": stress_count,
             })
 
-        return discrepancies
+        return tuple(discrepancies)
 
     def _calculate_risk_level(
         self,
@@ -201,89 +266,80 @@ class MultiModalFusionService:
         Returns:
             Risk level: "low", "medium", or "high"
         """
-        risk_score = 0
-
-        # Low credibility increases risk
-        if credibility_score < 0.4:
-            risk_score += 3
-        elif credibility_score < 0.6:
-            risk_score += 1
-
-        # Discrepancies increase risk
-        high_severity_discrepancies = [d for d in discrepancies if d.get("severity") == "high"]
-        risk_score += len(high_severity_discrepancies) * 2
-        risk_score += len(discrepancies)
-
-        # Negative sentiment increases risk
-        if sentiment_analysis.get("overall_sentiment") == "negative":
-            risk_score += 2
-
-        # Many stress indicators increase risk
+        # One pass tallies all and high-severity discrepancies
+        discrepancy_count = 0
+        high_severity = 0
+        for d in discrepancies:
+            discrepancy_count += 1
+            high_severity += d.get("severity") == "high"
         stress_count = len(audio_features.get("stress_indicators", []))
-        if stress_count > 3:
-            risk_score += 2
-        elif stress_count > 1:
-            risk_score += 1
+
+        # Booleans count as 0/1, so each rule adds its points without branching
+        risk_score = (
+            # Low credibility increases risk
+            3 * (credibility_score < 0.4) + (0.4 <= credibility_score < 0.6)
+            # Discrepancies increase risk
+            + 2 * high_severity + discrepancy_count
+            # Negative sentiment increases risk
+            + 2 * (sentiment_analysis.get("overall_sentiment") == "negative")
+            # Many stress indicators increase risk
+            + 2 * (stress_count > 3) + (1 < stress_count <= 3)
+        )
 
         # Classify risk
-        if risk_score >= 6:
-            return "high"
-        elif risk_score >= 3:
-            return "medium"
-        else:
-            return "low"
+        return RISK_LEVELS[(risk_score >= 3) + (risk_score >= 6)]
 
+    @staticmethod
+    @lru_cache(maxsize=FUSION_RULE_CACHE_SIZE)
     def _generate_fusion_insights(
-        self,
-        audio_features: Dict[str, Any],
-        sentiment_analysis: Dict[str, Any],
-        chart_analysis: Dict[str, Any],
-        discrepancies: List[Dict[str, Any]],
-    ) -> List[str]:
+        audio_conf: float,
+        sentiment: str,
+        positive_share: float,
+        discrepancy_count: int,
+        chart_count: int,
+        stress_types: Tuple[str, ...],
+    ) -> Tuple[str, ...]:
         """
         Generate human-readable fusion insights
 
         Args:
-            audio_features: Audio analysis
-            sentiment_analysis: Text analysis
-            chart_analysis: Chart analysis
-            discrepancies: Detected discrepancies
+            audio_conf: Overall vocal confidence
+            sentiment: Overall text sentiment
+            positive_share: Fraction of positive segments
+            discrepancy_count: Number of detected discrepancies
+            chart_count: Number of analyzed charts
+            stress_types: Types of the first three stress indicators (empty unless there are more than two)
 
         Returns:
-            List of insight strings
+            Insight strings
         """
         insights = []
 
         # Vocal confidence insights
-        audio_conf = audio_features.get("overall_confidence", 0.5)
         if audio_conf > 0.7:
             insights.append("Executive team demonstrated high vocal confidence throughout the call")
         elif audio_conf < 0.4:
             insights.append("Vocal analysis reveals hesitation and uncertainty in delivery")
 
         # Sentiment insights
-        sentiment = sentiment_analysis.get("overall_sentiment", "neutral")
-        sentiment_dist = sentiment_analysis.get("sentiment_distribution", {})
-
-        if sentiment == "positive" and sentiment_dist.get("positive", 0) > 0.6:
+        if sentiment == "positive" and positive_share > 0.6:
             insights.append("Overwhelmingly positive language used throughout the call")
         elif sentiment == "negative":
             insights.append("Negative sentiment detected - management acknowledging challenges")
 
         # Discrepancy insights
-        if len(discrepancies) > 0:
-            insights.append(f"Found {len(discrepancies)} cross-modal inconsistencies requiring attention")
+        if discrepancy_count > 0:
+            insights.append(f"Found {discrepancy_count} cross-modal inconsistencies requiring attention")
 
         # Chart insights
-        if chart_analysis.get("chart_descriptions"):
-            insights.append(f"Visual data analysis of {len(chart_analysis['chart_descriptions'])} charts completed")
+        if chart_count:
+            insights.append(f"Visual data analysis of {chart_count} charts completed")
 
         # Stress insights
-        stress_indicators = audio_features.get("stress_indicators", [])
-        if len(stress_indicators) > 2:
-            insights.append(f"Multiple vocal stress indicators detected: {', '.join([s['type'] for s in stress_indicators[:3]])}")
+        if stress_types:
+            insights.append(f"Multiple vocal stress indicators detected: {', '.join(stress_types)}")
 
-        return insights
+        return tuple(insights)
 
     def _calculate_attention_weights(
         self,
@@ -302,26 +358,15 @@ class MultiModalFusionService:
         Returns:
             Dictionary of attention weights
         """
-        # Simple attention mechanism based on information richness
-
-        weights = {
-            "audio": 0.33,
-            "text": 0.33,
-            "chart": 0.33,
-        }
-
-        # Increase weight if modality has rich information
-        if len(audio_features.get("stress_indicators", [])) > 2:
-            weights["audio"] += 0.1
-
-        if len(sentiment_analysis.get("key_topics", [])) > 3:
-            weights["text"] += 0.1
-
-        if len(chart_analysis.get("inconsistencies", [])) > 0:
-            weights["chart"] += 0.15
+        # Simple attention mechanism based on information richness:
+        # increase weight if modality has rich information
+        rich = np.array([
+            len(audio_features.get("stress_indicators", [])) > 2,
+            len(sentiment_analysis.get("key_topics", [])) > 3,
+            len(chart_analysis.get("inconsistencies", [])) > 0,
+        ])
+        raw = _BASE_ATTENTION + _ATTENTION_BOOSTS * rich
 
         # Normalize
-        total = sum(weights.values())
-        weights = {k: round(v / total, 3) for k, v in weights.items()}
-
-        return weights
+        normalized = (raw / raw.sum()).tolist()
+        return {m: round(w, 3) for m, w in zip(MODALITIES, normalized)}
@@ -0,0 +1,34 @@
+"""
+In-memory progress for running analysis jobs
+"""
+import threading
+from typing import Dict, Optional
+
+
+class JobProgressRegistry:
+    """
+    Latest progress of each running job, kept in process memory
+
+    Jobs report every step here but only write the database at durable
+    milestones, so status polling sees fine-grained progress without a
+    commit per step.
+    """
+
+    def __init__(self):
+        self._progress: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, job_id: str, progress: float) -> None:
+        with self._lock:
+            self._progress[job_id] = progress
+
+    def get(self, job_id: str) -> Optional[float]:
+        with self._lock:
+            return self._progress.get(job_id)
+
+    def clear(self, job_id: str) -> None:
+        with self._lock:
+            self._progress.pop(job_id, None)
+
+
+job_progress = JobProgressRegistry()
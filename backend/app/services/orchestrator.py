@@ -2,9 +2,10 @@
 Analysis Orchestrator - Coordinates all processing steps
 """
 from sqlalchemy.orm import Session
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional
-import traceback
+from typing import Any, Dict, List, Optional
+import logging
 
 from ..models import AnalysisJob
 from .audio_transcription import AudioTranscriptionService
@@ -13,13 +14,16 @@ from .sentiment_analysis import SentimentAnalysisService
 from .chart_analysis import ChartAnalysisService
 from .fusion import MultiModalFusionService
 from .claude_integration import ClaudeIntegrationService
+from .job_progress import job_progress
+
+logger = logging.getLogger(__name__)
 
 
 class AnalysisOrchestrator:
     """Orchestrates the complete analysis pipeline"""
 
     def __init__(self):
-        print("🎵 Initializing Symphony AI Orchestrator...")
+        logger.info("🎵 Initializing Symphony AI Orchestrator...")
 
         # Initialize all services
         self.transcription_service = AudioTranscriptionService()
@@ -29,7 +33,11 @@ class AnalysisOrchestrator:
         self.fusion_service = MultiModalFusionService()
         self.claude_service = ClaudeIntegrationService()
 
-        print("✅ All services initialized")
+        logger.info("✅ All services initialized")
+
+    def close(self):
+        """Stop the services' background work (app shutdown)"""
+        self.claude_service.close()
 
     def process_job(self, job_id: str):
         """
@@ -45,12 +53,10 @@ class AnalysisOrchestrator:
         try:
             job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
             if not job:
-                print(f"❌ Job {job_id} not found")
+                logger.error("❌ Job %s not found", job_id)
                 return
 
-            print(f"\n{'='*60}")
-            print(f"🎬 Starting analysis for job: {job_id}")
-            print(f"{'='*60}\n")
+            logger.info("🎬 Starting analysis for job: %s", job_id)
 
             # Update job status
             job.status = "processing"
@@ -59,7 +65,7 @@ class AnalysisOrchestrator:
             db.commit()
 
             # Step 1: Transcribe audio (20% progress)
-            print("\n[1/7] 🎤 Audio Transcription...")
+            logger.info("[%s] [1/7] 🎤 Audio Transcription...", job_id)
             transcript_result = self.transcription_service.transcribe_audio(job.audio_path)
 
             # Add speaker identification
@@ -68,53 +74,49 @@ class AnalysisOrchestrator:
             )
 
             job.transcript = transcript_result
-            job.progress = 20.0
-            db.commit()
-            print(f"✅ Transcription complete ({len(transcript_result['segments'])} segments)")
-
-            # Step 2: Extract audio features (35% progress)
-            print("\n[2/7] 🎵 Audio Feature Extraction...")
-            audio_features = self.audio_feature_extractor.extract_features(job.audio_path)
-            job.audio_features = audio_features
-            job.progress = 35.0
-            db.commit()
-            print(f"✅ Audio features extracted (Confidence: {audio_features.get('overall_confidence', 0):.2f})")
-
-            # Step 3: Sentiment analysis (50% progress)
-            print("\n[3/7] 📊 Financial Sentiment Analysis...")
-            sentiment_results = self.sentiment_service.analyze_transcript(
-                transcript_result["segments"]
-            )
-
-            # Also analyze prepared vs Q&A
-            discourse_analysis = self.sentiment_service.separate_prepared_vs_qa(
-                sentiment_results["segments"]
-            )
-            sentiment_results["discourse_analysis"] = discourse_analysis
-
-            job.sentiment_analysis = sentiment_results
-            job.progress = 50.0
-            db.commit()
-            print(f"✅ Sentiment analysis complete (Overall: {sentiment_results.get('overall_sentiment', 'neutral')})")
-
-            # Step 4: Chart analysis (65% progress)
-            print("\n[4/7] 📈 Chart Analysis...")
-            chart_results = {"chart_descriptions": [], "extracted_data": [], "inconsistencies": []}
-
-            if job.chart_paths:
-                chart_results = self.chart_service.analyze_charts(
+            self._set_progress(job, 20.0)
+            logger.info("[%s] ✅ Transcription complete (%d segments)", job_id, len(transcript_result["segments"]))
+
+            # Steps 2-4 only need the transcript, so run them side by side
+            # (librosa, FinBERT and the chart API calls all release the GIL)
+            logger.info("[%s] [2-4/7] 🎵 Audio Features, 📊 Sentiment and 📈 Chart Analysis in parallel...", job_id)
+            with ThreadPoolExecutor(max_workers=3, thread_name_prefix=f"job-{job_id[:8]}") as stages:
+                audio_future = stages.submit(
+                    self.audio_feature_extractor.extract_features, job.audio_path
+                )
+                sentiment_future = stages.submit(
+                    self._analyze_sentiment, transcript_result["segments"]
+                )
+                chart_future = stages.submit(
+                    self._analyze_charts,
                     job.chart_paths,
                     transcript_result.get("full_text", ""),
-                    job.company_context or ""
+                    job.company_context or "",
                 )
+                audio_features = audio_future.result()
+                sentiment_results = sentiment_future.result()
+                chart_results = chart_future.result()
 
+            job.audio_features = audio_features
+            job.sentiment_analysis = sentiment_results
             job.chart_analysis = chart_results
-            job.progress = 65.0
+            self._set_progress(job, 65.0)
             db.commit()
-            print(f"✅ Chart analysis complete ({len(chart_results.get('chart_descriptions', []))} charts)")
+            logger.info(
+                "[%s] ✅ Audio features extracted (Confidence: %.2f)",
+                job_id, audio_features.get("overall_confidence", 0),
+            )
+            logger.info(
+                "[%s] ✅ Sentiment analysis complete (Overall: %s)",
+                job_id, sentiment_results.get("overall_sentiment", "neutral"),
+            )
+            logger.info(
+                "[%s] ✅ Chart analysis complete (%d charts)",
+                job_id, len(chart_results.get("chart_descriptions", [])),
+            )
 
             # Step 5: Multi-modal fusion (75% progress)
-            print("\n[5/7] 🔗 Multi-Modal Fusion...")
+            logger.info("[%s] [5/7] 🔗 Multi-Modal Fusion...", job_id)
             fusion_results = self.fusion_service.fuse_modalities(
                 audio_features,
                 sentiment_results,
@@ -125,12 +127,14 @@ class AnalysisOrchestrator:
             job.overall_confidence = audio_features.get("overall_confidence")
             job.overall_sentiment = sentiment_results.get("overall_sentiment")
             job.risk_level = fusion_results.get("risk_level")
-            job.progress = 75.0
-            db.commit()
-            print(f"✅ Fusion complete (Credibility: {fusion_results.get('credibility_score', 0):.2f})")
+            self._set_progress(job, 75.0)
+            logger.info(
+                "[%s] ✅ Fusion complete (Credibility: %.2f)",
+                job_id, fusion_results.get("credibility_score", 0),
+            )
 
             # Step 6: Claude AI analysis (90% progress)
-            print("\n[6/7] 🤖 Claude AI Comprehensive Analysis...")
+            logger.info("[%s] [6/7] 🤖 Claude AI Comprehensive Analysis...", job_id)
             try:
                 claude_results = self.claude_service.generate_comprehensive_analysis(
                     job.company_name or "Unknown Company",
@@ -141,11 +145,11 @@ class AnalysisOrchestrator:
                     chart_results,
                     fusion_results
                 )
-                print("✅ Claude analysis complete")
+                logger.info("[%s] ✅ Claude analysis complete", job_id)
             except Exception as e:
-                import traceback
-                print(f"❌ Claude API Error: {str(e)}")
-                print(f"Full traceback:\n{traceback.format_exc()}")
+                logger.error("[%s] ❌ Claude API Error: %s", job_id, e)
+                # The fallback below keeps the job going; the traceback is only formatted when debugging
+                logger.debug("[%s] Claude API traceback", job_id, exc_info=True)
                 # Provide fallback analysis based on fusion results
                 claude_results = {
                     "executive_summary": f"Multi-modal analysis complete for {job.company_name or 'the company'}. Overall credibility score: {fusion_results.get('credibility_score', 0):.2f}. Risk level: {fusion_results.get('risk_level', 'unknown')}. Claude AI deep analysis failed: {str(e)[:200]}",
@@ -157,24 +161,21 @@ class AnalysisOrchestrator:
                 }
 
             job.claude_analysis = claude_results
-            job.progress = 90.0
+            self._set_progress(job, 90.0)
             db.commit()
 
             # Step 7: Finalize (100% progress)
-            print("\n[7/7] ✨ Finalizing...")
+            logger.info("[%s] [7/7] ✨ Finalizing...", job_id)
             job.status = "completed"
             job.completed_at = datetime.utcnow()
             job.progress = 100.0
             db.commit()
 
             duration = (job.completed_at - job.started_at).total_seconds()
-            print(f"\n{'='*60}")
-            print(f"🎉 Analysis complete in {duration:.1f} seconds!")
-            print(f"{'='*60}\n")
+            logger.info("🎉 Analysis of job %s complete in %.1f seconds!", job_id, duration)
 
         except Exception as e:
-            print(f"\n❌ Error processing job {job_id}: {e}")
-            print(traceback.format_exc())
+            logger.exception("❌ Error processing job %s: %s", job_id, e)
 
             # Update job with error
             try:
@@ -185,7 +186,36 @@ class AnalysisOrchestrator:
                     job.completed_at = datetime.utcnow()
                     db.commit()
             except Exception as db_error:
-                print(f"Failed to update job error status: {db_error}")
+                logger.error("Failed to update job error status: %s", db_error)
 
         finally:
+            job_progress.clear(job_id)
             db.close()
+
+    @staticmethod
+    def _set_progress(job: AnalysisJob, progress: float) -> None:
+        """Publish progress to status polling now; the row picks it up at the next commit"""
+        job.progress = progress
+        job_progress.set(job.id, progress)
+
+    def _analyze_sentiment(self, segments: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Step 3: FinBERT sentiment plus the prepared-vs-Q&A breakdown"""
+        sentiment_results = self.sentiment_service.analyze_transcript(segments)
+
+        # Also analyze prepared vs Q&A
+        sentiment_results["discourse_analysis"] = self.sentiment_service.separate_prepared_vs_qa(
+            sentiment_results["segments"]
+        )
+        return sentiment_results
+
+    def _analyze_charts(
+        self,
+        chart_paths: Optional[List[str]],
+        transcript_text: str,
+        company_context: str,
+    ) -> Dict[str, Any]:
+        """Step 4: chart analysis (empty result when the job has no charts)"""
+        if not chart_paths:
+            return {"chart_descriptions": [], "extracted_data": [], "inconsistencies": []}
+
+        return self.chart_service.analyze_charts(chart_paths, transcript_text, company_context)
@@ -1,27 +1,122 @@
 """
 Financial Sentiment Analysis Service using FinBERT
 """
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
+import logging
+import numpy as np
 import torch
 import re
-from typing import List, Dict, Any
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Dict, Any, Optional
 from ..core.config import settings
+from ._registry import get_finbert
+
+logger = logging.getLogger(__name__)
+
+try:
+    import ahocorasick
+except ImportError:  # optional; a combined regex does the same single scan
+    ahocorasick = None
+
+# Segments per FinBERT forward pass, and FinBERT's input limit in tokens
+FINBERT_BATCH_SIZE = 32
+FINBERT_MAX_TOKENS = 512
+
+# Sentiment labels in reporting order; counts are indexed the same way
+SENTIMENT_LABELS = ("positive", "negative", "neutral")
+_LABEL_INDEX = {label: i for i, label in enumerate(SENTIMENT_LABELS)}
+
+
+def _label_counts(labels: Iterable[str]) -> np.ndarray:
+    """Count each of SENTIMENT_LABELS in one bincount pass (other labels are ignored)"""
+    unknown = len(SENTIMENT_LABELS)
+    indices = np.fromiter((_LABEL_INDEX.get(label, unknown) for label in labels), dtype=np.int8)
+    return np.bincount(indices, minlength=unknown + 1)[:unknown]
+
+# Common financial topics
+TOPIC_KEYWORDS = {
+    "Revenue Growth": ["revenue", "sales", "top line", "growth"],
+    "Profitability": ["profit", "margin", "earnings", "ebitda", "bottom line"],
+    "Guidance": ["guidance", "outlook", "forecast", "expect", "project"],
+    "Market Share": ["market share", "competition", "competitive"],
+    "Innovation": ["innovation", "new product", "r&d", "development"],
+    "Cost Management": ["cost", "expense", "efficiency", "savings"],
+    "Customer Acquisition": ["customer", "client", "acquisition", "retention"],
+    "Debt & Financing": ["debt", "leverage", "financing", "capital"],
+}
+_KEYWORD_TOPICS = {
+    keyword: topic for topic, keywords in TOPIC_KEYWORDS.items() for keyword in keywords
+}
+
+
+def _build_topic_automaton():
+    """Aho-Corasick automaton over all topic keywords (None without pyahocorasick)"""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for keyword, topic in _KEYWORD_TOPICS.items():
+        automaton.add_word(keyword, topic)
+    automaton.make_automaton()
+    return automaton
+
+
+_TOPIC_AUTOMATON = _build_topic_automaton()
+# Fallback single scan: a lookahead at each position reports overlapping
+# keyword hits (substring match, like `keyword in text`)
+_KEYWORD_RE = re.compile(
+    "(?=(" + "|".join(map(re.escape, sorted(_KEYWORD_TOPICS, key=len, reverse=True))) + "))"
+)
+
+# Patterns for common metrics (matched against lower-cased text)
+_METRIC_PATTERNS = (
+    ("revenue", re.compile(r"revenue\s+(?:of\s+)?\$?([\d.]+)\s*(billion|million|thousand)?")),
+    ("eps", re.compile(r"(?:eps|earnings per share)\s+(?:of\s+)?\$?([\d.]+)")),
+    ("growth", re.compile(r"([\d.]+)%?\s+growth")),
+    ("margin", re.compile(r"([\d.]+)%?\s+margin")),
+)
+
+# LRU of FinBERT results for short, frequently repeated segments, keyed by normalized text
+SENTIMENT_CACHE_SIZE = 2048
+SENTIMENT_CACHE_MAX_CHARS = 400
+_sentiment_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_sentiment_cache_lock = threading.Lock()
+
+
+def _sentiment_cache_key(text: str) -> Optional[str]:
+    """Cache key for a segment (FinBERT is uncased), or None if it's too long to cache"""
+    if len(text) > SENTIMENT_CACHE_MAX_CHARS:
+        return None
+    return text.strip().lower()
+
+
+def _get_cached_sentiment(key: Optional[str]) -> Optional[Dict[str, Any]]:
+    if key is None:
+        return None
+    with _sentiment_cache_lock:
+        result = _sentiment_cache.get(key)
+        if result is not None:
+            _sentiment_cache.move_to_end(key)
+        return result
+
+
+def _store_cached_sentiment(key: Optional[str], result: Dict[str, Any]) -> None:
+    if key is None:
+        return
+    with _sentiment_cache_lock:
+        _sentiment_cache[key] = result
+        if len(_sentiment_cache) > SENTIMENT_CACHE_SIZE:
+            _sentiment_cache.popitem(last=False)
 
 
 class SentimentAnalysisService:
     """Service for financial sentiment analysis using FinBERT"""
 
     def __init__(self):
-        print("📊 Loading FinBERT model...")
-        self.tokenizer = AutoTokenizer.from_pretrained(settings.FINBERT_MODEL)
-        self.model = AutoModelForSequenceClassification.from_pretrained(settings.FINBERT_MODEL)
-
-        self.sentiment_pipeline = pipeline(
-            "sentiment-analysis",
-            model=self.model,
-            tokenizer=self.tokenizer,
-            device=0 if torch.cuda.is_available() else -1
-        )
+        logger.info("📊 Loading FinBERT model...")
+        # Shared with every other service instance in this process
+        self.tokenizer, self.model = get_finbert(settings.FINBERT_MODEL)
+        # Model label id -> label name (ProsusAI/finbert: positive, negative, neutral)
+        self.id2label = {i: label.lower() for i, label in self.model.config.id2label.items()}
 
         self.label_map = {
             "positive": "positive",
@@ -29,7 +124,7 @@ class SentimentAnalysisService:
             "neutral": "neutral",
         }
 
-        print("✅ FinBERT model loaded successfully")
+        logger.info("✅ FinBERT model loaded successfully")
 
     def analyze_transcript(self, segments: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
@@ -42,44 +137,40 @@ class SentimentAnalysisService:
             Dictionary with sentiment analysis results
         """
         try:
-            print(f"🔍 Analyzing sentiment for {len(segments)} segments...")
+            logger.info("🔍 Analyzing sentiment for %d segments...", len(segments))
 
             analyzed_segments = []
-            sentiment_scores = {"positive": 0, "negative": 0, "neutral": 0}
+            append = analyzed_segments.append
 
+            # Score every non-empty segment in one batched FinBERT call
+            scored = []
+            texts = []
             for segment in segments:
                 text = segment.get("text", "").strip()
-                if not text:
-                    continue
-
-                # Analyze sentiment
-                sentiment_result = self._analyze_text(text)
-
-                # Add sentiment to segment
-                segment_with_sentiment = {
-                    **segment,
-                    "sentiment": sentiment_result["label"],
-                    "sentiment_score": sentiment_result["score"],
-                }
-                analyzed_segments.append(segment_with_sentiment)
-
-                # Update distribution
-                sentiment_scores[sentiment_result["label"]] += 1
+                if text:
+                    scored.append(segment)
+                    texts.append(text)
+            sentiment_results = self._analyze_texts(texts)
+
+            for segment, sentiment_result in zip(scored, sentiment_results):
+                # Add sentiment to a copy of the segment
+                segment_with_sentiment = dict(segment)
+                segment_with_sentiment["sentiment"] = sentiment_result["label"]
+                segment_with_sentiment["sentiment_score"] = sentiment_result["score"]
+                append(segment_with_sentiment)
 
             # Calculate distribution
+            counts = _label_counts(r["label"] for r in sentiment_results)
             total = len(analyzed_segments) if analyzed_segments else 1
-            sentiment_distribution = {
-                label: count / total
-                for label, count in sentiment_scores.items()
-            }
+            sentiment_distribution = dict(zip(SENTIMENT_LABELS, (counts / total).tolist()))
 
-            # Determine overall sentiment
-            overall_sentiment = max(sentiment_scores, key=sentiment_scores.get)
+            # Determine overall sentiment (ties go to the earlier label, as max() did)
+            overall_sentiment = SENTIMENT_LABELS[int(counts.argmax())]
 
-            # Extract key topics and financial metrics
-            full_text = " ".join([s.get("text", "") for s in segments])
-            key_topics = self._extract_key_topics(full_text)
-            financial_metrics = self._extract_financial_metrics(full_text)
+            # Extract key topics and financial metrics from one lower-cased copy of the call
+            text_lower = " ".join(s.get("text", "") for s in segments).lower()
+            key_topics = self._extract_key_topics(text_lower)
+            financial_metrics = self._extract_financial_metrics(text_lower)
 
             result = {
                 "segments": analyzed_segments,
@@ -89,13 +180,59 @@ class SentimentAnalysisService:
                 "financial_metrics": financial_metrics,
             }
 
-            print(f"✅ Sentiment analysis complete. Overall: {overall_sentiment}")
+            logger.info("✅ Sentiment analysis complete. Overall: %s", overall_sentiment)
             return result
 
         except Exception as e:
-            print(f"❌ Sentiment analysis error: {e}")
+            logger.error("❌ Sentiment analysis error: %s", e)
             raise Exception(f"Failed to analyze sentiment: {str(e)}")
 
+    def _analyze_texts(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Analyze sentiment of many text segments in padded batches
+
+        Short segments are looked up in a process-wide LRU first (calls
+        repeat boilerplate like "thank you for the question"), and identical
+        texts are only scored once. Texts longer than FinBERT's input are
+        truncated by the tokenizer at token level. If the batched call
+        fails, each text is retried alone so one bad segment doesn't lose
+        the rest.
+
+        Args:
+            texts: Non-empty texts to analyze
+
+        Returns:
+            Dictionary with label and score per text, in input order
+        """
+        keys = [_sentiment_cache_key(text) for text in texts]
+        results = [_get_cached_sentiment(key) for key in keys]
+
+        # Unscored texts -> positions they fill
+        pending: Dict[str, List[int]] = {}
+        for i, result in enumerate(results):
+            if result is None:
+                pending.setdefault(texts[i], []).append(i)
+        if not pending:
+            return results
+
+        unique_texts = list(pending)
+        try:
+            fresh = self._score_texts(unique_texts)
+            cacheable = True
+        except Exception as e:
+            logger.warning("Batched sentiment analysis failed (%s), analyzing segments individually", e)
+            fresh = [self._analyze_text(text) for text in unique_texts]
+            cacheable = False
+
+        for text, result in zip(unique_texts, fresh):
+            positions = pending[text]
+            for i in positions:
+                results[i] = result
+            if cacheable:
+                _store_cached_sentiment(keys[positions[0]], result)
+
+        return results
+
     def _analyze_text(self, text: str) -> Dict[str, Any]:
         """
         Analyze sentiment of a single text segment
@@ -106,70 +243,102 @@ class SentimentAnalysisService:
         Returns:
             Dictionary with label and score
         """
-        # Truncate if too long
-        max_length = 512
-        if len(text.split()) > max_length:
-            text = " ".join(text.split()[:max_length])
-
         try:
-            result = self.sentiment_pipeline(text)[0]
-            label = result["label"].lower()
-            score = result["score"]
-
-            return {
-                "label": self.label_map.get(label, "neutral"),
-                "score": round(score, 3),
-            }
+            return self._score_texts([text])[0]
         except Exception as e:
-            print(f"Warning: Failed to analyze text segment: {e}")
+            logger.warning("Failed to analyze text segment: %s", e)
             return {"label": "neutral", "score": 0.5}
 
-    def _extract_key_topics(self, text: str) -> List[str]:
+    def _score_texts(self, texts: List[str]) -> List[Dict[str, Any]]:
         """
-        Extract key financial topics from text
-        Simple keyword-based extraction
+        Score texts with FinBERT in length-sorted batches
+
+        All texts are tokenized (and truncated to FINBERT_MAX_TOKENS at
+        subword level) in one call to the Rust-backed fast tokenizer; the
+        token ids are then reused for every batch. Batching texts of
+        similar length keeps padding, and so wasted compute, to a minimum.
+
+        Args:
+            texts: Texts to score
+
+        Returns:
+            Dictionary with label and score per text, in input order
+        """
+        encoded = self.tokenizer(texts, truncation=True, max_length=FINBERT_MAX_TOKENS)
+        features = [
+            {name: values[i] for name, values in encoded.items()} for i in range(len(texts))
+        ]
+        order = sorted(range(len(texts)), key=lambda i: len(features[i]["input_ids"]))
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        for start in range(0, len(order), FINBERT_BATCH_SIZE):
+            batch = order[start:start + FINBERT_BATCH_SIZE]
+            for i, result in zip(batch, self._predict([features[i] for i in batch])):
+                results[i] = result
+        return results
+
+    def _predict(self, features: List[Dict[str, List[int]]]) -> List[Dict[str, Any]]:
         """
-        topics = []
-
-        # Common financial topics
-        topic_keywords = {
-            "Revenue Growth": ["revenue", "sales", "top line", "growth"],
-            "Profitability": ["profit", "margin", "earnings", "ebitda", "bottom line"],
-            "Guidance": ["guidance", "outlook", "forecast", "expect", "project"],
-            "Market Share": ["market share", "competition", "competitive"],
-            "Innovation": ["innovation", "new product", "r&d", "development"],
-            "Cost Management": ["cost", "expense", "efficiency", "savings"],
-            "Customer Acquisition": ["customer", "client", "acquisition", "retention"],
-            "Debt & Financing": ["debt", "leverage", "financing", "capital"],
+        Run one padded FinBERT forward pass over a batch of tokenized texts
+
+        Calls the model directly rather than through a transformers
+        pipeline, so the batch is padded, moved to the device and
+        post-processed once instead of per item.
+
+        Args:
+            features: Tokenizer output (input_ids, attention_mask, ...) per text
+
+        Returns:
+            Dictionary with label and score per text, in input order
+        """
+        tokens = self.tokenizer.pad(features, return_tensors="pt").to(self.model.device)
+        with torch.inference_mode():
+            logits = self.model(**tokens).logits
+        # Softmax in fp32 so half-precision logits give the same top score
+        scores, indices = torch.softmax(logits.float(), dim=-1).max(dim=-1)
+
+        return [
+            self._format_result(self.id2label[index], score)
+            for score, index in zip(scores.tolist(), indices.tolist())
+        ]
+
+    def _format_result(self, label: str, score: float) -> Dict[str, Any]:
+        """Map a model prediction to our label set and a rounded score"""
+        return {
+            "label": self.label_map.get(label, "neutral"),
+            "score": round(score, 3),
         }
 
-        text_lower = text.lower()
+    def _extract_key_topics(self, text_lower: str) -> List[str]:
+        """
+        Extract key financial topics from lower-cased text
+        Simple keyword-based extraction
+        """
+        # One pass over the text collects every topic with a keyword hit
+        hits = set()
+        if _TOPIC_AUTOMATON is not None:
+            matches = (topic for _, topic in _TOPIC_AUTOMATON.iter(text_lower))
+        else:
+            matches = (_KEYWORD_TOPICS[m.group(1)] for m in _KEYWORD_RE.finditer(text_lower))
+        for topic in matches:
+            hits.add(topic)
+            if len(hits) == len(TOPIC_KEYWORDS):
+                break
 
-        for topic, keywords in topic_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
-                topics.append(topic)
+        topics = [topic for topic in TOPIC_KEYWORDS if topic in hits]
 
         return topics[:5]  # Return top 5
 
-    def _extract_financial_metrics(self, text: str) -> List[Dict[str, Any]]:
+    def _extract_financial_metrics(self, text_lower: str) -> List[Dict[str, Any]]:
         """
-        Extract financial metrics mentioned in text
+        Extract financial metrics mentioned in lower-cased text
         """
         metrics = []
 
-        # Patterns for common metrics
-        patterns = {
-            "revenue": r"revenue\s+(?:of\s+)?\$?([\d.]+)\s*(billion|million|thousand)?",
-            "eps": r"(?:eps|earnings per share)\s+(?:of\s+)?\$?([\d.]+)",
-            "growth": r"([\d.]+)%?\s+growth",
-            "margin": r"([\d.]+)%?\s+margin",
-        }
-
-        for metric_name, pattern in patterns.items():
-            matches = re.finditer(pattern, text.lower())
-            for match in matches:
+        for metric_name, pattern in _METRIC_PATTERNS:
+            for match in pattern.finditer(text_lower):
                 value = match.group(1)
-                unit = match.group(2) if len(match.groups()) > 1 else ""
+                unit = match.group(2) if pattern.groups > 1 else ""
 
                 metrics.append({
                     "metric": metric_name,
@@ -184,28 +353,30 @@ class SentimentAnalysisService:
         """
         Analyze sentiment differences between prepared statements and Q&A
         """
-        prepared = [s for s in segments if s.get("segment_type") == "prepared_statement"]
-        qa = [s for s in segments if s.get("segment_type") == "qa"]
+        # Partition in one pass
+        prepared = []
+        qa = []
+        for s in segments:
+            segment_type = s.get("segment_type")
+            if segment_type == "prepared_statement":
+                prepared.append(s)
+            elif segment_type == "qa":
+                qa.append(s)
 
         def calculate_sentiment_stats(segs):
             if not segs:
                 return {"positive": 0, "negative": 0, "neutral": 0}
 
-            sentiments = [s.get("sentiment", "neutral") for s in segs]
-            total = len(sentiments)
-            return {
-                "positive": sentiments.count("positive") / total,
-                "negative": sentiments.count("negative") / total,
-                "neutral": sentiments.count("neutral") / total,
-            }
+            counts = _label_counts(s.get("sentiment", "neutral") for s in segs)
+            return dict(zip(SENTIMENT_LABELS, (counts / len(segs)).tolist()))
+
+        prepared_stats = calculate_sentiment_stats(prepared)
+        qa_stats = calculate_sentiment_stats(qa)
 
         return {
-            "prepared_sentiment": calculate_sentiment_stats(prepared),
-            "qa_sentiment": calculate_sentiment_stats(qa),
-            "sentiment_shift": self._calculate_sentiment_shift(
-                calculate_sentiment_stats(prepared),
-                calculate_sentiment_stats(qa)
-            ),
+            "prepared_sentiment": prepared_stats,
+            "qa_sentiment": qa_stats,
+            "sentiment_shift": self._calculate_sentiment_shift(prepared_stats, qa_stats),
         }
 
     def _calculate_sentiment_shift(self, prepared: Dict, qa: Dict) -> str:
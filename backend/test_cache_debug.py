@@ -1,16 +1,38 @@
 """
 Debug test to see exact cache behavior
+
+Run with --batch to send both calls in one Message Batches request
+(half-price input; the second call's cache hit is then best-effort,
+since batch members can run concurrently).
+
+Sequential calls are replayed from the on-disk completion cache after the
+first run; set FORCE_LIVE=1 to hit the API again.
 """
-import anthropic
+import atexit
+import io
 import os
+import sys
+import time
+from typing import Any, Dict, Final, List
+import orjson
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.anthropic_client import get_client
+from _completion_cache import cached_create
+
 load_dotenv()
 
-client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+# Collect diagnostics in memory and write them once at exit (also after a failure)
+_output = io.StringIO()
+sys.stdout = _output
+atexit.register(lambda: sys.__stdout__.write(_output.getvalue()))
+
+client = get_client()
 
 # Create a large system prompt (needs to be 1024+ tokens for caching)
-large_system_prompt = """You are a world-class financial analyst specializing in earnings call analysis. You have been provided with a multi-modal analysis of an earnings call.
+_PROMPT: Final[str] = """You are a world-class financial analyst specializing in earnings call analysis. You have been provided with a multi-modal analysis of an earnings call.
 
 Your task is to synthesize insights from multiple data sources and provide a comprehensive investment analysis.
 
@@ -93,100 +115,183 @@ When fusing modalities:
 
 Now, analyze the data provided in the user message."""
 
+# Built once and passed to both calls, so the cached prefix is byte-for-byte identical
+_SYSTEM_BLOCK: Final[List[Dict[str, Any]]] = [
+    {
+        "type": "text",
+        "text": _PROMPT,
+        "cache_control": {"type": "ephemeral"}
+    }
+]
+
+# Rough token count (1 token ≈ 4 characters for English)
+APPROX_TOKENS: Final[int] = len(_PROMPT) >> 2
+
+MODEL: Final[str] = "claude-sonnet-4-5-20250929"
+# Pin prompt caching on explicitly; older SDKs only enable it with the beta header
+PROMPT_CACHING_HEADERS: Final[Dict[str, str]] = {"anthropic-beta": "prompt-caching-2024-07-31"}
+USE_BATCH = "--batch" in sys.argv[1:]
+BATCH_POLL_INTERVAL = 5.0
+
+
+def _params(content: str) -> Dict[str, Any]:
+    """Request parameters for one call; only the user message differs"""
+    return {
+        "model": MODEL,
+        "max_tokens": 500,
+        "system": _SYSTEM_BLOCK,
+        "messages": [
+            {
+                "role": "user",
+                "content": content
+            }
+        ],
+    }
+
+
+CALL1_PARAMS = _params("Analyze Company A with revenue of $1B.")
+CALL2_PARAMS = _params("Analyze Company B with revenue of $2B.")
+
+
+def _run_batch(requests: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Submit requests as one message batch, wait for it to end, and return messages by id"""
+    batch = client.messages.batches.create(
+        requests=[{"custom_id": custom_id, "params": params} for custom_id, params in requests.items()],
+        extra_headers=PROMPT_CACHING_HEADERS,
+    )
+    print(f"📦 Submitted batch {batch.id}, waiting for results...")
+    while batch.processing_status != "ended":
+        time.sleep(BATCH_POLL_INTERVAL)
+        batch = client.messages.batches.retrieve(batch.id)
+
+    messages = {}
+    for entry in client.messages.batches.results(batch.id):
+        if entry.result.type != "succeeded":
+            raise RuntimeError(f"Batch request {entry.custom_id} {entry.result.type}")
+        messages[entry.custom_id] = entry.result.message
+    return messages
+
+
+# Layouts shared by both calls; the cache counters are None on models without caching
+_USAGE_TMPL: Final[str] = (
+    "Full Usage Object: %s\n"
+    "\nDetailed breakdown:\n"
+    "  input_tokens: %d\n"
+    "  cache_creation_input_tokens: %s\n"
+    "  cache_read_input_tokens: %s\n"
+    "  output_tokens: %d\n"
+)
+_CACHE_CREATION_TMPL: Final[str] = "\nCache Creation Object: %s\n"
+_CACHE_CREATION_SPLIT_TMPL: Final[str] = "  ephemeral_1h: %s\n  ephemeral_5m: %s\n"
+
+
+def _dump_usage(response, call: int) -> None:
+    """Write a response's token usage breakdown, plus one JSON line for log parsers, in one write"""
+    usage = response.usage
+    text = _USAGE_TMPL % (
+        usage,
+        usage.input_tokens,
+        usage.cache_creation_input_tokens,
+        usage.cache_read_input_tokens,
+        usage.output_tokens,
+    )
+    if hasattr(usage, 'cache_creation'):
+        text += _CACHE_CREATION_TMPL % (usage.cache_creation,)
+        if usage.cache_creation:
+            text += _CACHE_CREATION_SPLIT_TMPL % (
+                usage.cache_creation.ephemeral_1h_input_tokens,
+                usage.cache_creation.ephemeral_5m_input_tokens,
+            )
+    text += orjson.dumps({
+        "call": call,
+        "input": usage.input_tokens,
+        "cache_read": usage.cache_read_input_tokens,
+        "cache_write": usage.cache_creation_input_tokens,
+        "output": usage.output_tokens,
+    }, option=orjson.OPT_APPEND_NEWLINE).decode()
+    sys.stdout.write(text)
+
+
 print("Testing cache behavior with detailed debug output\n")
+print(f"System prompt: ~{APPROX_TOKENS} tokens (caching needs 1024+)")
 print("="*70)
 
-# Test #1: First call (should create cache)
-print("\n📞 Call #1: Creating cache...\n")
-
-response1 = client.messages.create(
-    model="claude-sonnet-4-5-20250929",
-    max_tokens=500,
-    system=[
-        {
-            "type": "text",
-            "text": large_system_prompt,
-            "cache_control": {"type": "ephemeral"}
-        }
-    ],
-    messages=[
-        {
-            "role": "user",
-            "content": "Analyze Company A with revenue of $1B."
-        }
-    ]
-)
+if USE_BATCH:
+    # Both calls in one HTTP submission
+    print("\n📦 Calls #1 and #2 via the Message Batches API...\n")
+    batch_messages = _run_batch({"call1": CALL1_PARAMS, "call2": CALL2_PARAMS})
+    response1 = batch_messages["call1"]
+    response2 = batch_messages["call2"]
+
+    print("\n📞 Call #1:\n")
+    _dump_usage(response1, 1)
+    print("\n" + "="*70)
+    print("\n📞 Call #2:\n")
+    _dump_usage(response2, 2)
+else:
+    # Test #1: First call (should create cache)
+    print("\n📞 Call #1: Creating cache...\n")
 
-print(f"Full Usage Object: {response1.usage}")
-print(f"\nDetailed breakdown:")
-print(f"  input_tokens: {response1.usage.input_tokens}")
-print(f"  cache_creation_input_tokens: {response1.usage.cache_creation_input_tokens}")
-print(f"  cache_read_input_tokens: {response1.usage.cache_read_input_tokens}")
-print(f"  output_tokens: {response1.usage.output_tokens}")
+    response1 = cached_create(client, **CALL1_PARAMS, extra_headers=PROMPT_CACHING_HEADERS)
 
-if hasattr(response1.usage, 'cache_creation'):
-    print(f"\nCache Creation Object: {response1.usage.cache_creation}")
-    if response1.usage.cache_creation:
-        print(f"  ephemeral_1h: {response1.usage.cache_creation.ephemeral_1h_input_tokens}")
-        print(f"  ephemeral_5m: {response1.usage.cache_creation.ephemeral_5m_input_tokens}")
+    _dump_usage(response1, 1)
 
-# Wait a moment, then test #2
-import time
-time.sleep(1)
+    # Cache writes are committed before call #1 returns; a free count_tokens
+    # round trip on the same prefix stands in for the old fixed 1s pause
+    client.messages.count_tokens(
+        model=MODEL,
+        system=_SYSTEM_BLOCK,
+        messages=[{"role": "user", "content": "warm"}],
+        extra_headers=PROMPT_CACHING_HEADERS,
+    )
 
-print("\n" + "="*70)
-print("\n📞 Call #2: Reading from cache...\n")
-
-response2 = client.messages.create(
-    model="claude-sonnet-4-5-20250929",
-    max_tokens=500,
-    system=[
-        {
-            "type": "text",
-            "text": large_system_prompt,
-            "cache_control": {"type": "ephemeral"}
-        }
-    ],
-    messages=[
-        {
-            "role": "user",
-            "content": "Analyze Company B with revenue of $2B."
-        }
-    ]
-)
+    print("\n" + "="*70)
+    print("\n📞 Call #2: Reading from cache...\n")
 
-print(f"Full Usage Object: {response2.usage}")
-print(f"\nDetailed breakdown:")
-print(f"  input_tokens: {response2.usage.input_tokens}")
-print(f"  cache_creation_input_tokens: {response2.usage.cache_creation_input_tokens}")
-print(f"  cache_read_input_tokens: {response2.usage.cache_read_input_tokens}")
-print(f"  output_tokens: {response2.usage.output_tokens}")
+    response2 = cached_create(client, **CALL2_PARAMS, extra_headers=PROMPT_CACHING_HEADERS)
 
-if hasattr(response2.usage, 'cache_creation'):
-    print(f"\nCache Creation Object: {response2.usage.cache_creation}")
-    if response2.usage.cache_creation:
-        print(f"  ephemeral_1h: {response2.usage.cache_creation.ephemeral_1h_input_tokens}")
-        print(f"  ephemeral_5m: {response2.usage.cache_creation.ephemeral_5m_input_tokens}")
+    _dump_usage(response2, 2)
 
 print("\n" + "="*70)
 print("\n💰 Cost Comparison:\n")
 
-cost_per_1k_input = 3.0  # $3 per million = $0.003 per 1k
-cost_per_1k_cached = 0.3  # $0.30 per million = $0.0003 per 1k
+# Prices as whole nano-dollars per token, so the sums below are exact integers
+INPUT_NANODOLLARS_PER_TOKEN = 3_000        # $3.00 per million
+CACHE_WRITE_NANODOLLARS_PER_TOKEN = 3_750  # $3.75 per million (5-minute cache write)
+CACHE_READ_NANODOLLARS_PER_TOKEN = 300     # $0.30 per million
+NANODOLLARS_PER_DOLLAR = 1_000_000_000
 
-call1_cost = (response1.usage.input_tokens / 1000) * cost_per_1k_input
-call2_cost_without_cache = (response2.usage.input_tokens / 1000) * cost_per_1k_input
-call2_cost_with_cache = (response2.usage.input_tokens / 1000) * cost_per_1k_input + \
-                        (response2.usage.cache_read_input_tokens / 1000) * cost_per_1k_cached
+_COSTS_TMPL: Final[str] = (
+    "Call #1 (creating cache): $%.6f\n"
+    "Call #2 (without cache):  $%.6f\n"
+    "Call #2 (with cache):     $%.6f\n"
+)
+
+usage1 = response1.usage
+usage2 = response2.usage
+
+call1_cost = (
+    usage1.input_tokens * INPUT_NANODOLLARS_PER_TOKEN
+    + (usage1.cache_creation_input_tokens or 0) * CACHE_WRITE_NANODOLLARS_PER_TOKEN
+)
+# Without caching, the tokens read from cache would be billed as regular input
+cache_read2 = usage2.cache_read_input_tokens or 0
+call2_cost_without_cache = (usage2.input_tokens + cache_read2) * INPUT_NANODOLLARS_PER_TOKEN
+call2_cost_with_cache = (
+    usage2.input_tokens * INPUT_NANODOLLARS_PER_TOKEN
+    + cache_read2 * CACHE_READ_NANODOLLARS_PER_TOKEN
+)
 
-print(f"Call #1 (creating cache): ${call1_cost:.6f}")
-print(f"Call #2 (without cache):  ${call2_cost_without_cache:.6f}")
-print(f"Call #2 (with cache):     ${call2_cost_with_cache:.6f}")
+sys.stdout.write(_COSTS_TMPL % (
+    call1_cost / NANODOLLARS_PER_DOLLAR,
+    call2_cost_without_cache / NANODOLLARS_PER_DOLLAR,
+    call2_cost_with_cache / NANODOLLARS_PER_DOLLAR,
+))
 
-if response2.usage.cache_read_input_tokens > 0:
+if cache_read2 > 0:
     savings = call2_cost_without_cache - call2_cost_with_cache
-    savings_pct = (savings / call2_cost_without_cache) * 100
-    print(f"\n✅ Savings: ${savings:.6f} ({savings_pct:.1f}%)")
+    savings_pct = savings * 100 / call2_cost_without_cache
+    print(f"\n✅ Savings: ${savings / NANODOLLARS_PER_DOLLAR:.6f} ({savings_pct:.1f}%)")
     print(f"✅ Cache is working!")
 else:
     print(f"\n⚠️  No cache hits detected")
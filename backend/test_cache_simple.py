@@ -3,31 +3,68 @@ Simple cache test - just check if system prompt is being cached
 """
 import sys
 import os
+import atexit
+import hashlib
+import io
+import json
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from app.services.anthropic_client import get_client
 from app.services.claude_integration import ClaudeIntegrationService
+from app.core.config import settings
 
-print("Testing if system prompt meets 1024 token threshold for caching...\n")
+# Collect diagnostics in memory and write them once at exit (also after a failure)
+_output = io.StringIO()
+sys.stdout = _output
+atexit.register(lambda: sys.__stdout__.write(_output.getvalue()))
+
+# Exact token counts from earlier runs, keyed by sha256 of model + system prompt
+TOKEN_COUNT_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".token_count_cache.json")
+CACHE_THRESHOLD = 1024
+
+
+def count_system_tokens(system_prompt: str) -> int:
+    """Count the system prompt's tokens with the API's tokenizer (cached on disk per prompt)"""
+    key = hashlib.sha256(f"{settings.CLAUDE_MODEL}\n{system_prompt}".encode()).hexdigest()
+    try:
+        with open(TOKEN_COUNT_CACHE) as f:
+            counts = json.load(f)
+    except (OSError, ValueError):
+        counts = {}
+
+    if key not in counts:
+        counts[key] = get_client().messages.count_tokens(
+            model=settings.CLAUDE_MODEL,
+            system=[{"type": "text", "text": system_prompt}],
+            messages=[{"role": "user", "content": "x"}],
+        ).input_tokens
+        with open(TOKEN_COUNT_CACHE, "w") as f:
+            json.dump(counts, f)
+
+    return counts[key]
+
+
+print(f"Testing if system prompt meets {CACHE_THRESHOLD} token threshold for caching...\n")
 
 service = ClaudeIntegrationService()
 
 # Get the system prompt
 system_prompt = service._create_system_prompt()
 
-# Rough token count (1 token ≈ 4 characters for English)
 char_count = len(system_prompt)
-approx_tokens = char_count // 4
+# Includes the one-word user message the endpoint requires (a handful of tokens)
+exact_tokens = count_system_tokens(system_prompt)
 
 print(f"System Prompt Length:")
 print(f"  Characters: {char_count}")
-print(f"  Estimated tokens: {approx_tokens}")
-print(f"  Threshold for caching: 1024 tokens")
-print(f"  Will cache: {'✅ YES' if approx_tokens >= 1024 else '❌ NO'}")
+print(f"  Tokens: {exact_tokens}")
+print(f"  Threshold for caching: {CACHE_THRESHOLD} tokens")
+print(f"  Will cache: {'✅ YES' if exact_tokens >= CACHE_THRESHOLD else '❌ NO'}")
 
-if approx_tokens >= 1024:
+if exact_tokens >= CACHE_THRESHOLD:
     print(f"\n✅ System prompt is large enough for caching!")
-    print(f"   Expected cache tokens on first call: ~{approx_tokens}")
-    print(f"   Expected cache read on second call: ~{approx_tokens}")
+    print(f"   Expected cache tokens on first call: ~{exact_tokens}")
+    print(f"   Expected cache read on second call: ~{exact_tokens}")
 else:
     print(f"\n❌ System prompt is too small for caching")
-    print(f"   Need at least {1024 - approx_tokens} more tokens")
+    print(f"   Need at least {CACHE_THRESHOLD - exact_tokens} more tokens")
@@ -0,0 +1,32 @@
+"""
+Test that non-raster chart uploads (PDF, junk bytes) skip Pillow preprocessing
+
+They must be sent unchanged rather than raising out of the encoder and
+failing chart analysis for the whole deck.
+"""
+import base64
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.chart_analysis import _encode_image_file, _preprocess_image
+
+PDF_BYTES = b"%PDF-1.4\n1 0 obj\n<< /Type /Catalog >>\nendobj\ntrailer\n<< /Root 1 0 R >>\n%%EOF\n"
+JUNK_BYTES = b"not an image at all"
+
+for suffix, payload in ((".pdf", PDF_BYTES), (".png", JUNK_BYTES)):
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    with os.fdopen(fd, "wb") as f:
+        f.write(payload)
+    try:
+        assert _preprocess_image(path, len(payload)) is None
+        encoded, media_type = _encode_image_file(path, len(payload), "application/octet-stream")
+        assert base64.b64decode(encoded) == payload
+        assert media_type == "application/octet-stream"
+        print(f"✅ {suffix} chart with non-image bytes is sent unchanged")
+    finally:
+        os.unlink(path)
+
+print("\nTest complete!")
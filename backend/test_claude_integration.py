@@ -1,25 +1,72 @@
 """
 Test script for Claude Sonnet 4.5 integration with prompt caching
+
+Re-runs are answered from the service's disk cache (turned on here unless
+CLAUDE_CACHE_ENABLED is set); set FORCE_LIVE=1 to call the API again.
 """
 import sys
 import os
+import atexit
+import io
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# Must be set before settings are built
+if os.getenv("FORCE_LIVE"):
+    os.environ["CLAUDE_CACHE_ENABLED"] = "false"
+else:
+    os.environ.setdefault("CLAUDE_CACHE_ENABLED", "true")
+
 from app.services.claude_integration import ClaudeIntegrationService
 from app.core.config import settings
 
-print("="*70)
-print("🧪 Testing Claude Sonnet 4.5 Integration with Prompt Caching")
-print("="*70)
+# Collect diagnostics in memory and write them once at exit (also after a failure)
+_output = io.StringIO()
+sys.stdout = _output
+atexit.register(lambda: sys.__stdout__.write(_output.getvalue()))
+
+# Only the verdict by default; TEST_LOG_LEVEL=DEBUG shows the full breakdown
+logging.basicConfig(
+    level=os.getenv("TEST_LOG_LEVEL", "INFO").upper(),
+    format="%(message)s",
+    stream=sys.stdout,
+)
+logger = logging.getLogger(__name__)
+
+# Same layout for both calls; each block is one log record
+_CACHE_STATS_TMPL = (
+    "\n📊 Cache Statistics:\n"
+    "   Cache Creation Tokens: %d\n"
+    "   Cache Read Tokens: %d\n"
+    "   Total Input Tokens: %d\n"
+    "   Total Output Tokens: %d"
+)
+_RULE = "=" * 70
+
+
+def log_cache_stats(cache_stats):
+    logger.debug(
+        _CACHE_STATS_TMPL,
+        cache_stats.get('cache_creation_tokens', 0),
+        cache_stats.get('cache_read_tokens', 0),
+        cache_stats.get('total_input_tokens', 0),
+        cache_stats.get('total_output_tokens', 0),
+    )
+
+logger.debug(_RULE)
+logger.debug("🧪 Testing Claude Sonnet 4.5 Integration with Prompt Caching")
+logger.debug(_RULE)
 
-# Print configuration
-print(f"\n📋 Configuration:")
-print(f"   Model: {settings.CLAUDE_MODEL}")
-print(f"   Max Tokens: {settings.CLAUDE_MAX_TOKENS}")
-print(f"   Temperature: {settings.CLAUDE_TEMPERATURE}")
-print(f"   Prompt Caching: {settings.ENABLE_PROMPT_CACHING}")
+# Log configuration
+logger.debug("\n📋 Configuration:")
+logger.debug("   Model: %s", settings.CLAUDE_MODEL)
+logger.debug("   Max Tokens: %s", settings.CLAUDE_MAX_TOKENS)
+logger.debug("   Temperature: %s", settings.CLAUDE_TEMPERATURE)
+logger.debug("   Prompt Caching: %s", settings.ENABLE_PROMPT_CACHING)
 
 # Create test data
 test_company_name = "TechCorp Inc."
@@ -83,90 +130,91 @@ test_fusion_results = {
 }
 
 # Initialize service
-print("\n🔧 Initializing Claude Integration Service...")
-service = ClaudeIntegrationService()
+logger.debug("\n🔧 Initializing Claude Integration Service...")
+# Pin prompt caching on explicitly; older SDKs only enable it with the beta header
+service = ClaudeIntegrationService(
+    extra_headers={"anthropic-beta": "prompt-caching-2024-07-31"}
+)
+
+# Head start for call #1 so it reaches the API (and creates the cache entry) first
+CALL_STAGGER_SECONDS = 0.2
+
+# Modify user data slightly for the second call
+test_company_name_2 = "TechCorp Inc. (Q4 2024)"
+
+
+# Everything but the company name is shared, so both calls get the same objects
+SHARED_INPUTS = {
+    "company_context": test_company_context,
+    "transcript": test_transcript,
+    "audio_features": test_audio_features,
+    "sentiment_analysis": test_sentiment_analysis,
+    "chart_analysis": test_chart_analysis,
+    "fusion_results": test_fusion_results,
+}
+
+
+def run_analysis(company_name):
+    return service.generate_comprehensive_analysis(company_name=company_name, **SHARED_INPUTS)
 
-# Test #1: First call (should create cache)
-print("\n" + "="*70)
-print("📞 Test #1: First API call (creating cache)")
-print("="*70)
 
 try:
-    result1 = service.generate_comprehensive_analysis(
-        company_name=test_company_name,
-        company_context=test_company_context,
-        transcript=test_transcript,
-        audio_features=test_audio_features,
-        sentiment_analysis=test_sentiment_analysis,
-        chart_analysis=test_chart_analysis,
-        fusion_results=test_fusion_results
-    )
+    # Both calls are in flight together; call #2 starts just after call #1
+    with ThreadPoolExecutor(max_workers=2) as calls:
+        future1 = calls.submit(run_analysis, test_company_name)
+        time.sleep(CALL_STAGGER_SECONDS)
+        future2 = calls.submit(run_analysis, test_company_name_2)
+
+        # Test #1: First call (should create cache)
+        logger.debug("\n" + _RULE)
+        logger.debug("📞 Test #1: First API call (creating cache)")
+        logger.debug(_RULE)
+
+        result1 = future1.result()
 
-    print("\n✅ First call successful!")
-    print(f"\n📊 Cache Statistics:")
+    logger.debug("\n✅ First call successful!")
     cache_stats = result1.get("cache_stats", {})
-    print(f"   Cache Creation Tokens: {cache_stats.get('cache_creation_tokens', 0)}")
-    print(f"   Cache Read Tokens: {cache_stats.get('cache_read_tokens', 0)}")
-    print(f"   Total Input Tokens: {cache_stats.get('total_input_tokens', 0)}")
-    print(f"   Total Output Tokens: {cache_stats.get('total_output_tokens', 0)}")
-
-    print(f"\n📋 Analysis Preview:")
-    print(f"   Executive Summary: {result1.get('executive_summary', '')[:200]}...")
-    print(f"   Risk Indicators: {len(result1.get('risk_indicators', []))} identified")
-    print(f"   Opportunities: {len(result1.get('opportunities', []))} identified")
-    print(f"   Red Flags: {len(result1.get('red_flags', []))} identified")
-    print(f"   Overall Recommendation: {result1.get('overall_recommendation', '')[:100]}...")
+    log_cache_stats(cache_stats)
+
+    logger.debug("\n📋 Analysis Preview:")
+    logger.debug("   Executive Summary: %s...", result1.get('executive_summary', '')[:200])
+    logger.debug("   Risk Indicators: %d identified", len(result1.get('risk_indicators', [])))
+    logger.debug("   Opportunities: %d identified", len(result1.get('opportunities', [])))
+    logger.debug("   Red Flags: %d identified", len(result1.get('red_flags', [])))
+    logger.debug("   Overall Recommendation: %s...", result1.get('overall_recommendation', '')[:100])
 
     # Test #2: Second call with same system prompt (should read from cache)
-    print("\n" + "="*70)
-    print("📞 Test #2: Second API call (reading from cache)")
-    print("="*70)
-
-    # Modify user data slightly
-    test_company_name_2 = "TechCorp Inc. (Q4 2024)"
-
-    result2 = service.generate_comprehensive_analysis(
-        company_name=test_company_name_2,
-        company_context=test_company_context,
-        transcript=test_transcript,
-        audio_features=test_audio_features,
-        sentiment_analysis=test_sentiment_analysis,
-        chart_analysis=test_chart_analysis,
-        fusion_results=test_fusion_results
-    )
+    logger.debug("\n" + _RULE)
+    logger.debug("📞 Test #2: Second API call (reading from cache)")
+    logger.debug(_RULE)
+
+    result2 = future2.result()
 
-    print("\n✅ Second call successful!")
-    print(f"\n📊 Cache Statistics:")
+    logger.debug("\n✅ Second call successful!")
     cache_stats2 = result2.get("cache_stats", {})
-    print(f"   Cache Creation Tokens: {cache_stats2.get('cache_creation_tokens', 0)}")
-    print(f"   Cache Read Tokens: {cache_stats2.get('cache_read_tokens', 0)}")
-    print(f"   Total Input Tokens: {cache_stats2.get('total_input_tokens', 0)}")
-    print(f"   Total Output Tokens: {cache_stats2.get('total_output_tokens', 0)}")
+    log_cache_stats(cache_stats2)
 
     # Calculate savings
-    if cache_stats2.get('cache_read_tokens', 0) > 0:
-        savings_pct = (cache_stats2.get('cache_read_tokens', 0) /
-                      (cache_stats2.get('cache_read_tokens', 0) + cache_stats2.get('total_input_tokens', 0))) * 100
-        print(f"\n💰 Cost Savings:")
-        print(f"   Tokens read from cache: {cache_stats2.get('cache_read_tokens', 0)}")
-        print(f"   Estimated cost reduction: ~{savings_pct:.1f}% on input tokens")
-        print(f"   ✅ Prompt caching is working!")
+    cache_read2 = cache_stats2.get('cache_read_tokens', 0)
+    if cache_read2 > 0:
+        savings_pct = cache_read2 / (cache_read2 + cache_stats2.get('total_input_tokens', 0)) * 100
+        logger.debug("\n💰 Cost Savings:")
+        logger.debug("   Tokens read from cache: %d", cache_read2)
+        logger.debug("   Estimated cost reduction: ~%.1f%% on input tokens", savings_pct)
+        logger.debug("   ✅ Prompt caching is working!")
     else:
-        print(f"\n⚠️  No cache hits detected (cache may have expired or not been created)")
+        logger.warning("\n⚠️  No cache hits detected (cache may have expired or not been created)")
 
-    print("\n" + "="*70)
-    print("🎉 All tests completed successfully!")
-    print("="*70)
+    logger.info("\n" + _RULE)
+    logger.info("🎉 All tests completed successfully!")
+    logger.info(_RULE)
 
-    print(f"\n✅ Summary:")
-    print(f"   • Model: {settings.CLAUDE_MODEL}")
-    print(f"   • Prompt caching: {'ACTIVE' if cache_stats2.get('cache_read_tokens', 0) > 0 else 'NOT DETECTED'}")
-    print(f"   • Analysis quality: GOOD (structured output received)")
-    print(f"   • Integration status: ✅ WORKING")
+    logger.info("\n✅ Summary:")
+    logger.info("   • Model: %s", settings.CLAUDE_MODEL)
+    logger.info("   • Prompt caching: %s", 'ACTIVE' if cache_read2 > 0 else 'NOT DETECTED')
+    logger.info("   • Analysis quality: GOOD (structured output received)")
+    logger.info("   • Integration status: ✅ WORKING")
 
 except Exception as e:
-    print(f"\n❌ Test failed with error:")
-    print(f"   {str(e)}")
-    import traceback
-    traceback.print_exc()
+    logger.exception("\n❌ Test failed with error:\n   %s", e)
     sys.exit(1)
@@ -59,11 +59,11 @@ export const getResults = async (jobId) => {
 };
 
 /**
- * Get all jobs
+ * Get jobs, newest first (pass the previous next_cursor as `before` to page)
  */
-export const getJobs = async (limit = 20, offset = 0) => {
+export const getJobs = async (limit = 20, before = null) => {
   const response = await apiClient.get('/api/jobs', {
-    params: { limit, offset },
+    params: before ? { limit, before } : { limit },
   });
   return response.data;
 };